@@ -20,6 +20,8 @@ from app.models import (
     Chat,
     Message,
     FinalDocument,
+    Notification,
+    BroadcastOutbox,
 )
 
 # this is the Alembic Config object, which provides
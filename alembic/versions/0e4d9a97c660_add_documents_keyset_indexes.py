@@ -0,0 +1,63 @@
+"""Add documents keyset indexes
+
+Revision ID: 0e4d9a97c660
+Revises: b486d6f5c293
+Create Date: 2026-10-17 18:02:44.615208
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0e4d9a97c660'
+down_revision = 'b486d6f5c293'
+branch_labels = None
+depends_on = None
+
+# Список документов: ORDER BY created_at DESC, id DESC, фильтры по проекту и статусу
+INDEXES = [
+    ('ix_documents_created_at_id', ['created_at', 'id']),
+    ('ix_documents_project_id_created_at_id', ['project_id', 'created_at', 'id']),
+    ('ix_documents_status_created_at_id', ['status', 'created_at', 'id']),
+]
+
+
+def upgrade() -> None:
+    # CONCURRENTLY нельзя выполнять внутри транзакции
+    with op.get_context().autocommit_block():
+        for name, columns in INDEXES:
+            op.create_index(
+                name,
+                'documents',
+                columns,
+                unique=False,
+                postgresql_concurrently=True,
+                if_not_exists=True,
+            )
+        # Покрывается префиксом ix_documents_project_id_created_at_id
+        op.drop_index(
+            'ix_documents_project_id',
+            table_name='documents',
+            postgresql_concurrently=True,
+            if_exists=True,
+        )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ix_documents_project_id',
+            'documents',
+            ['project_id'],
+            unique=False,
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+        for name, _ in reversed(INDEXES):
+            op.drop_index(
+                name,
+                table_name='documents',
+                postgresql_concurrently=True,
+                if_exists=True,
+            )
@@ -0,0 +1,51 @@
+"""Add chat summary columns
+
+Revision ID: 2e89cb458f61
+Revises: d5c1905d34b9
+Create Date: 2026-10-17 10:12:41.305214
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '2e89cb458f61'
+down_revision = 'd5c1905d34b9'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column('chats', sa.Column('last_message', sa.String(length=2000), nullable=True))
+    op.add_column('chats', sa.Column('last_message_at', sa.DateTime(), nullable=True))
+    op.add_column('chats', sa.Column('unread_count', sa.Integer(), server_default='0', nullable=False))
+
+    # Заполняем сводку по уже существующим сообщениям одним проходом по messages:
+    # индекса messages(chat_id, sent_at) еще нет (он создается в 33a32be57c64),
+    # поэтому коррелированные подзапросы на каждый чат сканировали бы таблицу
+    op.execute(
+        """
+        UPDATE chats SET
+            last_message = s.text,
+            last_message_at = s.sent_at,
+            unread_count = s.unread_count
+        FROM (
+            SELECT DISTINCT ON (m.chat_id)
+                m.chat_id,
+                m.text,
+                m.sent_at,
+                count(*) FILTER (WHERE m.is_from_specialist AND NOT m.is_read)
+                    OVER (PARTITION BY m.chat_id) AS unread_count
+            FROM messages m
+            ORDER BY m.chat_id, m.sent_at DESC, m.id DESC
+        ) s
+        WHERE chats.id = s.chat_id
+        """
+    )
+
+
+def downgrade() -> None:
+    op.drop_column('chats', 'unread_count')
+    op.drop_column('chats', 'last_message_at')
+    op.drop_column('chats', 'last_message')
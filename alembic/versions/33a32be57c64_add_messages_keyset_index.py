@@ -0,0 +1,39 @@
+"""Add messages keyset index
+
+Revision ID: 33a32be57c64
+Revises: 2e89cb458f61
+Create Date: 2026-10-17 11:04:18.552190
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '33a32be57c64'
+down_revision = '2e89cb458f61'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # CONCURRENTLY нельзя выполнять внутри транзакции
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ix_messages_chat_id_sent_at_id',
+            'messages',
+            ['chat_id', 'sent_at', 'id'],
+            unique=False,
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index(
+            'ix_messages_chat_id_sent_at_id',
+            table_name='messages',
+            postgresql_concurrently=True,
+            if_exists=True,
+        )
@@ -0,0 +1,66 @@
+"""Add notifications
+
+Revision ID: 541aa8a87ea7
+Revises: 85f26e63cbbd
+Create Date: 2026-10-17 13:22:57.104836
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '541aa8a87ea7'
+down_revision = '85f26e63cbbd'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table('notifications',
+    sa.Column('id', sa.UUID(), nullable=False),
+    sa.Column('type', sa.Enum('NEW_REQUEST', 'NEW_DOCUMENT', 'NEW_MESSAGE', 'CAMERA_OFFLINE', name='notificationtype'), nullable=False),
+    sa.Column('title', sa.String(length=255), nullable=False),
+    sa.Column('message', sa.String(length=2000), nullable=False),
+    sa.Column('project_id', sa.UUID(), nullable=True),
+    sa.Column('document_id', sa.UUID(), nullable=True),
+    sa.Column('chat_id', sa.UUID(), nullable=True),
+    sa.Column('is_read', sa.Boolean(), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.ForeignKeyConstraint(['project_id'], ['projects.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_notifications_is_read_created_at', 'notifications', ['is_read', 'created_at', 'id'], unique=False)
+    op.create_index('ix_notifications_created_at', 'notifications', ['created_at', 'id'], unique=False)
+    op.create_index('ix_notifications_project_id', 'notifications', ['project_id'], unique=False)
+
+    # Переносим уведомления, которые раньше строились на лету.
+    # id совпадают с прежними временными id (id проекта / документа).
+    op.execute(
+        """
+        INSERT INTO notifications (id, type, title, message, project_id, is_read, created_at)
+        SELECT p.id, 'NEW_REQUEST', 'Новый запрос на строительство',
+               'Проект ''' || p.name || ''' запрошен на строительство',
+               p.id, false, p.created_at
+        FROM projects p
+        WHERE p.status = 'REQUESTED'
+        """
+    )
+    op.execute(
+        """
+        INSERT INTO notifications (id, type, title, message, project_id, document_id, is_read, created_at)
+        SELECT d.id, 'NEW_DOCUMENT', 'Новый документ на согласование',
+               'Документ ''' || d.title || ''' требует согласования',
+               d.project_id, d.id, false, COALESCE(d.submitted_at, d.created_at)
+        FROM documents d
+        WHERE d.status = 'PENDING'
+        """
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_notifications_project_id', table_name='notifications')
+    op.drop_index('ix_notifications_created_at', table_name='notifications')
+    op.drop_index('ix_notifications_is_read_created_at', table_name='notifications')
+    op.drop_table('notifications')
+    sa.Enum(name='notificationtype').drop(op.get_bind(), checkfirst=True)
@@ -0,0 +1,61 @@
+"""Add secondary indexes for foreign keys and hot filters
+
+Revision ID: 7f1433f3aa82
+Revises: 33a32be57c64
+Create Date: 2026-10-17 11:48:52.917403
+
+Индексы создаются CONCURRENTLY, поэтому миграцию можно применять
+на работающей базе без блокировки записи в таблицы.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '7f1433f3aa82'
+down_revision = '33a32be57c64'
+branch_labels = None
+depends_on = None
+
+
+# (имя, таблица, колонки, условие частичного индекса)
+INDEXES = [
+    ('ix_messages_chat_id_unread_from_specialist', 'messages', ['chat_id'],
+     'is_from_specialist AND NOT is_read'),
+    ('ix_documents_project_id', 'documents', ['project_id'], None),
+    ('ix_documents_pending_created_at', 'documents', ['created_at'], "status = 'PENDING'"),
+    ('ix_project_stages_project_id', 'project_stages', ['project_id'], None),
+    ('ix_final_documents_project_id', 'final_documents', ['project_id'], None),
+    ('ix_cameras_construction_site_id', 'cameras', ['construction_site_id'], None),
+    ('ix_chats_project_id_created_at', 'chats', ['project_id', 'created_at'], None),
+    ('ix_chats_active_last_message_at', 'chats',
+     [sa.text('last_message_at DESC NULLS LAST'), sa.text('id DESC')], 'is_active'),
+    ('ix_projects_created_at', 'projects', ['created_at'], None),
+    ('ix_projects_status_created_at', 'projects', ['status', 'created_at'], None),
+]
+
+
+def upgrade() -> None:
+    # CONCURRENTLY нельзя выполнять внутри транзакции
+    with op.get_context().autocommit_block():
+        for name, table, columns, where in INDEXES:
+            op.create_index(
+                name,
+                table,
+                columns,
+                unique=False,
+                postgresql_where=sa.text(where) if where else None,
+                postgresql_concurrently=True,
+                if_not_exists=True,
+            )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        for name, table, _, _ in reversed(INDEXES):
+            op.drop_index(
+                name,
+                table_name=table,
+                postgresql_concurrently=True,
+                if_exists=True,
+            )
@@ -0,0 +1,39 @@
+"""Add construction sites keyset index
+
+Revision ID: 85f26e63cbbd
+Revises: 7f1433f3aa82
+Create Date: 2026-10-17 12:41:09.310472
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '85f26e63cbbd'
+down_revision = '7f1433f3aa82'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # CONCURRENTLY нельзя выполнять внутри транзакции
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ix_construction_sites_created_at_id',
+            'construction_sites',
+            ['created_at', 'id'],
+            unique=False,
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index(
+            'ix_construction_sites_created_at_id',
+            table_name='construction_sites',
+            postgresql_concurrently=True,
+            if_exists=True,
+        )
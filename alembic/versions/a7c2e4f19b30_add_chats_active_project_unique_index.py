@@ -0,0 +1,53 @@
+"""Add unique index on active chat per project
+
+Revision ID: a7c2e4f19b30
+Revises: 0e4d9a97c660
+Create Date: 2026-10-17 20:31:12.402817
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a7c2e4f19b30'
+down_revision = '0e4d9a97c660'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Лишние активные чаты проекта (созданные гонкой) деактивируются:
+    # активным остается самый ранний, как его и выбирает API
+    op.execute(
+        """
+        UPDATE chats SET is_active = false
+        WHERE is_active AND EXISTS (
+            SELECT 1 FROM chats AS earlier
+            WHERE earlier.project_id = chats.project_id
+              AND earlier.is_active
+              AND (earlier.created_at, earlier.id) < (chats.created_at, chats.id)
+        )
+        """
+    )
+    # CONCURRENTLY нельзя выполнять внутри транзакции
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ux_chats_project_id_active',
+            'chats',
+            ['project_id'],
+            unique=True,
+            postgresql_where=sa.text('is_active'),
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index(
+            'ux_chats_project_id_active',
+            table_name='chats',
+            postgresql_concurrently=True,
+            if_exists=True,
+        )
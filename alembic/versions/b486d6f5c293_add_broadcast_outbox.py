@@ -0,0 +1,32 @@
+"""Add broadcast outbox
+
+Revision ID: b486d6f5c293
+Revises: 541aa8a87ea7
+Create Date: 2026-10-17 14:05:33.418920
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b486d6f5c293'
+down_revision = '541aa8a87ea7'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table('broadcast_outbox',
+    sa.Column('message_id', sa.UUID(), nullable=False),
+    sa.Column('payload', sa.JSON(), nullable=False),
+    sa.Column('attempts', sa.Integer(), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.PrimaryKeyConstraint('message_id')
+    )
+    op.create_index('ix_broadcast_outbox_created_at', 'broadcast_outbox', ['created_at', 'message_id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_broadcast_outbox_created_at', table_name='broadcast_outbox')
+    op.drop_table('broadcast_outbox')
@@ -0,0 +1,24 @@
+"""Add broadcast outbox lease
+
+Revision ID: f3b8d2c61e07
+Revises: a7c2e4f19b30
+Create Date: 2026-10-17 21:12:40.118254
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'f3b8d2c61e07'
+down_revision = 'a7c2e4f19b30'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column('broadcast_outbox', sa.Column('locked_until', sa.DateTime(), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column('broadcast_outbox', 'locked_until')
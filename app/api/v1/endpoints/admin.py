@@ -1,17 +1,21 @@
-from fastapi import APIRouter, Depends, status
-from sqlalchemy.orm import Session
-from sqlalchemy import func, and_, or_
+from fastapi import APIRouter, Depends, Query, Response, status
+from sqlalchemy import and_, or_, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import joinedload
 from typing import List, Optional
 from uuid import UUID
 from datetime import datetime, timedelta
 
-from app.core.database import get_db
+from app.core.database import get_db, insert_on_conflict_do_nothing, transition_status
 from app.core.exceptions import NotFoundError, BadRequestError
-from app.models.project import Project, ProjectStatus, ProjectStage, StageStatus
+from app.core.pagination import NEXT_CURSOR_HEADER, decode_cursor, encode_cursor, keyset_predicate
+from app.models.project import Project, ProjectStatus, ProjectStage, StageStatus, project_select
 from app.models.document import Document, DocumentStatus
 from app.models.construction_site import ConstructionSite, Camera
 # ConstructionObject - это схема ответа, а не модель
 from app.models.chat import Chat, Message
+from app.models.notification import Notification, NotificationType
+from app.models.statistics import statistics_select, statistics_snapshot
 from app.schemas.construction_site import CameraResponse
 from app.schemas.project import ProjectResponse, ProjectStartRequest, ProjectStageResponse
 from app.schemas.base import BaseSchema, EmptyResponse
@@ -104,7 +108,7 @@ class BatchRejectRequest(BaseModel):
 class NotificationResponse(BaseSchema):
     """Схема уведомления"""
     id: UUID
-    type: str  # "new_request" | "new_document" | "new_message" | "camera_offline"
+    type: NotificationType
     title: str
     message: str
     projectId: Optional[UUID] = None
@@ -119,7 +123,7 @@ class NotificationResponse(BaseSchema):
 @router.post("/projects", response_model=ProjectResponse, status_code=status.HTTP_201_CREATED)
 async def create_project(
     request: ProjectCreateRequest,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """
     Создать новый проект
@@ -139,7 +143,7 @@ async def create_project(
         status=ProjectStatus.AVAILABLE
     )
     db.add(project)
-    db.flush()
+    await db.flush()
     
     # Создаем этапы
     for stage_name in request.stages:
@@ -150,10 +154,15 @@ async def create_project(
         )
         db.add(stage)
     
-    db.commit()
-    db.refresh(project)
-    # Загружаем связанные этапы
-    project.stages  # Это загрузит связанные этапы через relationship
+    await db.commit()
+    # Загружаем связанные этапы и площадку
+    project = (
+        await db.execute(
+            project_select()
+            .where(Project.id == project.id)
+            .execution_options(populate_existing=True)
+        )
+    ).scalar_one()
     # Явно сериализуем через Pydantic для правильного формата
     project_response = ProjectResponse.model_validate(project)
     return project_response
@@ -163,14 +172,14 @@ async def create_project(
 async def update_project(
     id: UUID,
     request: ProjectUpdateRequest,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """
     Обновить проект
     
     Обновляет параметры проекта. Можно обновить только указанные поля.
     """
-    project = db.query(Project).filter(Project.id == id).first()
+    project = await db.get(Project, id)
     if not project:
         raise NotFoundError("Project", str(id))
     
@@ -199,27 +208,33 @@ async def update_project(
             raise BadRequestError(f"Invalid status: {request.status}")
     
     project.updated_at = datetime.utcnow()
-    db.commit()
-    db.refresh(project)
+    await db.commit()
+    project = (
+        await db.execute(
+            project_select()
+            .where(Project.id == id)
+            .execution_options(populate_existing=True)
+        )
+    ).scalar_one()
     return project
 
 
 @router.delete("/projects/{id}", response_model=None, status_code=status.HTTP_204_NO_CONTENT)
 async def delete_project(
     id: UUID,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """
     Удалить проект
     
     Удаляет проект и все связанные данные (этапы, документы и т.д.).
     """
-    project = db.query(Project).filter(Project.id == id).first()
+    project = await db.get(Project, id)
     if not project:
         raise NotFoundError("Project", str(id))
     
-    db.delete(project)
-    db.commit()
+    await db.delete(project)
+    await db.commit()
     return None
 
 
@@ -229,12 +244,12 @@ async def delete_project(
 async def create_stage(
     id: UUID,
     request: StageCreateRequest,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """
     Добавить этап к проекту
     """
-    project = db.query(Project).filter(Project.id == id).first()
+    project = await db.get(Project, id)
     if not project:
         raise NotFoundError("Project", str(id))
     
@@ -244,8 +259,7 @@ async def create_stage(
         status=StageStatus.PENDING
     )
     db.add(stage)
-    db.commit()
-    db.refresh(stage)
+    await db.commit()
     return stage
 
 
@@ -254,19 +268,23 @@ async def update_stage(
     id: UUID,
     stage_id: UUID,
     request: StageUpdateRequest,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """
     Обновить этап проекта
     """
-    project = db.query(Project).filter(Project.id == id).first()
+    project = await db.get(Project, id)
     if not project:
         raise NotFoundError("Project", str(id))
     
-    stage = db.query(ProjectStage).filter(
-        ProjectStage.id == stage_id,
-        ProjectStage.project_id == id
-    ).first()
+    stage = (
+        await db.execute(
+            select(ProjectStage).where(
+                ProjectStage.id == stage_id,
+                ProjectStage.project_id == id
+            )
+        )
+    ).scalar_one_or_none()
     if not stage:
         raise NotFoundError("Stage", str(stage_id))
     
@@ -279,8 +297,7 @@ async def update_stage(
             raise BadRequestError(f"Invalid status: {request.status}")
     
     stage.updated_at = datetime.utcnow()
-    db.commit()
-    db.refresh(stage)
+    await db.commit()
     return stage
 
 
@@ -288,24 +305,28 @@ async def update_stage(
 async def delete_stage(
     id: UUID,
     stage_id: UUID,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """
     Удалить этап проекта
     """
-    project = db.query(Project).filter(Project.id == id).first()
+    project = await db.get(Project, id)
     if not project:
         raise NotFoundError("Project", str(id))
     
-    stage = db.query(ProjectStage).filter(
-        ProjectStage.id == stage_id,
-        ProjectStage.project_id == id
-    ).first()
+    stage = (
+        await db.execute(
+            select(ProjectStage).where(
+                ProjectStage.id == stage_id,
+                ProjectStage.project_id == id
+            )
+        )
+    ).scalar_one_or_none()
     if not stage:
         raise NotFoundError("Stage", str(stage_id))
     
-    db.delete(stage)
-    db.commit()
+    await db.delete(stage)
+    await db.commit()
     return None
 
 
@@ -315,26 +336,35 @@ async def delete_stage(
 async def approve_request(
     id: UUID,
     request: ProjectStartRequest,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """
     Одобрить запрос на строительство
     
     Одобряет запрос и начинает строительство (аналогично /start, но для админа).
     """
-    project = db.query(Project).filter(Project.id == id).first()
+    project = await db.get(Project, id)
     if not project:
         raise NotFoundError("Project", str(id))
     
     if project.status != ProjectStatus.REQUESTED:
         raise BadRequestError("Project is not in REQUESTED status")
     
-    # Используем ту же логику, что и в /start
-    project.address = request.address
+    # Используем ту же логику, что и в /start: проект переводится первым
+    await transition_status(
+        db,
+        Project,
+        id,
+        ProjectStatus.REQUESTED,
+        status=ProjectStatus.CONSTRUCTION,
+        address=request.address,
+    )
     
-    construction_site = db.query(ConstructionSite).filter(
-        ConstructionSite.project_id == id
-    ).first()
+    construction_site = (
+        await db.execute(
+            select(ConstructionSite).where(ConstructionSite.project_id == id)
+        )
+    ).scalar_one_or_none()
     
     if not construction_site:
         construction_site = ConstructionSite(
@@ -345,12 +375,15 @@ async def approve_request(
             is_completed=False,
         )
         db.add(construction_site)
-        db.flush()
     
-    chat = db.query(Chat).filter(
-        Chat.project_id == id,
-        Chat.is_active == True
-    ).first()
+    chat = (
+        await db.execute(
+            select(Chat).where(
+                Chat.project_id == id,
+                Chat.is_active == True
+            ).limit(1)
+        )
+    ).scalar_one_or_none()
     if not chat:
         chat = Chat(
             project_id=id,
@@ -359,9 +392,14 @@ async def approve_request(
         )
         db.add(chat)
     
-    project.status = ProjectStatus.CONSTRUCTION
-    db.commit()
-    db.refresh(project)
+    await db.commit()
+    project = (
+        await db.execute(
+            project_select()
+            .where(Project.id == id)
+            .execution_options(populate_existing=True)
+        )
+    ).scalar_one()
     return project
 
 
@@ -369,80 +407,101 @@ async def approve_request(
 async def reject_request(
     id: UUID,
     request: RequestRejectRequest,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """
     Отклонить запрос на строительство
     
     Отклоняет запрос и возвращает проект в статус AVAILABLE.
     """
-    project = db.query(Project).filter(Project.id == id).first()
+    project = await db.get(Project, id)
     if not project:
         raise NotFoundError("Project", str(id))
     
     if project.status != ProjectStatus.REQUESTED:
         raise BadRequestError("Project is not in REQUESTED status")
     
-    project.status = ProjectStatus.AVAILABLE
+    await transition_status(db, Project, id, ProjectStatus.REQUESTED, status=ProjectStatus.AVAILABLE)
     # Причина отклонения передается в запросе, но не сохраняется в БД
     # Для сохранения причины можно добавить поле rejection_reason в модель Project
-    db.commit()
+    await db.commit()
     return None
 
 
 @router.post("/projects/batch-approve", response_model=List[ProjectResponse])
 async def batch_approve_requests(
     request: BatchApproveRequest,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """
     Массовое одобрение запросов
     
-    Одобряет несколько запросов одновременно.
-    """
-    projects = db.query(Project).filter(
-        Project.id.in_(request.ids),
-        Project.status == ProjectStatus.REQUESTED
-    ).all()
+    Одобряет несколько запросов одновременно. Число запросов к БД не зависит
+    от размера пакета: один UPDATE статусов, один запрос недостающих площадок
+    и чатов, пакетные INSERT и одна загрузка ответа.
+    """
+    ids = set(request.ids)
+    approved = (
+        await db.execute(
+            update(Project)
+            .where(Project.id.in_(ids), Project.status == ProjectStatus.REQUESTED)
+            .values(status=ProjectStatus.CONSTRUCTION)
+            .returning(Project.id)
+            .execution_options(synchronize_session=False)
+        )
+    ).scalars().all()
     
-    if len(projects) != len(request.ids):
+    if len(approved) != len(ids):
+        await db.rollback()
         raise BadRequestError("Some projects not found or not in REQUESTED status")
     
-    approved_projects = []
-    for project in projects:
-        construction_site = db.query(ConstructionSite).filter(
-            ConstructionSite.project_id == project.id
-        ).first()
-        
-        if not construction_site:
-            construction_site = ConstructionSite(
-                project_id=project.id,
-                start_date=datetime.utcnow(),
-                progress=0.0,
-                all_documents_signed=False,
-                is_completed=False,
-            )
-            db.add(construction_site)
-            db.flush()
-        
-        chat = db.query(Chat).filter(
-            Chat.project_id == project.id,
-            Chat.is_active == True
-        ).first()
-        if not chat:
-            chat = Chat(
-                project_id=project.id,
-                specialist_name="Ваш специалист",
-                is_active=True
-            )
-            db.add(chat)
-        
-        project.status = ProjectStatus.CONSTRUCTION
-        approved_projects.append(project)
+    has_site = select(ConstructionSite.id).where(ConstructionSite.project_id == Project.id).exists()
+    has_chat = (
+        select(Chat.id)
+        .where(Chat.project_id == Project.id, Chat.is_active == True)
+        .exists()
+    )
+    missing = (
+        await db.execute(
+            select(Project.id, has_site, has_chat)
+            .where(Project.id.in_(ids), or_(~has_site, ~has_chat))
+        )
+    ).all()
+    
+    now = datetime.utcnow()
+    sites = [
+        {
+            "project_id": project_id,
+            "start_date": now,
+            "progress": 0.0,
+            "all_documents_signed": False,
+            "is_completed": False,
+        }
+        for project_id, site_exists, _ in missing if not site_exists
+    ]
+    chats = [
+        {"project_id": project_id, "specialist_name": "Ваш специалист", "is_active": True}
+        for project_id, _, chat_exists in missing if not chat_exists
+    ]
+    if sites:
+        # Площадку могли создать параллельно (approve-request, /start): такие строки пропускаются
+        await db.execute(insert_on_conflict_do_nothing(db, ConstructionSite, "project_id"), sites)
+    if chats:
+        # Активный чат уникален для проекта (ux_chats_project_id_active)
+        await db.execute(
+            insert_on_conflict_do_nothing(db, Chat, "project_id", index_where=Chat.is_active),
+            chats,
+        )
     
-    db.commit()
-    for project in approved_projects:
-        db.refresh(project)
+    await db.commit()
+    # Одна загрузка: этапы через joinedload, так как selectinload делит большие пакеты на части
+    approved_projects = (
+        await db.execute(
+            select(Project)
+            .options(joinedload(Project.construction_site), joinedload(Project.stages))
+            .where(Project.id.in_(ids))
+        )
+    ).unique().scalars().all()
     
     return approved_projects
 
@@ -453,19 +512,19 @@ async def batch_approve_requests(
 async def update_progress(
     site_id: UUID,
     request: ProgressUpdateRequest,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """
     Обновить прогресс строительства
     
     Обновляет прогресс строительной площадки (0.0 - 1.0).
     """
-    site = db.query(ConstructionSite).filter(ConstructionSite.id == site_id).first()
+    site = await db.get(ConstructionSite, site_id)
     if not site:
         raise NotFoundError("ConstructionSite", str(site_id))
     
     site.progress = request.progress
-    db.commit()
+    await db.commit()
     return None
 
 
@@ -474,7 +533,7 @@ async def update_object_stage_status(
     object_id: UUID,
     stage_id: UUID,
     request: StageStatusUpdateRequest,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """
     Обновить статус этапа объекта строительства
@@ -482,15 +541,19 @@ async def update_object_stage_status(
     Обновляет статус этапа объекта (pending → in_progress → completed).
     """
     # Находим объект через construction_site (object_id = site.id)
-    site = db.query(ConstructionSite).filter(ConstructionSite.id == object_id).first()
+    site = await db.get(ConstructionSite, object_id)
     if not site:
         raise NotFoundError("ConstructionSite", str(object_id))
     
     # Находим этап проекта
-    stage = db.query(ProjectStage).filter(
-        ProjectStage.id == stage_id,
-        ProjectStage.project_id == site.project_id
-    ).first()
+    stage = (
+        await db.execute(
+            select(ProjectStage).where(
+                ProjectStage.id == stage_id,
+                ProjectStage.project_id == site.project_id
+            )
+        )
+    ).scalar_one_or_none()
     if not stage:
         raise NotFoundError("Stage", str(stage_id))
     
@@ -500,115 +563,99 @@ async def update_object_stage_status(
         raise BadRequestError(f"Invalid status: {request.status}")
     
     stage.updated_at = datetime.utcnow()
-    db.commit()
+    await db.commit()
     return None
 
 
 # ==================== АНАЛИТИКА ====================
 
 @router.get("/statistics", response_model=StatisticsResponse)
-async def get_statistics(db: Session = Depends(get_db)):
+async def get_statistics(db: AsyncSession = Depends(get_db)):
     """
     Получить общую статистику
     
     Возвращает статистику по проектам, документам и финансам.
+    Считается одним запросом и несколько секунд отдается из снимка
+    в памяти; снимок сбрасывается при изменении проектов и документов.
     """
-    # Статистика проектов
-    total_projects = db.query(func.count(Project.id)).scalar() or 0
-    available_projects = db.query(func.count(Project.id)).filter(
-        Project.status == ProjectStatus.AVAILABLE
-    ).scalar() or 0
-    requested_projects = db.query(func.count(Project.id)).filter(
-        Project.status == ProjectStatus.REQUESTED
-    ).scalar() or 0
-    in_progress_projects = db.query(func.count(Project.id)).filter(
-        Project.status == ProjectStatus.CONSTRUCTION
-    ).scalar() or 0
-    
-    # Статистика документов
-    total_documents = db.query(func.count(Document.id)).scalar() or 0
-    pending_documents = db.query(func.count(Document.id)).filter(
-        Document.status == DocumentStatus.PENDING
-    ).scalar() or 0
-    approved_documents = db.query(func.count(Document.id)).filter(
-        Document.status == DocumentStatus.APPROVED
-    ).scalar() or 0
-    rejected_documents = db.query(func.count(Document.id)).filter(
-        Document.status == DocumentStatus.REJECTED
-    ).scalar() or 0
-    
-    # Финансовая статистика
-    total_revenue_result = db.query(func.sum(Project.price)).filter(
-        Project.status == ProjectStatus.CONSTRUCTION
-    ).scalar()
-    total_revenue = float(total_revenue_result) if total_revenue_result else 0.0
-    
-    average_price_result = db.query(func.avg(Project.price)).scalar()
-    average_price = float(average_price_result) if average_price_result else 0.0
-    
+    return await statistics_snapshot.get_or_load(lambda: _load_statistics(db))
+
+
+async def _load_statistics(db: AsyncSession) -> StatisticsResponse:
+    row = (await db.execute(statistics_select())).one()
     return StatisticsResponse(
-        totalProjects=total_projects,
-        availableProjects=available_projects,
-        requestedProjects=requested_projects,
-        inProgressProjects=in_progress_projects,
-        totalDocuments=total_documents,
-        pendingDocuments=pending_documents,
-        approvedDocuments=approved_documents,
-        rejectedDocuments=rejected_documents,
-        totalRevenue=total_revenue,
-        averageProjectPrice=average_price
+        totalProjects=row.total_projects,
+        availableProjects=row.available_projects,
+        requestedProjects=row.requested_projects,
+        inProgressProjects=row.in_progress_projects,
+        totalDocuments=row.total_documents,
+        pendingDocuments=row.pending_documents,
+        approvedDocuments=row.approved_documents,
+        rejectedDocuments=row.rejected_documents,
+        totalRevenue=float(row.total_revenue or 0.0),
+        averageProjectPrice=float(row.average_price or 0.0)
     )
 
 
 # ==================== МАССОВЫЕ ОПЕРАЦИИ ====================
 
+async def _moderate_pending_documents(db: AsyncSession, ids: List[UUID], **values) -> None:
+    """
+    Переводит пакет документов из PENDING одним UPDATE ... RETURNING.
+    Если хотя бы один документ не найден или уже рассмотрен, транзакция
+    откатывается целиком.
+    """
+    ids = set(ids)
+    updated = (
+        await db.execute(
+            update(Document)
+            .where(Document.id.in_(ids), Document.status == DocumentStatus.PENDING)
+            .values(**values)
+            .returning(Document.id)
+            .execution_options(synchronize_session=False)
+        )
+    ).scalars().all()
+    
+    if len(updated) != len(ids):
+        await db.rollback()
+        raise BadRequestError("Some documents not found or not in PENDING status")
+    
+    await db.commit()
+
+
 @router.post("/documents/batch-approve", response_model=None, status_code=status.HTTP_204_NO_CONTENT)
 async def batch_approve_documents(
     request: BatchApproveRequest,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """
     Массовое одобрение документов
     """
-    documents = db.query(Document).filter(
-        Document.id.in_(request.ids),
-        Document.status == DocumentStatus.PENDING
-    ).all()
-    
-    if len(documents) != len(request.ids):
-        raise BadRequestError("Some documents not found or not in PENDING status")
-    
-    for document in documents:
-        document.status = DocumentStatus.APPROVED
-        document.approved_at = datetime.utcnow()
-        document.rejection_reason = None
-    
-    db.commit()
+    await _moderate_pending_documents(
+        db,
+        request.ids,
+        status=DocumentStatus.APPROVED,
+        approved_at=datetime.utcnow(),
+        rejection_reason=None,
+    )
     return None
 
 
 @router.post("/documents/batch-reject", response_model=None, status_code=status.HTTP_204_NO_CONTENT)
 async def batch_reject_documents(
     request: BatchRejectRequest,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """
     Массовое отклонение документов
     """
-    documents = db.query(Document).filter(
-        Document.id.in_(request.ids),
-        Document.status == DocumentStatus.PENDING
-    ).all()
-    
-    if len(documents) != len(request.ids):
-        raise BadRequestError("Some documents not found or not in PENDING status")
-    
-    for document in documents:
-        document.status = DocumentStatus.REJECTED
-        document.rejection_reason = request.reason
-        document.approved_at = None
-    
-    db.commit()
+    await _moderate_pending_documents(
+        db,
+        request.ids,
+        status=DocumentStatus.REJECTED,
+        rejection_reason=request.reason,
+        approved_at=None,
+    )
     return None
 
 # ==================== УПРАВЛЕНИЕ КАМЕРАМИ ====================
@@ -634,12 +681,12 @@ class CameraUpdateRequest(BaseModel):
 async def create_camera(
     site_id: UUID,
     request: CameraCreateRequest,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """
     Добавить камеру на строительную площадку
     """
-    site = db.query(ConstructionSite).filter(ConstructionSite.id == site_id).first()
+    site = await db.get(ConstructionSite, site_id)
     if not site:
         raise NotFoundError("ConstructionSite", str(site_id))
     
@@ -652,8 +699,7 @@ async def create_camera(
         is_active=True
     )
     db.add(camera)
-    db.commit()
-    db.refresh(camera)
+    await db.commit()
     return camera
 
 
@@ -662,19 +708,23 @@ async def update_camera(
     site_id: UUID,
     camera_id: UUID,
     request: CameraUpdateRequest,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """
     Обновить камеру
     """
-    site = db.query(ConstructionSite).filter(ConstructionSite.id == site_id).first()
+    site = await db.get(ConstructionSite, site_id)
     if not site:
         raise NotFoundError("ConstructionSite", str(site_id))
     
-    camera = db.query(Camera).filter(
-        Camera.id == camera_id,
-        Camera.construction_site_id == site_id
-    ).first()
+    camera = (
+        await db.execute(
+            select(Camera).where(
+                Camera.id == camera_id,
+                Camera.construction_site_id == site_id
+            )
+        )
+    ).scalar_one_or_none()
     if not camera:
         raise NotFoundError("Camera", str(camera_id))
     
@@ -690,8 +740,7 @@ async def update_camera(
         camera.is_active = request.is_active
     
     camera.updated_at = datetime.utcnow()
-    db.commit()
-    db.refresh(camera)
+    await db.commit()
     return camera
 
 
@@ -699,95 +748,100 @@ async def update_camera(
 async def delete_camera(
     site_id: UUID,
     camera_id: UUID,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """
     Удалить камеру
     """
-    site = db.query(ConstructionSite).filter(ConstructionSite.id == site_id).first()
+    site = await db.get(ConstructionSite, site_id)
     if not site:
         raise NotFoundError("ConstructionSite", str(site_id))
     
-    camera = db.query(Camera).filter(
-        Camera.id == camera_id,
-        Camera.construction_site_id == site_id
-    ).first()
+    camera = (
+        await db.execute(
+            select(Camera).where(
+                Camera.id == camera_id,
+                Camera.construction_site_id == site_id
+            )
+        )
+    ).scalar_one_or_none()
     if not camera:
         raise NotFoundError("Camera", str(camera_id))
     
-    db.delete(camera)
-    db.commit()
+    await db.delete(camera)
+    await db.commit()
     return None
 
 
 # ==================== УВЕДОМЛЕНИЯ ====================
 
+def _notification_response(notification: Notification) -> NotificationResponse:
+    """Собирает ответ уведомления (поля ответа в camelCase без alias)"""
+    return NotificationResponse(
+        id=notification.id,
+        type=notification.type,
+        title=notification.title,
+        message=notification.message,
+        projectId=notification.project_id,
+        documentId=notification.document_id,
+        chatId=notification.chat_id,
+        isRead=notification.is_read,
+        createdAt=notification.created_at
+    )
+
+
 @router.get("/notifications", response_model=List[NotificationResponse])
 async def get_notifications(
+    response: Response,
     unread_only: bool = False,
-    db: Session = Depends(get_db)
+    limit: int = Query(50, ge=1, le=200),
+    cursor: Optional[str] = None,
+    db: AsyncSession = Depends(get_db)
 ):
     """
     Получить список уведомлений
     
-    Возвращает уведомления для администратора на основе данных из БД.
-    Уведомления генерируются динамически из запрошенных проектов и документов на согласовании.
-    Для полноценной реализации с историей и статусом прочтения можно добавить модель Notification в БД.
-    """
-    notifications = []
-    
-    # Уведомления о новых запросах
-    requested_projects = db.query(Project).filter(
-        Project.status == ProjectStatus.REQUESTED
-    ).all()
-    for project in requested_projects:
-        notifications.append(NotificationResponse(
-            id=project.id,  # Временный ID
-            type="new_request",
-            title="Новый запрос на строительство",
-            message=f"Проект '{project.name}' запрошен на строительство",
-            projectId=project.id,
-            isRead=False,
-            createdAt=project.created_at
-        ))
-    
-    # Уведомления о новых документах
-    pending_documents = db.query(Document).filter(
-        Document.status == DocumentStatus.PENDING
-    ).all()
-    for document in pending_documents:
-        notifications.append(NotificationResponse(
-            id=document.id,  # Временный ID
-            type="new_document",
-            title="Новый документ на согласование",
-            message=f"Документ '{document.title}' требует согласования",
-            projectId=document.project_id,
-            documentId=document.id,
-            isRead=False,
-            createdAt=document.submitted_at or document.created_at
-        ))
-    
-    # Сортируем по дате (новые первыми)
-    notifications.sort(key=lambda n: n.createdAt, reverse=True)
+    Возвращает уведомления для администратора, новые первыми. Уведомления
+    записываются в момент события (запрос на строительство, документ
+    на согласование, сообщение пользователя).
     
+    В заголовке X-Next-Cursor возвращается курсор следующей страницы,
+    который передается в параметре cursor.
+    """
+    order = (Notification.created_at, Notification.id)
+    query = select(Notification)
     if unread_only:
-        notifications = [n for n in notifications if not n.isRead]
+        query = query.where(Notification.is_read == False)  # noqa: E712
+    if cursor is not None:
+        query = query.where(
+            keyset_predicate(order, decode_cursor(cursor, datetime, UUID, nullable=False), ascending=False)
+        )
+    # Порядок совпадает с индексами ix_notifications_*_created_at
+    query = query.order_by(*(column.desc() for column in order)).limit(limit + 1)
     
-    return notifications[:50]  # Ограничиваем 50 уведомлениями
+    notifications = (await db.execute(query)).scalars().all()
+    if len(notifications) > limit:
+        notifications = notifications[:limit]
+        last = notifications[-1]
+        response.headers[NEXT_CURSOR_HEADER] = encode_cursor(last.created_at, last.id)
+    
+    return [_notification_response(notification) for notification in notifications]
 
 
 @router.post("/notifications/{notification_id}/read", response_model=None, status_code=status.HTTP_204_NO_CONTENT)
 async def mark_notification_read(
     notification_id: UUID,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """
     Отметить уведомление как прочитанное
-    
-    В текущей реализации уведомления генерируются динамически, поэтому отметка прочтения
-    не сохраняется в БД. Для сохранения статуса прочтения можно добавить модель Notification в БД.
     """
-    # В текущей реализации уведомления генерируются динамически,
-    # поэтому отметка прочтения не сохраняется. Возвращаем успех для совместимости API.
+    result = await db.execute(
+        update(Notification)
+        .where(Notification.id == notification_id)
+        .values(is_read=True)
+    )
+    if result.rowcount == 0:
+        raise NotFoundError("Notification", str(notification_id))
+    await db.commit()
     return None
-
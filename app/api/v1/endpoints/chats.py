@@ -1,132 +1,177 @@
-from fastapi import APIRouter, Depends, status, BackgroundTasks
-from sqlalchemy.orm import Session
-from sqlalchemy import desc, func
-from typing import List
-from uuid import UUID
+from fastapi import APIRouter, Depends, Query, Response, WebSocket, WebSocketDisconnect, status
+from fastapi.responses import StreamingResponse
+from sqlalchemy import case, or_, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import AsyncIterator, List, Optional
+from uuid import UUID, uuid4
 from datetime import datetime
-import httpx
-import os
 import asyncio
 
+from app.core.config import settings
 from app.core.database import get_db
 from app.core.exceptions import NotFoundError, BadRequestError
+from app.core.outbox import outbox_relay
+from app.core.pagination import (
+    AFTER_CURSOR_HEADER,
+    BEFORE_CURSOR_HEADER,
+    NEXT_CURSOR_HEADER,
+    decode_cursor,
+    encode_cursor,
+    keyset_predicate,
+)
+from app.core.pubsub import chat_hub, publish_message_event
+from app.core.responses import RowsResponse, schema_columns
 from app.models.chat import Chat, Message
+from app.models.notification import message_notification
+from app.models.outbox import BroadcastOutbox
 from app.schemas.chat import ChatResponse, MessageResponse, MessageCreateRequest
 from app.schemas.base import EmptyResponse
 
 router = APIRouter()
 
+# Списки чатов и сообщений отдаются строками без ORM-объектов (app.core.responses)
+_CHAT_COLUMNS = schema_columns(ChatResponse, Chat)
+_MESSAGE_COLUMNS = schema_columns(MessageResponse, Message)
+
+
+def _broadcast_payload(message: Message) -> dict:
+    """Сообщение в формате MessageBroadcastController WebSocket сервиса"""
+    # Java LocalDateTime: секунды без микросекунд, UTC с суффиксом Z
+    sent_at = message.sent_at or datetime.utcnow()
+    return {
+        "messageId": str(message.id),
+        "chatId": str(message.chat_id),
+        "text": message.text,
+        "fromSpecialist": message.is_from_specialist,
+        "isRead": message.is_read,
+        "sentAt": sent_at.replace(microsecond=0).isoformat() + "Z",
+    }
+
 
 @router.get("", response_model=List[ChatResponse])
-async def get_chats(db: Session = Depends(get_db)):
+async def get_chats(
+    response: Response,
+    limit: Optional[int] = Query(None, ge=1),
+    cursor: Optional[str] = None,
+    db: AsyncSession = Depends(get_db)
+):
     """
     Получить список всех чатов
     
     Возвращает список всех чатов пользователя с информацией о последнем сообщении
-    и количестве непрочитанных сообщений.
+    и количестве непрочитанных сообщений. Чаты отсортированы по дате последнего
+    сообщения (новые первыми, чаты без сообщений - в конце).
+    Сводка хранится в самой таблице chats, поэтому сообщения не сканируются.
+    
+    Если указан limit, в заголовке X-Next-Cursor возвращается курсор следующей
+    страницы, который передается в параметре cursor.
     """
-    chats = db.query(Chat).filter(Chat.is_active == True).all()
-    
-    result = []
-    for chat in chats:
-        # Получаем последнее сообщение
-        last_message = db.query(Message).filter(
-            Message.chat_id == chat.id
-        ).order_by(desc(Message.sent_at)).first()
-        
-        # Подсчитываем непрочитанные сообщения (от специалиста)
-        unread_count = db.query(func.count(Message.id)).filter(
-            Message.chat_id == chat.id,
-            Message.is_from_specialist == True,
-            Message.is_read == False
-        ).scalar() or 0
-        
-        response_data = {
-            "id": chat.id,
-            "project_id": chat.project_id,
-            "specialist_name": chat.specialist_name,
-            "specialist_avatar_url": chat.specialist_avatar_url,
-            "last_message": last_message.text if last_message else None,
-            "last_message_at": last_message.sent_at if last_message else None,
-            "unread_count": unread_count,
-            "is_active": chat.is_active,
-        }
-
-        chat_response = ChatResponse(**response_data)
-        result.append(chat_response)
-
-    # Сортируем по дате последнего сообщения (новые первыми)
-    result.sort(key=lambda x: x.lastMessageAt or datetime.min, reverse=True)
+    last_message_at = Chat.last_message_at
+    query = select(*_CHAT_COLUMNS).where(Chat.is_active == True)
+    
+    if cursor is not None:
+        cursor_at, cursor_id = decode_cursor(cursor, datetime, UUID)
+        if cursor_at is not None:
+            query = query.where(or_(
+                keyset_predicate((last_message_at, Chat.id), (cursor_at, cursor_id), ascending=False),
+                last_message_at.is_(None),
+            ))
+        else:
+            query = query.where(last_message_at.is_(None), Chat.id < cursor_id)
     
-    return result
+    # Порядок совпадает с индексом ix_chats_active_last_message_at
+    query = query.order_by(last_message_at.desc().nulls_last(), Chat.id.desc())
+    if limit is not None:
+        # Берем на одну запись больше, чтобы понять, есть ли следующая страница
+        query = query.limit(limit + 1)
+    
+    chats = (await db.execute(query)).mappings().all()
+    if limit is not None and len(chats) > limit:
+        chats = chats[:limit]
+        last = chats[-1]
+        response.headers[NEXT_CURSOR_HEADER] = encode_cursor(last["last_message_at"], last["id"])
+    
+    return RowsResponse(chats, headers=response.headers)
 
 
 @router.get("/{chat_id}", response_model=ChatResponse)
-async def get_chat(chat_id: UUID, db: Session = Depends(get_db)):
+async def get_chat(chat_id: UUID, db: AsyncSession = Depends(get_db)):
     """
     Получить информацию о чате
     
     Возвращает детальную информацию о чате по его идентификатору.
     """
-    chat = db.query(Chat).filter(Chat.id == chat_id).first()
+    chat = await db.get(Chat, chat_id)
     if not chat:
         raise NotFoundError("Chat", str(chat_id))
     
-    # Получаем последнее сообщение
-    last_message = db.query(Message).filter(
-        Message.chat_id == chat_id
-    ).order_by(desc(Message.sent_at)).first()
-    
-    # Подсчитываем непрочитанные сообщения
-    unread_count = db.query(func.count(Message.id)).filter(
-        Message.chat_id == chat_id,
-        Message.is_from_specialist == True,
-        Message.is_read == False
-    ).scalar() or 0
-    
-    response_data = {
-        "id": chat.id,
-        "project_id": chat.project_id,
-        "specialist_name": chat.specialist_name,
-        "specialist_avatar_url": chat.specialist_avatar_url,
-        "last_message": last_message.text if last_message else None,
-        "last_message_at": last_message.sent_at if last_message else None,
-        "unread_count": unread_count,
-        "is_active": chat.is_active,
-    }
-
-    chat_response = ChatResponse(**response_data)
-
-    # Создаем объект ответа для сортировки
-    chat_response = ChatResponse(**response_data)
-    
-    return chat_response
+    return chat
 
 
 @router.get("/{chat_id}/messages", response_model=List[MessageResponse])
-async def get_messages(chat_id: UUID, db: Session = Depends(get_db)):
+async def get_messages(
+    chat_id: UUID,
+    response: Response,
+    limit: Optional[int] = Query(None, ge=1),
+    before: Optional[str] = None,
+    after: Optional[str] = None,
+    db: AsyncSession = Depends(get_db)
+):
     """
     Получить сообщения чата
     
-    Возвращает список всех сообщений в чате, отсортированных по времени отправки.
+    Возвращает страницу сообщений, отсортированных по времени отправки (старые первыми).
+    Размер страницы - limit (по умолчанию MESSAGES_PAGE_SIZE, не больше MESSAGES_MAX_PAGE_SIZE).
+    
+    - без курсоров: последние сообщения чата;
+    - before: сообщения старше курсора (подгрузка истории);
+    - after: сообщения новее курсора (только новые сообщения с прошлого запроса).
+    
+    В заголовке X-Before-Cursor возвращается курсор для подгрузки более старых
+    сообщений (если они есть), в X-After-Cursor - курсор для запроса новых.
     """
-    chat = db.query(Chat).filter(Chat.id == chat_id).first()
+    if before is not None and after is not None:
+        raise BadRequestError("Use either 'before' or 'after' cursor, not both")
+    
+    chat = await db.get(Chat, chat_id)
     if not chat:
         raise NotFoundError("Chat", str(chat_id))
     
-    messages = db.query(Message).filter(
-        Message.chat_id == chat_id
-    ).order_by(Message.sent_at).all()
+    page_size = min(limit or settings.MESSAGES_PAGE_SIZE, settings.MESSAGES_MAX_PAGE_SIZE)
+    key = (Message.sent_at, Message.id)
+    query = select(*_MESSAGE_COLUMNS).where(Message.chat_id == chat_id)
+    
+    if after is not None:
+        position = decode_cursor(after, datetime, UUID, nullable=False)
+        query = query.where(keyset_predicate(key, position)).order_by(*key)
+    else:
+        if before is not None:
+            position = decode_cursor(before, datetime, UUID, nullable=False)
+            query = query.where(keyset_predicate(key, position, ascending=False))
+        query = query.order_by(Message.sent_at.desc(), Message.id.desc())
+    
+    # Берем на одну запись больше, чтобы понять, есть ли еще сообщения
+    messages = list((await db.execute(query.limit(page_size + 1))).mappings().all())
+    has_more = len(messages) > page_size
+    messages = messages[:page_size]
+    if after is None:
+        messages.reverse()
+        if has_more:
+            response.headers[BEFORE_CURSOR_HEADER] = encode_cursor(messages[0]["sent_at"], messages[0]["id"])
     
-    return messages
+    if messages:
+        response.headers[AFTER_CURSOR_HEADER] = encode_cursor(messages[-1]["sent_at"], messages[-1]["id"])
+    elif after is not None:
+        response.headers[AFTER_CURSOR_HEADER] = after
+    
+    return RowsResponse(messages, headers=response.headers)
 
 
 @router.post("/{chat_id}/messages", response_model=MessageResponse, status_code=status.HTTP_201_CREATED)
 async def create_message(
     chat_id: UUID,
     request: MessageCreateRequest,
-    db: Session = Depends(get_db),
-    background_tasks: BackgroundTasks = None
+    db: AsyncSession = Depends(get_db)
 ):
     """
     Отправить сообщение
@@ -135,7 +180,7 @@ async def create_message(
     Если fromSpecialist=True, сообщение считается отправленным от специалиста (админ-панель).
     Если fromSpecialist=False или не указано, сообщение считается отправленным от пользователя (мобильное приложение).
     """
-    chat = db.query(Chat).filter(Chat.id == chat_id).first()
+    chat = await db.get(Chat, chat_id)
     if not chat:
         raise NotFoundError("Chat", str(chat_id))
     
@@ -146,6 +191,7 @@ async def create_message(
     is_from_specialist = request.fromSpecialist if request.fromSpecialist is not None else False
     
     message = Message(
+        id=uuid4(),
         chat_id=chat_id,
         text=request.text.strip(),
         sent_at=datetime.utcnow(),
@@ -154,55 +200,32 @@ async def create_message(
     )
     
     db.add(message)
-    db.commit()
-    db.refresh(message)
+    # Трансляция в WebSocket сервис пишется в outbox в той же транзакции:
+    # если воркер упадет после commit, релей отправит сообщение позже
+    if outbox_relay.enabled:
+        db.add(BroadcastOutbox(message_id=message.id, payload=_broadcast_payload(message)))
+    if not is_from_specialist:
+        db.add(message_notification(chat, message))
     
-    # Транслируем сообщение через WebSocket сервис (в фоне, не блокируем ответ)
-    async def broadcast_message():
-        try:
-            websocket_url = os.getenv("WEBSOCKET_SERVICE_URL", "http://websocket:8080")
-            broadcast_url = f"{websocket_url}/api/broadcast/message"
-            
-            # Форматируем дату в ISO формате для Java LocalDateTime
-            sent_at_iso = message.sent_at.isoformat() if message.sent_at else datetime.utcnow().isoformat()
-            # Убираем микросекунды, если они есть, и добавляем Z для UTC
-            if '.' in sent_at_iso:
-                sent_at_iso = sent_at_iso.split('.')[0] + 'Z'
-            elif '+' in sent_at_iso or sent_at_iso.endswith('Z'):
-                pass  # Уже в правильном формате
-            else:
-                sent_at_iso = sent_at_iso + 'Z'
-            
-            broadcast_data = {
-                "messageId": str(message.id),
-                "chatId": str(chat_id),
-                "text": message.text,
-                "fromSpecialist": message.is_from_specialist,
-                "isRead": message.is_read,
-                "sentAt": sent_at_iso
-            }
-            
-            async with httpx.AsyncClient(timeout=5.0) as client:
-                try:
-                    response = await client.post(broadcast_url, json=broadcast_data)
-                    if response.status_code != 200:
-                        print(f"WebSocket broadcast failed: {response.status_code}")
-                except Exception as e:
-                    print(f"Failed to broadcast message to WebSocket: {e}")
-        except Exception as e:
-            print(f"Error broadcasting message: {e}")
-    
-    # Запускаем транслирование в фоне через BackgroundTasks
-    # Это гарантирует, что сообщение будет транслировано даже если клиент уже получил ответ
-    if background_tasks:
-        background_tasks.add_task(broadcast_message)
-    else:
-        # Fallback для случаев, когда BackgroundTasks не доступен
-        # Используем asyncio.create_task для неблокирующего выполнения
-        try:
-            asyncio.create_task(broadcast_message())
-        except Exception as e:
-            print(f"Error scheduling broadcast task: {e}")
+    # Обновляем сводку чата в той же транзакции. Счетчик увеличивается выражением
+    # в SQL, поэтому параллельные сообщения не теряют инкременты.
+    is_latest = or_(Chat.last_message_at.is_(None), Chat.last_message_at <= message.sent_at)
+    await db.execute(
+        update(Chat)
+        .where(Chat.id == chat_id)
+        .values(
+            last_message=case((is_latest, message.text), else_=Chat.last_message),
+            last_message_at=case((is_latest, message.sent_at), else_=Chat.last_message_at),
+            unread_count=Chat.unread_count + (1 if is_from_specialist else 0),
+        )
+        .execution_options(synchronize_session=False)
+    )
+    # Событие для потоков WebSocket/SSE уходит подписчикам после commit
+    await publish_message_event(db, message)
+    await db.commit()
+    
+    # Будим релей outbox: отправка идет в фоне, ответ ее не ждет
+    outbox_relay.notify()
     
     return message
 
@@ -212,23 +235,113 @@ async def create_message(
     response_model=None,
     status_code=status.HTTP_204_NO_CONTENT
 )
-async def mark_messages_as_read(chat_id: UUID, db: Session = Depends(get_db)):
+async def mark_messages_as_read(chat_id: UUID, db: AsyncSession = Depends(get_db)):
     """
     Отметить сообщения как прочитанные
     
     Отмечает все непрочитанные сообщения от специалиста в чате как прочитанные.
     """
-    chat = db.query(Chat).filter(Chat.id == chat_id).first()
+    chat = await db.get(Chat, chat_id)
     if not chat:
         raise NotFoundError("Chat", str(chat_id))
     
     # Отмечаем все непрочитанные сообщения от специалиста как прочитанные
-    db.query(Message).filter(
-        Message.chat_id == chat_id,
-        Message.is_from_specialist == True,
-        Message.is_read == False
-    ).update({"is_read": True})
+    result = await db.execute(
+        update(Message)
+        .where(
+            Message.chat_id == chat_id,
+            Message.is_from_specialist == True,
+            Message.is_read == False
+        )
+        .values(is_read=True)
+        .execution_options(synchronize_session=False)
+    )
+    
+    # Уменьшаем счетчик ровно на число отмеченных сообщений: сообщение,
+    # пришедшее параллельно, останется непрочитанным и в счетчике
+    read_count = result.rowcount
+    if read_count:
+        await db.execute(
+            update(Chat)
+            .where(Chat.id == chat_id)
+            .values(
+                unread_count=case(
+                    (Chat.unread_count > read_count, Chat.unread_count - read_count),
+                    else_=0,
+                )
+            )
+            .execution_options(synchronize_session=False)
+        )
     
-    db.commit()
+    await db.commit()
     
     return None
+
+
+@router.websocket("/{chat_id}/ws")
+async def chat_websocket(websocket: WebSocket, chat_id: UUID, db: AsyncSession = Depends(get_db)):
+    """
+    Поток новых сообщений чата через WebSocket
+    
+    Отправляет клиенту каждое новое сообщение чата в формате MessageResponse.
+    Входящие сообщения клиента не обрабатываются (отправка - через REST).
+    """
+    chat = await db.get(Chat, chat_id)
+    # Соединение с БД не должно удерживаться на все время жизни сокета
+    await db.close()
+    if not chat:
+        await websocket.close(code=status.WS_1008_POLICY_VIOLATION)
+        return
+    
+    # Подписка оформляется до accept: сообщения, отправленные сразу после
+    # подключения, не теряются
+    async with chat_hub.subscribe(chat_id) as queue:
+        await websocket.accept()
+        sender = asyncio.create_task(_send_events(websocket, queue))
+        try:
+            while (await websocket.receive())["type"] != "websocket.disconnect":
+                pass
+        finally:
+            sender.cancel()
+
+
+async def _send_events(websocket: WebSocket, queue: asyncio.Queue):
+    try:
+        while True:
+            await websocket.send_text(await queue.get())
+    except (WebSocketDisconnect, RuntimeError):
+        # Клиент отключился во время отправки
+        pass
+
+
+@router.get("/{chat_id}/events")
+async def chat_events(chat_id: UUID, db: AsyncSession = Depends(get_db)):
+    """
+    Поток новых сообщений чата через Server-Sent Events
+    
+    Каждое новое сообщение приходит событием "message" с JSON в формате
+    MessageResponse. Если сообщений нет, раз в CHAT_STREAM_HEARTBEAT_SECONDS
+    отправляется комментарий, чтобы прокси не закрывали соединение.
+    """
+    chat = await db.get(Chat, chat_id)
+    await db.close()
+    if not chat:
+        raise NotFoundError("Chat", str(chat_id))
+    
+    return StreamingResponse(
+        _sse_events(chat_id, settings.CHAT_STREAM_HEARTBEAT_SECONDS),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+async def _sse_events(chat_id: UUID, heartbeat: float) -> AsyncIterator[str]:
+    async with chat_hub.subscribe(chat_id) as queue:
+        yield "retry: 3000\n\n"
+        while True:
+            try:
+                event = await asyncio.wait_for(queue.get(), heartbeat)
+            except asyncio.TimeoutError:
+                yield ": ping\n\n"
+                continue
+            yield f"event: message\ndata: {event}\n\n"
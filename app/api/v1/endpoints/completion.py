@@ -1,10 +1,14 @@
-from fastapi import APIRouter, Depends, status
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, Request, Response, status
+from pydantic import TypeAdapter
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List
 from uuid import UUID
 from datetime import datetime
 
-from app.core.database import get_db
+from app.core.cache import response_cache
+from app.core.conditional import conditional_response
+from app.core.database import get_db, transition_status
 from app.core.exceptions import NotFoundError, BadRequestError
 from app.models.project import Project
 from app.models.construction_site import ConstructionSite
@@ -18,11 +22,15 @@ from app.schemas.base import EmptyResponse
 
 router = APIRouter()
 
+_completion_status_adapter = TypeAdapter(CompletionStatusResponse)
+
 
 @router.get("/{project_id}/completion-status", response_model=CompletionStatusResponse)
 async def get_completion_status(
     project_id: UUID,
-    db: Session = Depends(get_db)
+    request: Request,
+    response: Response,
+    db: AsyncSession = Depends(get_db)
 ):
     """
     Получить статус завершения строительства проекта
@@ -30,14 +38,20 @@ async def get_completion_status(
     Возвращает статус завершения строительства проекта, включая прогресс
     и список финальных документов.
     """
-    project = db.query(Project).filter(Project.id == project_id).first()
+    cached = await response_cache.get(request)
+    if cached:
+        return cached
+    
+    project = await db.get(Project, project_id)
     if not project:
         raise NotFoundError("Project", str(project_id))
     
     # Получаем строительную площадку для прогресса и статусов
-    construction_site = db.query(ConstructionSite).filter(
-        ConstructionSite.project_id == project_id
-    ).first()
+    construction_site = (
+        await db.execute(
+            select(ConstructionSite).where(ConstructionSite.project_id == project_id)
+        )
+    ).scalar_one_or_none()
     
     progress = construction_site.progress if construction_site else 0.0
     all_documents_signed = (
@@ -45,9 +59,18 @@ async def get_completion_status(
     )
     
     # Получаем финальные документы
-    final_documents = db.query(FinalDocument).filter(
-        FinalDocument.project_id == project_id
-    ).all()
+    final_documents = (
+        await db.execute(
+            select(FinalDocument).where(FinalDocument.project_id == project_id)
+        )
+    ).scalars().all()
+    
+    entities = [project, *final_documents]
+    if construction_site:
+        entities.append(construction_site)
+    not_modified = conditional_response(request, response, entities, collection=True)
+    if not_modified:
+        return not_modified
     
     is_completed = construction_site.is_completed if construction_site else False
     completion_date = None
@@ -68,54 +91,68 @@ async def get_completion_status(
         "documents": final_documents,
     }
     
-    return CompletionStatusResponse(**response_data)
+    return await response_cache.store(
+        request, response, _completion_status_adapter, CompletionStatusResponse(**response_data), entities
+    )
 
 
 @router.get("/{project_id}/final-documents", response_model=List[FinalDocumentResponse])
 async def get_final_documents(
     project_id: UUID,
-    db: Session = Depends(get_db)
+    request: Request,
+    response: Response,
+    db: AsyncSession = Depends(get_db)
 ):
     """
     Получить список финальных документов проекта
     
     Возвращает список всех финальных документов для указанного проекта.
     """
-    project = db.query(Project).filter(Project.id == project_id).first()
+    project = await db.get(Project, project_id)
     if not project:
         raise NotFoundError("Project", str(project_id))
     
-    final_documents = db.query(FinalDocument).filter(
-        FinalDocument.project_id == project_id
-    ).all()
+    final_documents = (
+        await db.execute(
+            select(FinalDocument).where(FinalDocument.project_id == project_id)
+        )
+    ).scalars().all()
     
-    return final_documents
+    not_modified = conditional_response(request, response, final_documents, collection=True)
+    return not_modified or final_documents
 
 
 @router.get("/{project_id}/final-documents/{document_id}", response_model=FinalDocumentResponse)
 async def get_final_document(
     project_id: UUID,
     document_id: UUID,
-    db: Session = Depends(get_db)
+    request: Request,
+    response: Response,
+    db: AsyncSession = Depends(get_db)
 ):
     """
     Получить финальный документ по ID
     
     Возвращает детальную информацию о финальном документе проекта.
     """
-    project = db.query(Project).filter(Project.id == project_id).first()
+    project = await db.get(Project, project_id)
     if not project:
         raise NotFoundError("Project", str(project_id))
     
-    document = db.query(FinalDocument).filter(
-        FinalDocument.id == document_id,
-        FinalDocument.project_id == project_id
-    ).first()
+    document = (
+        await db.execute(
+            select(FinalDocument).where(
+                FinalDocument.id == document_id,
+                FinalDocument.project_id == project_id
+            )
+        )
+    ).scalar_one_or_none()
     
     if not document:
         raise NotFoundError("Final document", str(document_id))
     
-    return document
+    not_modified = conditional_response(request, response, [document])
+    return not_modified or document
 
 
 @router.post(
@@ -126,21 +163,25 @@ async def get_final_document(
 async def sign_final_document(
     project_id: UUID,
     document_id: UUID,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """
     Подписать финальный документ
     
     Подписывает финальный документ, изменяя его статус на 'signed'.
     """
-    project = db.query(Project).filter(Project.id == project_id).first()
+    project = await db.get(Project, project_id)
     if not project:
         raise NotFoundError("Project", str(project_id))
     
-    document = db.query(FinalDocument).filter(
-        FinalDocument.id == document_id,
-        FinalDocument.project_id == project_id
-    ).first()
+    document = (
+        await db.execute(
+            select(FinalDocument).where(
+                FinalDocument.id == document_id,
+                FinalDocument.project_id == project_id
+            )
+        )
+    ).scalar_one_or_none()
     
     if not document:
         raise NotFoundError("Final document", str(document_id))
@@ -151,12 +192,16 @@ async def sign_final_document(
     if document.status == FinalDocumentStatus.REJECTED:
         raise BadRequestError("Cannot sign a rejected document")
     
-    document.status = FinalDocumentStatus.SIGNED
-    document.signed_at = datetime.utcnow()
-    document.rejection_reason = None
-    
-    db.commit()
-    db.refresh(document)
+    await transition_status(
+        db,
+        FinalDocument,
+        document_id,
+        document.status,
+        status=FinalDocumentStatus.SIGNED,
+        signed_at=datetime.utcnow(),
+        rejection_reason=None,
+    )
+    await db.commit()
     
     return EmptyResponse()
 
@@ -170,21 +215,25 @@ async def reject_final_document(
     project_id: UUID,
     document_id: UUID,
     request: FinalDocumentRejectRequest,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """
     Отклонить финальный документ
     
     Отклоняет финальный документ с указанием причины, изменяя его статус на 'rejected'.
     """
-    project = db.query(Project).filter(Project.id == project_id).first()
+    project = await db.get(Project, project_id)
     if not project:
         raise NotFoundError("Project", str(project_id))
     
-    document = db.query(FinalDocument).filter(
-        FinalDocument.id == document_id,
-        FinalDocument.project_id == project_id
-    ).first()
+    document = (
+        await db.execute(
+            select(FinalDocument).where(
+                FinalDocument.id == document_id,
+                FinalDocument.project_id == project_id
+            )
+        )
+    ).scalar_one_or_none()
     
     if not document:
         raise NotFoundError("Final document", str(document_id))
@@ -195,12 +244,16 @@ async def reject_final_document(
     if document.status == FinalDocumentStatus.REJECTED:
         raise BadRequestError("Document is already rejected")
     
-    document.status = FinalDocumentStatus.REJECTED
-    document.rejection_reason = request.reason
-    document.signed_at = None
-    document.signature_url = None
-    
-    db.commit()
-    db.refresh(document)
+    await transition_status(
+        db,
+        FinalDocument,
+        document_id,
+        document.status,
+        status=FinalDocumentStatus.REJECTED,
+        rejection_reason=request.reason,
+        signed_at=None,
+        signature_url=None,
+    )
+    await db.commit()
     
     return EmptyResponse()
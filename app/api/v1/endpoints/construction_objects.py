@@ -1,12 +1,17 @@
 from datetime import datetime
-from typing import List
+from typing import FrozenSet, List, Optional, Type
 from uuid import UUID
 
-from fastapi import APIRouter, Depends, status
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, Query, Response, status
+from pydantic import BaseModel
+from sqlalchemy import null, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import load_only, selectinload
 
 from app.core.database import get_db
 from app.core.exceptions import NotFoundError, BadRequestError
+from app.core.fieldsets import parse_fields, sparse_list_adapter, sparse_schema
+from app.core.pagination import NEXT_CURSOR_HEADER, decode_cursor, encode_cursor, keyset_predicate
 from app.models.construction_site import ConstructionSite
 from app.models.project import Project
 from app.models.chat import Chat
@@ -18,79 +23,147 @@ from app.schemas.construction_site import (
 router = APIRouter()
 
 
+# Поле ответа -> (атрибут модели, из которого оно берется; значение для ответа).
+# chatId берется из подзапроса _object_select
+_OBJECT_FIELDS = {
+    "id": (ConstructionSite.id, lambda site, project: site.id),
+    "projectId": (Project.id, lambda site, project: project.id),
+    "name": (Project.name, lambda site, project: project.name),
+    "address": (Project.address, lambda site, project: project.address),
+    "description": (Project.description, lambda site, project: project.description or ""),
+    "area": (Project.area, lambda site, project: project.area),
+    "floors": (Project.floors, lambda site, project: project.floors),
+    "bedrooms": (Project.bedrooms, lambda site, project: project.bedrooms),
+    "bathrooms": (Project.bathrooms, lambda site, project: project.bathrooms),
+    "price": (Project.price, lambda site, project: int(project.price)),
+    "imageUrl": (Project.image_url, lambda site, project: project.image_url),
+    "stages": (Project.stages, lambda site, project: project.stages),
+    "allDocumentsSigned": (ConstructionSite.all_documents_signed, lambda site, project: site.all_documents_signed),
+    "isCompleted": (ConstructionSite.is_completed, lambda site, project: site.is_completed),
+}
+
+
+def _object_select(names: Optional[FrozenSet[str]] = None):
+    """
+    Площадка, ее проект и id первого активного чата проекта одним запросом.
+    Этапы проекта подгружаются одним дополнительным SELECT ... IN на всю страницу.
+    Если задан набор полей names, загружаются только нужные для них столбцы,
+    а этапы и чат - только если они запрошены.
+    """
+    if names is None or "chatId" in names:
+        chat_id = (
+            select(Chat.id)
+            .where(
+                Chat.project_id == Project.id,
+                Chat.is_active == True,  # noqa: E712
+            )
+            .order_by(Chat.created_at)
+            .limit(1)
+            .correlate(Project)
+            .scalar_subquery()
+        )
+    else:
+        chat_id = null()
+    query = (
+        select(ConstructionSite, Project, chat_id.label("chat_id"))
+        .join(Project, Project.id == ConstructionSite.project_id)
+    )
+    if names is None:
+        return query.options(selectinload(Project.stages))
+
+    attributes = [_OBJECT_FIELDS[name][0] for name in names if name in _OBJECT_FIELDS]
+    options = [
+        # id площадки и курсор (created_at) нужны всегда
+        load_only(ConstructionSite.id, ConstructionSite.created_at, *(
+            attribute for attribute in attributes if attribute.class_ is ConstructionSite
+        )),
+        load_only(Project.id, *(
+            attribute for attribute in attributes
+            if attribute.class_ is Project and attribute is not Project.stages
+        )),
+    ]
+    if "stages" in names:
+        options.append(selectinload(Project.stages))
+    return query.options(*options)
+
+
 def _build_object_response(
     construction_site: ConstructionSite,
     project: Project,
     chat_id,
-) -> ConstructionObjectResponse:
-    """Собирает объект ответа для construction-objects"""
-    return ConstructionObjectResponse(
-        id=construction_site.id,
-        project_id=project.id,
-        name=project.name,
-        address=project.address,
-        description=project.description or "",
-        area=project.area,
-        floors=project.floors,
-        bedrooms=project.bedrooms,
-        bathrooms=project.bathrooms,
-        price=int(project.price),
-        image_url=project.image_url,
-        stages=project.stages,
-        chat_id=chat_id,
-        all_documents_signed=construction_site.all_documents_signed,
-        is_completed=construction_site.is_completed,
-    )
+    names: Optional[FrozenSet[str]] = None,
+    schema: Type[BaseModel] = ConstructionObjectResponse,
+) -> BaseModel:
+    """Собирает объект ответа для construction-objects (только поля names, если заданы)"""
+    values = {
+        name: value(construction_site, project)
+        for name, (_, value) in _OBJECT_FIELDS.items()
+        if names is None or name in names
+    }
+    if names is None or "chatId" in names:
+        values["chatId"] = chat_id
+    return schema(**values)
 
 
 @router.get("", response_model=List[ConstructionObjectResponse])
-async def get_construction_objects(db: Session = Depends(get_db)):
+async def get_construction_objects(
+    response: Response,
+    limit: Optional[int] = Query(None, ge=1),
+    cursor: Optional[str] = None,
+    fields: Optional[str] = Query(None, description="Поля ответа через запятую, например id,name,price,image_url"),
+    db: AsyncSession = Depends(get_db)
+):
     """
     Получить список всех объектов строительства текущего пользователя.
     В текущей версии возвращаются все объекты.
+    
+    Объекты отсортированы по дате создания площадки. Если указан limit,
+    в заголовке X-Next-Cursor возвращается курсор следующей страницы,
+    который передается в параметре cursor.
+    Если указан fields, возвращаются только перечисленные поля (и id).
     """
-    construction_sites = db.query(ConstructionSite).all()
-    result: List[ConstructionObjectResponse] = []
-
-    for site in construction_sites:
-        project = db.query(Project).filter(Project.id == site.project_id).first()
-        if not project:
-            raise NotFoundError("Project", str(site.project_id))
-
-        chat = db.query(Chat).filter(
-            Chat.project_id == project.id,
-            Chat.is_active == True,  # noqa: E712
-        ).order_by(Chat.created_at).first()
-
-        result.append(_build_object_response(site, project, chat.id if chat else None))
-    # Отдаем данные с alias (camelCase), как ожидает мобильное приложение
-    return [item.model_dump(by_alias=True) for item in result]
+    names = parse_fields(fields, ConstructionObjectResponse)
+    order = (ConstructionSite.created_at, ConstructionSite.id)
+    query = _object_select(names)
+    if cursor is not None:
+        query = query.where(
+            keyset_predicate(order, decode_cursor(cursor, datetime, UUID, nullable=False))
+        )
+    query = query.order_by(*order)
+    if limit is not None:
+        # Берем на одну запись больше, чтобы понять, есть ли следующая страница
+        query = query.limit(limit + 1)
+
+    rows = (await db.execute(query)).all()
+    if limit is not None and len(rows) > limit:
+        rows = rows[:limit]
+        last = rows[-1].ConstructionSite
+        response.headers[NEXT_CURSOR_HEADER] = encode_cursor(last.created_at, last.id)
+
+    if names is not None:
+        # Частичные объекты не проходят проверку response_model: сериализуем сами
+        adapter = sparse_list_adapter(ConstructionObjectResponse, names)
+        schema = sparse_schema(ConstructionObjectResponse, names)
+        objects = [_build_object_response(*row, names=names, schema=schema) for row in rows]
+        return Response(adapter.dump_json(objects, by_alias=True), media_type="application/json", headers=response.headers)
+
+    # Модели ответа отдаются как есть: FastAPI сериализует их по alias один раз
+    return [_build_object_response(site, project, chat_id) for site, project, chat_id in rows]
 
 
 @router.get("/{object_id}", response_model=ConstructionObjectResponse)
 async def get_construction_object(
     object_id: UUID,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Получить информацию о конкретном объекте строительства."""
-    construction_site = db.query(ConstructionSite).filter(
-        ConstructionSite.id == object_id
-    ).first()
-    if not construction_site:
+    row = (
+        await db.execute(_object_select().where(ConstructionSite.id == object_id))
+    ).one_or_none()
+    if not row:
         raise NotFoundError("Construction site", str(object_id))
 
-    project = db.query(Project).filter(Project.id == construction_site.project_id).first()
-    if not project:
-        raise NotFoundError("Project", str(construction_site.project_id))
-
-    chat = db.query(Chat).filter(
-        Chat.project_id == project.id,
-        Chat.is_active == True,  # noqa: E712
-    ).order_by(Chat.created_at).first()
-
-    response = _build_object_response(construction_site, project, chat.id if chat else None)
-    # Отдаем данные с alias (camelCase), как ожидает мобильное приложение
-    return response.model_dump(by_alias=True)
+    return _build_object_response(*row)
 
 
 @router.post(
@@ -100,15 +173,13 @@ async def get_construction_object(
 )
 async def complete_construction_object(
     object_id: UUID,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """
     Завершить строительство объекта.
     Требует, чтобы все документы были подписаны и прогресс достиг 100%.
     """
-    construction_site = db.query(ConstructionSite).filter(
-        ConstructionSite.id == object_id
-    ).first()
+    construction_site = await db.get(ConstructionSite, object_id)
     if not construction_site:
         raise NotFoundError("Construction site", str(object_id))
 
@@ -123,7 +194,7 @@ async def complete_construction_object(
 
     construction_site.is_completed = True
     construction_site.updated_at = datetime.utcnow()
-    db.commit()
+    await db.commit()
     return None
 
 
@@ -135,19 +206,21 @@ async def complete_construction_object(
 async def update_documents_status(
     project_id: UUID,
     request: DocumentsStatusUpdateRequest,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """
     Обновить статус подписания документов для объекта строительства.
     """
-    construction_site = db.query(ConstructionSite).filter(
-        ConstructionSite.project_id == project_id
-    ).first()
+    construction_site = (
+        await db.execute(
+            select(ConstructionSite).where(ConstructionSite.project_id == project_id)
+        )
+    ).scalar_one_or_none()
     if not construction_site:
         raise NotFoundError("Construction site", f"for project {project_id}")
 
     construction_site.all_documents_signed = request.allDocumentsSigned
 
-    db.commit()
+    await db.commit()
     return None
 
@@ -1,8 +1,13 @@
-from fastapi import APIRouter, Depends
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, Request, Response
+from pydantic import TypeAdapter
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import selectinload
 from typing import List
 from uuid import UUID
 
+from app.core.cache import response_cache
+from app.core.conditional import conditional_response
 from app.core.database import get_db
 from app.core.exceptions import NotFoundError
 from app.models.construction_site import ConstructionSite, Camera
@@ -11,27 +16,41 @@ from app.schemas.construction_site import ConstructionSiteResponse, CameraRespon
 
 router = APIRouter()
 
+_site_adapter = TypeAdapter(ConstructionSiteResponse)
+
 
 @router.get("/object/{object_id}", response_model=ConstructionSiteResponse)
 async def get_construction_site_by_object(
     object_id: UUID,
-    db: Session = Depends(get_db)
+    request: Request,
+    response: Response,
+    db: AsyncSession = Depends(get_db)
 ):
     """
     Получить информацию о строительной площадке по objectId
     
     Возвращает информацию о строительной площадке и связанном проекте.
     """
-    construction_site = db.query(ConstructionSite).filter(
-        ConstructionSite.id == object_id
-    ).first()
+    construction_site = (
+        await db.execute(
+            select(ConstructionSite)
+            .options(selectinload(ConstructionSite.cameras))
+            .where(ConstructionSite.id == object_id)
+        )
+    ).scalar_one_or_none()
     if not construction_site:
         raise NotFoundError("Construction site", str(object_id))
     
-    project = db.query(Project).filter(Project.id == construction_site.project_id).first()
+    project = await db.get(Project, construction_site.project_id)
     if not project:
         raise NotFoundError("Project", str(construction_site.project_id))
     
+    not_modified = conditional_response(
+        request, response, [construction_site, project, *construction_site.cameras], collection=True
+    )
+    if not_modified:
+        return not_modified
+    
     response_data = {
         "id": construction_site.id,
         "project_id": construction_site.project_id,
@@ -48,7 +67,9 @@ async def get_construction_site_by_object(
 @router.get("/project/{project_id}", response_model=ConstructionSiteResponse)
 async def get_construction_site_by_project(
     project_id: UUID,
-    db: Session = Depends(get_db)
+    request: Request,
+    response: Response,
+    db: AsyncSession = Depends(get_db)
 ):
     """
     Получить информацию о строительной площадке по проекту
@@ -56,17 +77,30 @@ async def get_construction_site_by_project(
     Возвращает информацию о строительной площадке для указанного проекта,
     включая список камер.
     """
-    project = db.query(Project).filter(Project.id == project_id).first()
+    cached = await response_cache.get(request)
+    if cached:
+        return cached
+    
+    project = await db.get(Project, project_id)
     if not project:
         raise NotFoundError("Project", str(project_id))
     
-    construction_site = db.query(ConstructionSite).filter(
-        ConstructionSite.project_id == project_id
-    ).first()
+    construction_site = (
+        await db.execute(
+            select(ConstructionSite)
+            .options(selectinload(ConstructionSite.cameras))
+            .where(ConstructionSite.project_id == project_id)
+        )
+    ).scalar_one_or_none()
     
     if not construction_site:
         raise NotFoundError("Construction site", f"for project {project_id}")
     
+    entities = [construction_site, project, *construction_site.cameras]
+    not_modified = conditional_response(request, response, entities, collection=True)
+    if not_modified:
+        return not_modified
+    
     # Создаем ответ с вычисляемыми полями из проекта
     response_data = {
         "id": construction_site.id,
@@ -79,57 +113,67 @@ async def get_construction_site_by_project(
         "progress": construction_site.progress,
     }
     
-    return ConstructionSiteResponse(**response_data)
+    return await response_cache.store(
+        request, response, _site_adapter, ConstructionSiteResponse(**response_data), entities
+    )
 
 
 @router.get("/{site_id}/cameras", response_model=List[CameraResponse])
 async def get_cameras(
     site_id: UUID,
-    db: Session = Depends(get_db)
+    request: Request,
+    response: Response,
+    db: AsyncSession = Depends(get_db)
 ):
     """
     Получить список камер строительной площадки
     
     Возвращает список всех камер для указанной строительной площадки.
     """
-    construction_site = db.query(ConstructionSite).filter(
-        ConstructionSite.id == site_id
-    ).first()
+    construction_site = await db.get(ConstructionSite, site_id)
     
     if not construction_site:
         raise NotFoundError("Construction site", str(site_id))
     
-    cameras = db.query(Camera).filter(
-        Camera.construction_site_id == site_id
-    ).all()
+    cameras = (
+        await db.execute(
+            select(Camera).where(Camera.construction_site_id == site_id)
+        )
+    ).scalars().all()
     
-    return cameras
+    not_modified = conditional_response(request, response, cameras, collection=True)
+    return not_modified or cameras
 
 
 @router.get("/{site_id}/cameras/{camera_id}", response_model=CameraResponse)
 async def get_camera(
     site_id: UUID,
     camera_id: UUID,
-    db: Session = Depends(get_db)
+    request: Request,
+    response: Response,
+    db: AsyncSession = Depends(get_db)
 ):
     """
     Получить информацию о камере
     
     Возвращает детальную информацию о конкретной камере строительной площадки.
     """
-    construction_site = db.query(ConstructionSite).filter(
-        ConstructionSite.id == site_id
-    ).first()
+    construction_site = await db.get(ConstructionSite, site_id)
     
     if not construction_site:
         raise NotFoundError("Construction site", str(site_id))
     
-    camera = db.query(Camera).filter(
-        Camera.id == camera_id,
-        Camera.construction_site_id == site_id
-    ).first()
+    camera = (
+        await db.execute(
+            select(Camera).where(
+                Camera.id == camera_id,
+                Camera.construction_site_id == site_id
+            )
+        )
+    ).scalar_one_or_none()
     
     if not camera:
         raise NotFoundError("Camera", str(camera_id))
     
-    return camera
+    not_modified = conditional_response(request, response, [camera])
+    return not_modified or camera
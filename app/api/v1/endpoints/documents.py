@@ -1,11 +1,24 @@
-from fastapi import APIRouter, Depends, status
-from sqlalchemy.orm import Session
-from typing import List
+from fastapi import APIRouter, Depends, Query, Request, Response, status
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import load_only
+from typing import List, Optional
 from uuid import UUID
 from datetime import datetime
 
-from app.core.database import get_db
+from app.core.conditional import conditional_response
+from app.core.config import settings
+from app.core.database import get_db, transition_status
 from app.core.exceptions import NotFoundError, BadRequestError
+from app.core.fieldsets import load_columns, parse_fields, sparse_list_adapter
+from app.core.pagination import (
+    NEXT_CURSOR_HEADER,
+    TOTAL_COUNT_HEADER,
+    decode_cursor,
+    encode_cursor,
+    estimated_count,
+    keyset_predicate,
+)
 from app.models.document import Document, DocumentStatus
 from app.schemas.document import DocumentResponse, DocumentRejectRequest
 from app.schemas.base import EmptyResponse
@@ -14,27 +27,83 @@ router = APIRouter()
 
 
 @router.get("", response_model=List[DocumentResponse])
-async def get_documents(db: Session = Depends(get_db)):
+async def get_documents(
+    request: Request,
+    response: Response,
+    project_id: Optional[UUID] = None,
+    status: Optional[DocumentStatus] = None,
+    limit: Optional[int] = Query(None, ge=1),
+    cursor: Optional[str] = None,
+    include_total: bool = False,
+    fields: Optional[str] = Query(None, description="Поля ответа через запятую, например id,title,status"),
+    db: AsyncSession = Depends(get_db)
+):
     """
-    Получить список всех документов
+    Получить список документов
+    
+    Возвращает страницу документов (новые первыми), при необходимости только
+    документы проекта project_id и/или в статусе status. Размер страницы - limit
+    (по умолчанию DOCUMENTS_PAGE_SIZE, не больше DOCUMENTS_MAX_PAGE_SIZE).
+    Если есть следующая страница, в заголовке X-Next-Cursor возвращается курсор,
+    который передается в параметре cursor.
     
-    Возвращает список всех документов, требующих согласования.
+    include_total=true добавляет заголовок X-Total-Count с числом документов
+    по фильтрам (для больших выборок - оценка планировщика PostgreSQL).
+    Если указан fields, возвращаются только перечисленные поля (и id).
     """
-    documents = db.query(Document).all()
-    return documents
+    names = parse_fields(fields, DocumentResponse)
+    page_size = min(limit or settings.DOCUMENTS_PAGE_SIZE, settings.DOCUMENTS_MAX_PAGE_SIZE)
+    key = (Document.created_at, Document.id)
+
+    filtered = select(Document)
+    if project_id is not None:
+        filtered = filtered.where(Document.project_id == project_id)
+    if status is not None:
+        filtered = filtered.where(Document.status == status)
+    if include_total:
+        response.headers[TOTAL_COUNT_HEADER] = str(await estimated_count(db, filtered.with_only_columns(Document.id)))
+
+    query = filtered
+    if cursor is not None:
+        position = decode_cursor(cursor, datetime, UUID, nullable=False)
+        query = query.where(keyset_predicate(key, position, ascending=False))
+    if names is not None:
+        # updated_at нужен для ETag, created_at - для курсора
+        query = query.options(load_only(
+            *load_columns(Document, DocumentResponse, names), Document.created_at, Document.updated_at
+        ))
+    # Берем на одну запись больше, чтобы понять, есть ли следующая страница
+    query = query.order_by(Document.created_at.desc(), Document.id.desc()).limit(page_size + 1)
+    documents = (await db.execute(query)).scalars().all()
+    if len(documents) > page_size:
+        documents = documents[:page_size]
+        response.headers[NEXT_CURSOR_HEADER] = encode_cursor(documents[-1].created_at, documents[-1].id)
+    not_modified = conditional_response(request, response, documents, collection=True)
+    if not_modified or names is None:
+        return not_modified or documents
+    # Частичные объекты не проходят проверку response_model: сериализуем сами
+    adapter = sparse_list_adapter(DocumentResponse, names)
+    body = adapter.dump_json(adapter.validate_python(documents, from_attributes=True), by_alias=True)
+    return Response(body, media_type="application/json", headers=response.headers)
 
 
 @router.get("/{id}", response_model=DocumentResponse)
-async def get_document(id: UUID, db: Session = Depends(get_db)):
+async def get_document(
+    id: UUID,
+    request: Request,
+    response: Response,
+    db: AsyncSession = Depends(get_db)
+):
     """
     Получить документ по ID
     
     Возвращает детальную информацию о документе по его идентификатору.
     """
-    document = db.query(Document).filter(Document.id == id).first()
+    document = await db.get(Document, id)
     if not document:
         raise NotFoundError("Document", str(id))
-    return document
+    not_modified = conditional_response(request, response, [document])
+    return not_modified or document
 
 
 @router.post(
@@ -42,13 +111,13 @@ async def get_document(id: UUID, db: Session = Depends(get_db)):
     response_model=None,
     status_code=status.HTTP_204_NO_CONTENT
 )
-async def approve_document(id: UUID, db: Session = Depends(get_db)):
+async def approve_document(id: UUID, db: AsyncSession = Depends(get_db)):
     """
     Одобрить документ
     
     Одобряет документ, изменяя его статус на 'approved'.
     """
-    document = db.query(Document).filter(Document.id == id).first()
+    document = await db.get(Document, id)
     if not document:
         raise NotFoundError("Document", str(id))
     
@@ -58,12 +127,16 @@ async def approve_document(id: UUID, db: Session = Depends(get_db)):
     if document.status == DocumentStatus.REJECTED:
         raise BadRequestError("Cannot approve a rejected document")
     
-    document.status = DocumentStatus.APPROVED
-    document.approved_at = datetime.utcnow()
-    document.rejection_reason = None
-    
-    db.commit()
-    db.refresh(document)
+    await transition_status(
+        db,
+        Document,
+        id,
+        document.status,
+        status=DocumentStatus.APPROVED,
+        approved_at=datetime.utcnow(),
+        rejection_reason=None,
+    )
+    await db.commit()
     
     return None
 
@@ -76,14 +149,14 @@ async def approve_document(id: UUID, db: Session = Depends(get_db)):
 async def reject_document(
     id: UUID,
     request: DocumentRejectRequest,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """
     Отклонить документ
     
     Отклоняет документ с указанием причины, изменяя его статус на 'rejected'.
     """
-    document = db.query(Document).filter(Document.id == id).first()
+    document = await db.get(Document, id)
     if not document:
         raise NotFoundError("Document", str(id))
     
@@ -93,11 +166,15 @@ async def reject_document(
     if document.status == DocumentStatus.REJECTED:
         raise BadRequestError("Document is already rejected")
     
-    document.status = DocumentStatus.REJECTED
-    document.rejection_reason = request.reason
-    document.approved_at = None
-    
-    db.commit()
-    db.refresh(document)
+    await transition_status(
+        db,
+        Document,
+        id,
+        document.status,
+        status=DocumentStatus.REJECTED,
+        rejection_reason=request.reason,
+        approved_at=None,
+    )
+    await db.commit()
     
     return None
@@ -1,12 +1,19 @@
-from fastapi import APIRouter, Depends, status
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, Query, Request, Response, status
+from pydantic import TypeAdapter
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import joinedload, load_only, selectinload
 from typing import List, Optional
 from uuid import UUID
 from datetime import datetime
 
-from app.core.database import get_db
+from app.core.cache import response_cache
+from app.core.conditional import conditional_response
+from app.core.database import get_db, transition_status
 from app.core.exceptions import NotFoundError, BadRequestError
-from app.models.project import Project, ProjectStatus
+from app.core.fieldsets import load_columns, parse_fields, sparse_list_adapter
+from app.models.notification import request_notification
+from app.models.project import Project, ProjectStatus, project_select
 from app.models.construction_site import ConstructionSite
 from app.models.chat import Chat
 from app.schemas.project import ProjectResponse, ProjectStartRequest
@@ -14,30 +21,80 @@ from app.schemas.base import EmptyResponse
 
 router = APIRouter()
 
+_projects_adapter = TypeAdapter(List[ProjectResponse])
+_project_adapter = TypeAdapter(ProjectResponse)
+
+
+def _project_entities(projects, stages: bool = True, construction_site: bool = True):
+    """Строки, из которых собирается ответ с проектами (для ETag)"""
+    for project in projects:
+        yield project
+        if stages:
+            yield from project.stages
+        if construction_site and project.construction_site is not None:
+            yield project.construction_site
+
+
+def _sparse_project_select(names):
+    """
+    select(Project) только со столбцами полей names (и updated_at для ETag).
+    Этапы и площадка загружаются, только если запрошены stages и objectId.
+    """
+    options = [load_only(*load_columns(Project, ProjectResponse, names), Project.updated_at)]
+    if "stages" in names:
+        options.append(selectinload(Project.stages))
+    if "objectId" in names:
+        options.append(joinedload(Project.construction_site).load_only(ConstructionSite.updated_at))
+    return select(Project).options(*options)
+
 
 @router.get("", response_model=List[ProjectResponse])
 async def get_projects(
+    request: Request,
+    response: Response,
     page: int = 0,
     limit: Optional[int] = None,
-    db: Session = Depends(get_db)
+    fields: Optional[str] = Query(None, description="Поля ответа через запятую, например id,name,price,image_url"),
+    db: AsyncSession = Depends(get_db)
 ):
     """
     Получить список всех проектов строительства
     
     Возвращает список всех доступных проектов с их этапами.
+    Если указан fields, возвращаются только перечисленные поля (и id).
     """
-    query = db.query(Project).order_by(Project.created_at.desc())
+    names = parse_fields(fields, ProjectResponse)
+    cached = await response_cache.get(request)
+    if cached:
+        return cached
+    
+    if names is None:
+        query, adapter = project_select(), _projects_adapter
+    else:
+        query, adapter = _sparse_project_select(names), sparse_list_adapter(ProjectResponse, names)
+    query = query.order_by(Project.created_at.desc())
     if limit is not None:
         query = query.offset(page * limit).limit(limit)
-    projects = query.all()
-    return projects
+    projects = (await db.execute(query)).scalars().all()
+    entities = list(_project_entities(
+        projects,
+        stages=names is None or "stages" in names,
+        construction_site=names is None or "objectId" in names,
+    ))
+    not_modified = conditional_response(request, response, entities, collection=True)
+    if not_modified:
+        return not_modified
+    # Тег таблицы: новый проект должен сбросить список
+    return await response_cache.store(request, response, adapter, projects, entities, tags=["projects"])
 
 
 @router.get("/requested", response_model=List[ProjectResponse])
 async def get_requested_projects(
+    request: Request,
+    response: Response,
     page: int = 0,
     limit: Optional[int] = None,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """
     Получить список проектов в статусе 'requested'
@@ -45,26 +102,43 @@ async def get_requested_projects(
     Возвращает проекты, по которым отправлен запрос на строительство.
     """
     query = (
-        db.query(Project)
-        .filter(Project.status == ProjectStatus.REQUESTED)
+        project_select()
+        .where(Project.status == ProjectStatus.REQUESTED)
         .order_by(Project.created_at.desc())
     )
     if limit is not None:
         query = query.offset(page * limit).limit(limit)
-    return query.all()
+    projects = (await db.execute(query)).scalars().all()
+    not_modified = conditional_response(request, response, _project_entities(projects), collection=True)
+    return not_modified or projects
 
 
 @router.get("/{id}", response_model=ProjectResponse)
-async def get_project(id: UUID, db: Session = Depends(get_db)):
+async def get_project(
+    id: UUID,
+    request: Request,
+    response: Response,
+    db: AsyncSession = Depends(get_db)
+):
     """
     Получить проект по ID
     
     Возвращает детальную информацию о проекте по его идентификатору.
     """
-    project = db.query(Project).filter(Project.id == id).first()
+    cached = await response_cache.get(request)
+    if cached:
+        return cached
+    
+    project = (
+        await db.execute(project_select().where(Project.id == id))
+    ).scalar_one_or_none()
     if not project:
         raise NotFoundError("Project", str(id))
-    return project
+    entities = list(_project_entities([project]))
+    not_modified = conditional_response(request, response, entities, collection=True)
+    if not_modified:
+        return not_modified
+    return await response_cache.store(request, response, _project_adapter, project, entities)
 
 
 @router.post(
@@ -72,23 +146,24 @@ async def get_project(id: UUID, db: Session = Depends(get_db)):
     response_model=None,
     status_code=status.HTTP_204_NO_CONTENT
 )
-async def request_construction(id: UUID, db: Session = Depends(get_db)):
+async def request_construction(id: UUID, db: AsyncSession = Depends(get_db)):
     """
     Отправить запрос на строительство проекта
     
     Отправляет запрос на начало строительства проекта.
     Обновляет статус проекта на 'requested'.
     """
-    project = db.query(Project).filter(Project.id == id).first()
+    project = await db.get(Project, id)
     if not project:
         raise NotFoundError("Project", str(id))
     
     if project.status == ProjectStatus.CONSTRUCTION:
         raise BadRequestError("Construction has already started for this project")
     
-    project.status = ProjectStatus.REQUESTED
-    db.commit()
-    db.refresh(project)
+    if project.status != ProjectStatus.REQUESTED:
+        await transition_status(db, Project, id, project.status, status=ProjectStatus.REQUESTED)
+        db.add(request_notification(project))
+    await db.commit()
     
     return None
 
@@ -101,26 +176,37 @@ async def request_construction(id: UUID, db: Session = Depends(get_db)):
 async def start_construction(
     id: UUID,
     request: ProjectStartRequest,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """
     Начать строительство проекта.
     
     Создает объект строительства и чат, если их еще нет, обновляет статус проекта.
     """
-    project = db.query(Project).filter(Project.id == id).first()
+    project = await db.get(Project, id)
     if not project:
         raise NotFoundError("Project", str(id))
     
-    # Обновляем адрес проекта из запроса
-    project.address = request.address
+    # Переводим проект первым: в PostgreSQL строка проекта блокируется до commit,
+    # и параллельный запрос увидит уже созданные площадку и чат
+    await transition_status(
+        db,
+        Project,
+        id,
+        project.status,
+        status=ProjectStatus.CONSTRUCTION,
+        address=request.address,
+    )
     
     # Проверяем, существует ли строительная площадка
-    construction_site = db.query(ConstructionSite).filter(
-        ConstructionSite.project_id == id
-    ).first()
+    construction_site = (
+        await db.execute(
+            select(ConstructionSite).where(ConstructionSite.project_id == id)
+        )
+    ).scalar_one_or_none()
     
     if construction_site and construction_site.is_completed:
+        await db.rollback()
         raise BadRequestError("Construction is already completed for this project")
     
     if not construction_site:
@@ -132,13 +218,16 @@ async def start_construction(
             is_completed=False,
         )
         db.add(construction_site)
-        db.flush()
     
     # Убеждаемся, что есть активный чат
-    chat = db.query(Chat).filter(
-        Chat.project_id == id,
-        Chat.is_active == True  # noqa: E712
-    ).first()
+    chat = (
+        await db.execute(
+            select(Chat).where(
+                Chat.project_id == id,
+                Chat.is_active == True  # noqa: E712
+            ).limit(1)
+        )
+    ).scalar_one_or_none()
     if not chat:
         chat = Chat(
             project_id=id,
@@ -147,8 +236,15 @@ async def start_construction(
         )
         db.add(chat)
     
-    project.status = ProjectStatus.CONSTRUCTION
-    db.commit()
-    db.refresh(project)
+    await db.commit()
+    
+    # Перечитываем проект вместе с этапами и площадкой для ответа
+    project = (
+        await db.execute(
+            project_select()
+            .where(Project.id == id)
+            .execution_options(populate_existing=True)
+        )
+    ).scalar_one()
     
     return project
@@ -0,0 +1,137 @@
+"""
+Трансляция сообщений чата в WebSocket сервис.
+
+Один долгоживущий диспетчер на процесс держит общий пул соединений httpx
+и отправляет пакеты сообщений одним POST. Ошибки сети и 5xx повторяются
+с экспоненциальной задержкой.
+
+Сообщения чата идут через outbox (app.core.outbox): эндпоинт записывает строку
+outbox в транзакции сообщения, релей собирает строки в пакеты и отправляет
+их через deliver().
+"""
+import asyncio
+import logging
+import time
+from dataclasses import asdict, dataclass
+from typing import List, Optional
+
+import httpx
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+BATCH_PATH = "/api/broadcast/messages"
+
+
+class BroadcastUnavailable(Exception):
+    """WebSocket сервис не принял пакет после всех повторов"""
+
+
+@dataclass
+class BroadcastMetrics:
+    """Счетчики диспетчера (накопительные с момента запуска процесса)"""
+    sent: int = 0
+    failed: int = 0
+    retries: int = 0
+    batches: int = 0
+    # Время от записи сообщения до подтверждения доставки, секунды
+    last_latency: float = 0.0
+    max_latency: float = 0.0
+
+
+class BroadcastDispatcher:
+    """Отправка пакетов сообщений в WebSocket сервис с повторами"""
+
+    def __init__(
+        self,
+        base_url: str,
+        max_retries: int = 5,
+        retry_backoff: float = 0.2,
+        timeout: float = 5.0,
+        max_connections: int = 10,
+    ):
+        self.base_url = base_url.rstrip("/")
+        self.max_retries = max_retries
+        self.retry_backoff = retry_backoff
+        self.timeout = timeout
+        self.max_connections = max_connections
+        self.metrics = BroadcastMetrics()
+        self._client: Optional[httpx.AsyncClient] = None
+
+    @property
+    def enabled(self) -> bool:
+        """Пустой URL отключает трансляцию (например, в тестах)"""
+        return bool(self.base_url)
+
+    @property
+    def running(self) -> bool:
+        return self._client is not None
+
+    async def start(self) -> None:
+        """Открывает пул соединений (вызывается в lifespan приложения)"""
+        if not self.enabled or self.running:
+            return
+        self._client = httpx.AsyncClient(
+            base_url=self.base_url,
+            timeout=self.timeout,
+            limits=httpx.Limits(
+                max_connections=self.max_connections,
+                max_keepalive_connections=self.max_connections,
+            ),
+        )
+
+    async def stop(self) -> None:
+        """Закрывает пул соединений"""
+        if self._client is None:
+            return
+        await self._client.aclose()
+        self._client = None
+
+    async def deliver(self, payloads: List[dict], waited: float = 0.0) -> bool:
+        """
+        Отправляет пакет с повторами. True - сервис принял пакет, False - отклонил
+        его (4xx, повтор не поможет). Если сервис недоступен после всех повторов,
+        выбрасывает BroadcastUnavailable. waited - сколько сообщения уже ждали
+        отправки (для метрики задержки).
+        """
+        started = time.monotonic()
+        for attempt in range(self.max_retries + 1):
+            if attempt:
+                self.metrics.retries += 1
+                await asyncio.sleep(self.retry_backoff * 2 ** (attempt - 1))
+            try:
+                response = await self._client.post(BATCH_PATH, json=payloads)
+            except httpx.HTTPError as e:
+                logger.warning("Broadcast attempt %d failed: %s", attempt + 1, e)
+                continue
+            if response.status_code >= 500:
+                logger.warning("Broadcast attempt %d failed: HTTP %d", attempt + 1, response.status_code)
+                continue
+            if response.is_error:
+                self.metrics.failed += len(payloads)
+                logger.error("Broadcast of %d messages rejected: HTTP %d", len(payloads), response.status_code)
+                return False
+            self._record_delivery(len(payloads), waited + time.monotonic() - started)
+            return True
+        self.metrics.failed += len(payloads)
+        raise BroadcastUnavailable(f"Failed to broadcast {len(payloads)} messages")
+
+    def _record_delivery(self, count: int, latency: float) -> None:
+        self.metrics.sent += count
+        self.metrics.batches += 1
+        self.metrics.last_latency = latency
+        self.metrics.max_latency = max(self.metrics.max_latency, latency)
+
+    def snapshot(self) -> dict:
+        """Метрики диспетчера"""
+        return asdict(self.metrics)
+
+
+broadcast_dispatcher = BroadcastDispatcher(
+    base_url=settings.WEBSOCKET_SERVICE_URL,
+    max_retries=settings.BROADCAST_MAX_RETRIES,
+    retry_backoff=settings.BROADCAST_RETRY_BACKOFF_SECONDS,
+    timeout=settings.BROADCAST_TIMEOUT_SECONDS,
+    max_connections=settings.BROADCAST_MAX_CONNECTIONS,
+)
@@ -0,0 +1,406 @@
+"""
+Кэш ответов read-эндпоинтов.
+
+Ключ - путь и параметры запроса, значение - готовое тело JSON и валидаторы
+(ETag, Last-Modified). Попадание в кэш отдает ответ без обращения к БД.
+
+Каждая запись помечена тегами строк, из которых собран ответ
+("projects:<id>", "construction_sites:<id>", ...), а списки - еще и тегом
+таблицы ("projects"). Изменения строк отслеживаются событиями сессии (как
+и для статистики админки) и после commit сбрасывают записи с их тегами:
+изменение строки - ее тег и теги родителей по внешним ключам, вставка
+и удаление - еще и тег таблицы. Массовые INSERT/DELETE и UPDATE без явного
+списка id сбрасывают весь кэш. Прямые правки БД в обход приложения кэш
+не видит - их расхождение ограничено TTL.
+
+Бэкенды: memory - LRU с TTL в памяти процесса (по умолчанию), redis - общий
+для всех воркеров (нужен пакет redis). С бэкендом memory на PostgreSQL теги
+изменений дополнительно отправляются NOTIFY в канал response_cache в той же
+транзакции: слушатель каждого воркера (PostgresChatListener) сбрасывает
+у себя те же записи, так что изменение в одном воркере видно во всех.
+Уведомления, пропущенные за время обрыва LISTEN соединения, не
+повторяются - расхождение ограничено TTL.
+"""
+import json
+import logging
+import time
+from collections import OrderedDict, defaultdict
+from dataclasses import dataclass
+from email.utils import parsedate_to_datetime
+from itertools import chain
+from typing import Any, Dict, Iterable, Optional, Set, Tuple
+from urllib.parse import urlencode
+from uuid import uuid4
+
+from fastapi import Request, Response, status
+from pydantic import TypeAdapter
+from sqlalchemy import event, func, select
+from sqlalchemy.engine import make_url
+from sqlalchemy.orm import ORMExecuteState, Session
+from sqlalchemy.sql import operators
+from sqlalchemy.sql.elements import BinaryExpression, BindParameter, BooleanClauseList
+from sqlalchemy.util import await_only
+from sqlalchemy.util.concurrency import in_greenlet
+
+from app.core.conditional import ETAG_HEADER, LAST_MODIFIED_HEADER, is_not_modified
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Таблицы, строки которых попадают в кэшируемые ответы
+CACHED_TABLES = {"projects", "project_stages", "construction_sites", "cameras", "final_documents"}
+# Тег, которым помечена каждая запись: его сброс очищает весь кэш
+ALL_TAG = "*"
+_CACHED_HEADERS = (ETAG_HEADER, LAST_MODIFIED_HEADER, "Cache-Control")
+_PENDING_TAGS_KEY = "response_cache_tags"
+# Канал NOTIFY инвалидации между воркерами и идентификатор этого процесса в нем
+CACHE_INVALIDATION_CHANNEL = "response_cache"
+INSTANCE_ID = uuid4().hex
+# Предел NOTIFY - 8000 байт; больший набор тегов заменяется сбросом всего кэша
+_NOTIFY_PAYLOAD_LIMIT = 7900
+
+
+@dataclass
+class CachedResponse:
+    body: bytes
+    headers: Dict[str, str]
+
+
+class MemoryCacheBackend:
+    """LRU с TTL в памяти процесса"""
+
+    def __init__(self, max_entries: int = 1024):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, Tuple[float, CachedResponse, Set[str]]]" = OrderedDict()
+        self._keys_by_tag: Dict[str, Set[str]] = defaultdict(set)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    async def get(self, key: str) -> Optional[CachedResponse]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expires_at, value, _ = entry
+        if time.monotonic() >= expires_at:
+            self._remove(key)
+            return None
+        self._entries.move_to_end(key)
+        return value
+
+    async def set(self, key: str, value: CachedResponse, tags: Set[str], ttl: float) -> None:
+        self._remove(key)
+        self._entries[key] = (time.monotonic() + ttl, value, tags)
+        for tag in tags:
+            self._keys_by_tag[tag].add(key)
+        while len(self._entries) > self.max_entries:
+            self._remove(next(iter(self._entries)))
+
+    async def invalidate(self, tags: Iterable[str]) -> None:
+        self.invalidate_nowait(tags)
+
+    def invalidate_nowait(self, tags: Iterable[str]) -> None:
+        for tag in tags:
+            for key in list(self._keys_by_tag.get(tag, ())):
+                self._remove(key)
+
+    async def close(self) -> None:
+        pass
+
+    def _remove(self, key: str) -> None:
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return
+        for tag in entry[2]:
+            keys = self._keys_by_tag.get(tag)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._keys_by_tag[tag]
+
+
+class RedisCacheBackend:
+    """
+    Общий кэш воркеров в Redis: запись - строка с TTL, тег - множество ключей.
+    Принимает клиент redis.asyncio (или совместимый).
+    """
+
+    def __init__(self, client: Any, prefix: str = "response-cache:"):
+        self.client = client
+        self.prefix = prefix
+
+    async def get(self, key: str) -> Optional[CachedResponse]:
+        raw = await self.client.get(self.prefix + key)
+        if raw is None:
+            return None
+        data = json.loads(raw)
+        return CachedResponse(body=data["body"].encode(), headers=data["headers"])
+
+    async def set(self, key: str, value: CachedResponse, tags: Set[str], ttl: float) -> None:
+        key = self.prefix + key
+        ttl_ms = max(int(ttl * 1000), 1)
+        await self.client.set(key, json.dumps({"body": value.body.decode(), "headers": value.headers}), px=ttl_ms)
+        for tag in tags:
+            tag_key = self.prefix + "tag:" + tag
+            await self.client.sadd(tag_key, key)
+            # Множество тега живет не дольше последней записи с этим тегом
+            await self.client.pexpire(tag_key, ttl_ms)
+
+    async def invalidate(self, tags: Iterable[str]) -> None:
+        for tag in tags:
+            tag_key = self.prefix + "tag:" + tag
+            keys = await self.client.smembers(tag_key)
+            await self.client.delete(*keys, tag_key)
+
+    def invalidate_nowait(self, tags: Iterable[str]) -> None:
+        # Синхронные сессии (скрипты) не могут обратиться к асинхронному клиенту:
+        # записи истекут по TTL
+        logger.warning("Response cache tags %s not invalidated outside of event loop", sorted(tags))
+
+    async def close(self) -> None:
+        await self.client.aclose()
+
+
+class ResponseCache:
+    """Кэш готовых ответов с тегами и счетчиками попаданий"""
+
+    def __init__(self, backend, ttl: float, broadcast: bool = False):
+        self.backend = backend
+        self.ttl = ttl
+        # Рассылать теги изменений остальным воркерам через NOTIFY
+        self.broadcast = broadcast
+        self.hits = 0
+        self.misses = 0
+        # Номер поколения растет при каждой инвалидации в процессе: ответ,
+        # загруженный до инвалидации, не должен попасть в кэш
+        self._generation = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.ttl > 0
+
+    @staticmethod
+    def key(request: Request) -> str:
+        return f"{request.url.path}?{urlencode(sorted(request.query_params.multi_items()))}"
+
+    async def get(self, request: Request) -> Optional[Response]:
+        """Готовый ответ из кэша (или 304 по валидаторам клиента) либо None"""
+        if not self.enabled:
+            return None
+        request.state.response_cache_generation = self._generation
+        try:
+            cached = await self.backend.get(self.key(request))
+        except Exception:
+            logger.exception("Response cache lookup failed")
+            cached = None
+        if cached is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+
+        last_modified = cached.headers.get(LAST_MODIFIED_HEADER)
+        if is_not_modified(
+            request,
+            cached.headers[ETAG_HEADER],
+            parsedate_to_datetime(last_modified) if last_modified else None,
+        ):
+            return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=cached.headers)
+        return Response(content=cached.body, media_type="application/json", headers=cached.headers)
+
+    async def store(
+        self,
+        request: Request,
+        response: Response,
+        adapter: TypeAdapter,
+        content: Any,
+        entities: Iterable,
+        tags: Iterable[str] = (),
+    ) -> Response:
+        """
+        Сериализует ответ эндпоинта, сохраняет его в кэш с тегами строк
+        entities (и дополнительными tags) и возвращает готовый Response.
+        """
+        body = adapter.dump_json(adapter.validate_python(content, from_attributes=True), by_alias=True)
+        headers = {name: response.headers[name] for name in _CACHED_HEADERS if name in response.headers}
+        if self.enabled and getattr(request.state, "response_cache_generation", None) == self._generation:
+            tags = {ALL_TAG, *tags, *(entity_tag(entity) for entity in entities)}
+            try:
+                await self.backend.set(self.key(request), CachedResponse(body, headers), tags, self.ttl)
+            except Exception:
+                logger.exception("Response cache store failed")
+        return Response(content=body, media_type="application/json", headers=headers)
+
+    async def invalidate(self, tags: Iterable[str]) -> None:
+        self._generation += 1
+        try:
+            await self.backend.invalidate(tags)
+        except Exception:
+            logger.exception("Response cache invalidation failed")
+
+    def invalidate_nowait(self, tags: Iterable[str]) -> None:
+        """Инвалидация вне event loop (синхронные сессии)"""
+        self._generation += 1
+        self.backend.invalidate_nowait(tags)
+
+    def clear(self) -> None:
+        """Сбрасывает весь кэш"""
+        self.invalidate_nowait([ALL_TAG])
+
+    def hit_ratio(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    async def close(self) -> None:
+        await self.backend.close()
+
+
+def entity_tag(entity) -> str:
+    return f"{entity.__tablename__}:{entity.id}"
+
+
+def _create_backend():
+    if settings.RESPONSE_CACHE_BACKEND == "redis":
+        # Опциональная зависимость: нужна только для общего кэша воркеров
+        import redis.asyncio as redis
+
+        return RedisCacheBackend(redis.from_url(settings.RESPONSE_CACHE_REDIS_URL))
+    return MemoryCacheBackend(max_entries=settings.RESPONSE_CACHE_MAX_ENTRIES)
+
+
+response_cache = ResponseCache(
+    _create_backend(),
+    ttl=settings.RESPONSE_CACHE_TTL_SECONDS,
+    # Кэш в памяти каждого воркера; redis воркеры и так делят между собой
+    broadcast=(
+        settings.RESPONSE_CACHE_BACKEND == "memory"
+        and make_url(settings.DATABASE_URL).get_backend_name() == "postgresql"
+    ),
+)
+
+
+def invalidation_payload(tags: Iterable[str]) -> str:
+    """Payload NOTIFY: "<INSTANCE_ID> <JSON список тегов>" """
+    tags = sorted(tags)
+    payload = f"{INSTANCE_ID} {json.dumps(tags)}"
+    if ALL_TAG in tags or len(payload.encode()) > _NOTIFY_PAYLOAD_LIMIT:
+        payload = f"{INSTANCE_ID} {json.dumps([ALL_TAG])}"
+    return payload
+
+
+async def apply_remote_invalidation(payload: str) -> None:
+    """Сбрасывает записи по NOTIFY другого воркера (свои уже сброшены в after_commit)"""
+    try:
+        instance_id, body = payload.split(" ", 1)
+        tags = json.loads(body)
+    except ValueError:
+        logger.warning("Malformed response cache invalidation payload: %.100s", payload)
+        return
+    if instance_id != INSTANCE_ID:
+        await response_cache.invalidate(tags)
+
+
+# ==================== ИНВАЛИДАЦИЯ ====================
+
+def _change_tags(obj, membership: bool) -> Set[str]:
+    """Теги записей, которые устаревают при изменении строки obj"""
+    table = obj.__table__
+    tags = {entity_tag(obj)}
+    if membership:
+        tags.add(table.name)
+    # Родительские строки (этапы и площадка проекта, камеры площадки, ...)
+    for column in table.columns:
+        for foreign_key in column.foreign_keys:
+            value = getattr(obj, column.key, None)
+            if value is not None:
+                tags.add(f"{foreign_key.column.table.name}:{value}")
+    return tags
+
+
+def _statement_ids(statement, table) -> Optional[Set[Any]]:
+    """
+    id строк из условия WHERE вида id = :id / id IN (...) (в том числе в AND
+    с другими условиями). None - если набор строк из условия не определить.
+    """
+    where = statement.whereclause
+    if where is None:
+        return None
+    if isinstance(where, BooleanClauseList) and where.operator is operators.and_:
+        conditions = where.clauses
+    else:
+        conditions = [where]
+    for condition in conditions:
+        if not (
+            isinstance(condition, BinaryExpression)
+            and isinstance(condition.right, BindParameter)
+            and condition.left.compare(table.c.id)
+        ):
+            continue
+        if condition.operator is operators.eq:
+            return {condition.right.value}
+        if condition.operator is operators.in_op:
+            return set(condition.right.value)
+    return None
+
+
+def _add_pending_tags(session: Session, tags: Set[str]) -> None:
+    session.info.setdefault(_PENDING_TAGS_KEY, set()).update(tags)
+
+
+@event.listens_for(Session, "before_flush")
+def _track_cached_rows(session: Session, flush_context, instances):
+    tags = set()
+    for obj in chain(session.new, session.deleted):
+        if getattr(obj, "__tablename__", None) in CACHED_TABLES:
+            tags |= _change_tags(obj, membership=True)
+    for obj in session.dirty:
+        if getattr(obj, "__tablename__", None) in CACHED_TABLES and session.is_modified(obj):
+            tags |= _change_tags(obj, membership=False)
+    if tags:
+        _add_pending_tags(session, tags)
+
+
+@event.listens_for(Session, "do_orm_execute")
+def _track_cached_bulk_changes(state: ORMExecuteState):
+    if not (state.is_update or state.is_delete or state.is_insert):
+        return
+    tables = {mapper.local_table for mapper in state.all_mappers}
+    for table in tables:
+        if table.name not in CACHED_TABLES:
+            continue
+        ids = _statement_ids(state.statement, table) if state.is_update else None
+        if ids is None:
+            _add_pending_tags(state.session, {ALL_TAG})
+        else:
+            _add_pending_tags(state.session, {f"{table.name}:{id}" for id in ids})
+
+
+@event.listens_for(Session, "before_commit")
+def _broadcast_invalidation(session: Session):
+    if not (response_cache.broadcast and response_cache.enabled):
+        return
+    # commit выполняет flush уже после этого события: теги изменений
+    # собираются при flush, поэтому выполняем его здесь
+    session.flush()
+    tags = session.info.get(_PENDING_TAGS_KEY)
+    if tags:
+        # NOTIFY доставляется слушателям в момент commit
+        session.execute(select(func.pg_notify(CACHE_INVALIDATION_CHANNEL, invalidation_payload(tags))))
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_cached_responses(session: Session):
+    tags = session.info.pop(_PENDING_TAGS_KEY, None)
+    if not tags:
+        return
+    if ALL_TAG in tags:
+        tags = {ALL_TAG}
+    if in_greenlet():
+        # AsyncSession: событие выполняется внутри greenlet и может дождаться бэкенда
+        await_only(response_cache.invalidate(tags))
+    else:
+        response_cache.invalidate_nowait(tags)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_cached_changes(session: Session):
+    session.info.pop(_PENDING_TAGS_KEY, None)
@@ -0,0 +1,168 @@
+"""
+Сжатие ответов API (Content-Encoding).
+
+Кодировка выбирается по Accept-Encoding клиента с учетом q-весов; при равных
+весах предпочтение у brotli (если установлен пакет brotli), затем gzip.
+Ответы меньше минимального размера отдаются как есть: заголовки и кадры
+сжатия на них дороже экономии. Потоковые ответы (more_body) сжимаются по
+частям со сбросом буфера компрессора после каждой части - клиент может
+разбирать данные сразу, не дожидаясь конца ответа. SSE и уже сжатые
+форматы не сжимаются.
+
+Тело ответа в кэше (app.core.cache) хранится несжатым: одна запись
+обслуживает клиентов с любой кодировкой.
+"""
+import asyncio
+import zlib
+from typing import Optional, Sequence
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+try:
+    import brotli
+except ImportError:  # brotli - необязательная зависимость
+    brotli = None
+
+# Типы, которые не сжимаются: поток событий должен уходить без буферизации,
+# остальные уже сжаты
+EXCLUDED_CONTENT_TYPES = ("text/event-stream", "image/", "video/", "audio/", "application/zip", "application/gzip")
+# Статусы без тела
+_BODYLESS_STATUSES = (204, 304)
+
+
+def negotiate_encoding(accept_encoding: str, available: Sequence[str]) -> Optional[str]:
+    """
+    Кодировка из available (в порядке предпочтения сервера) с наибольшим
+    q-весом в Accept-Encoding; None - отдавать без сжатия.
+    """
+    weights = {}
+    for item in accept_encoding.split(","):
+        coding, _, params = item.partition(";")
+        coding = coding.strip().lower()
+        if not coding:
+            continue
+        weight = 1.0
+        for param in params.split(";"):
+            name, _, value = param.partition("=")
+            if name.strip().lower() == "q":
+                try:
+                    weight = float(value)
+                except ValueError:
+                    weight = 0.0
+        weights[coding] = weight
+
+    best, best_weight = None, 0.0
+    for coding in available:
+        weight = weights.get(coding, weights.get("*", 0.0))
+        if weight > best_weight:
+            best, best_weight = coding, weight
+    return best
+
+
+class _GzipCompressor:
+    def __init__(self, level: int):
+        self._zlib = zlib.compressobj(level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+
+    def compress(self, data: bytes, final: bool) -> bytes:
+        return self._zlib.compress(data) + self._zlib.flush(zlib.Z_FINISH if final else zlib.Z_SYNC_FLUSH)
+
+
+class _BrotliCompressor:
+    def __init__(self, quality: int):
+        self._brotli = brotli.Compressor(quality=quality)
+
+    def compress(self, data: bytes, final: bool) -> bytes:
+        return self._brotli.process(data) + (self._brotli.finish() if final else self._brotli.flush())
+
+
+class CompressionMiddleware:
+    """ASGI middleware сжатия ответов gzip / brotli"""
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        minimum_size: int = 1024,
+        gzip_level: int = 6,
+        brotli_quality: int = 4,
+        thread_minimum_size: int = 256 * 1024,
+    ):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.gzip_level = gzip_level
+        self.brotli_quality = brotli_quality
+        # Большие части сжимаются в потоке, чтобы не блокировать event loop
+        self.thread_minimum_size = thread_minimum_size
+        self.encodings = ("br", "gzip") if brotli is not None else ("gzip",)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        encoding = negotiate_encoding(Headers(scope=scope).get("accept-encoding", ""), self.encodings)
+        await self.app(scope, receive, _CompressionResponder(self, encoding, send))
+
+    def compressor(self, encoding: str):
+        if encoding == "br":
+            return _BrotliCompressor(self.brotli_quality)
+        return _GzipCompressor(self.gzip_level)
+
+
+class _CompressionResponder:
+    """Обертка send одного ответа: решает, сжимать ли, по заголовкам и первой части тела"""
+
+    def __init__(self, middleware: CompressionMiddleware, encoding: Optional[str], send: Send):
+        self.middleware = middleware
+        self.encoding = encoding
+        self.send = send
+        self.start: Optional[Message] = None
+        self.passthrough = False
+        self.compressor = None
+
+    async def __call__(self, message: Message) -> None:
+        if message["type"] == "http.response.start":
+            headers = Headers(raw=message.get("headers", []))
+            content_type = headers.get("content-type", "").lower()
+            self.passthrough = (
+                message["status"] in _BODYLESS_STATUSES
+                or "content-encoding" in headers
+                or content_type.startswith(EXCLUDED_CONTENT_TYPES)
+            )
+            if self.passthrough:
+                await self.send(message)
+                return
+            # Заголовки отправляются вместе с первой частью тела
+            MutableHeaders(scope=message).add_vary_header("Accept-Encoding")
+            self.start = message
+            return
+
+        if message["type"] != "http.response.body" or self.passthrough:
+            await self.send(message)
+            return
+
+        body = message.get("body", b"")
+        more_body = message.get("more_body", False)
+        if self.start is not None:
+            start, self.start = self.start, None
+            if self.encoding is None or (not more_body and len(body) < self.middleware.minimum_size):
+                self.passthrough = True
+                await self.send(start)
+                await self.send(message)
+                return
+            self.compressor = self.middleware.compressor(self.encoding)
+            body = await self._compress(body, more_body)
+            headers = MutableHeaders(scope=start)
+            headers["Content-Encoding"] = self.encoding
+            if more_body:
+                del headers["Content-Length"]
+            else:
+                headers["Content-Length"] = str(len(body))
+            await self.send(start)
+        else:
+            body = await self._compress(body, more_body)
+        await self.send({"type": "http.response.body", "body": body, "more_body": more_body})
+
+    async def _compress(self, body: bytes, more_body: bool) -> bytes:
+        if len(body) >= self.middleware.thread_minimum_size:
+            return await asyncio.to_thread(self.compressor.compress, body, not more_body)
+        return self.compressor.compress(body, not more_body)
@@ -0,0 +1,99 @@
+"""
+Условные GET запросы (ETag / Last-Modified).
+
+Валидаторы строятся по версиям загруженных строк - (таблица, id, updated_at)
+каждой сущности, попавшей в ответ, - а не по телу ответа. Поэтому проверка
+If-None-Match / If-Modified-Since выполняется сразу после загрузки из БД,
+и при совпадении эндпоинт отвечает 304 без сериализации.
+
+Для списков Last-Modified не отдается: удаление записи не меняет максимальный
+updated_at, и ответ 304 по дате вернул бы устаревший список. Состав списка
+учитывается только в ETag.
+"""
+import hashlib
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from typing import Iterable, Optional
+
+from fastapi import Request, Response, status
+
+from app.core.config import settings
+
+ETAG_HEADER = "ETag"
+LAST_MODIFIED_HEADER = "Last-Modified"
+VALIDATOR_HEADERS = [ETAG_HEADER, LAST_MODIFIED_HEADER]
+# Клиент может хранить ответ, но обязан перепроверять его перед использованием
+CACHE_CONTROL = "private, no-cache"
+
+
+def entity_etag(entities: Iterable) -> str:
+    """Слабый ETag по версиям сущностей (версия API входит в хэш)"""
+    digest = hashlib.sha1(settings.APP_VERSION.encode())
+    for entity in entities:
+        digest.update(
+            f"{entity.__tablename__}:{entity.id}:{entity.updated_at.isoformat()};".encode()
+        )
+    return f'W/"{digest.hexdigest()}"'
+
+
+def _http_date(value: datetime) -> str:
+    return format_datetime(value.replace(tzinfo=timezone.utc, microsecond=0), usegmt=True)
+
+
+def _etag_matches(header: str, etag: str) -> bool:
+    if header.strip() == "*":
+        return True
+    # Сравнение слабое: префикс W/ не учитывается
+    return any(
+        candidate.strip().removeprefix("W/") == etag.removeprefix("W/")
+        for candidate in header.split(",")
+    )
+
+
+def _not_modified_since(header: str, last_modified: datetime) -> bool:
+    try:
+        since = parsedate_to_datetime(header)
+    except (TypeError, ValueError):
+        return False
+    if since.tzinfo is None:
+        since = since.replace(tzinfo=timezone.utc)
+    # Дата в заголовке с точностью до секунды
+    return last_modified.replace(tzinfo=timezone.utc, microsecond=0) <= since
+
+
+def conditional_response(
+    request: Request,
+    response: Response,
+    entities: Iterable,
+    collection: bool = False,
+) -> Optional[Response]:
+    """
+    Выставляет ETag (и Last-Modified для одиночных ресурсов) в ответ эндпоинта.
+    collection=True - для списков и ресурсов со вложенными списками.
+    Если клиент прислал совпадающие валидаторы, возвращает готовый ответ 304,
+    который эндпоинт возвращает вместо данных.
+    """
+    entities = list(entities)
+    headers = {ETAG_HEADER: entity_etag(entities), "Cache-Control": CACHE_CONTROL}
+    last_modified = None
+    if not collection and entities:
+        last_modified = max(entity.updated_at for entity in entities)
+        headers[LAST_MODIFIED_HEADER] = _http_date(last_modified)
+    response.headers.update(headers)
+
+    if is_not_modified(request, headers[ETAG_HEADER], last_modified):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    return None
+
+
+def is_not_modified(request: Request, etag: str, last_modified: Optional[datetime]) -> bool:
+    """Совпадают ли валидаторы клиента с текущими (If-None-Match важнее даты)"""
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        return _etag_matches(if_none_match, etag)
+    if_modified_since = request.headers.get("if-modified-since")
+    return (
+        last_modified is not None
+        and if_modified_since is not None
+        and _not_modified_since(if_modified_since, last_modified)
+    )
@@ -1,8 +1,29 @@
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event, update
+from sqlalchemy.dialects.postgresql import insert as postgresql_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy.orm import ORMExecuteState, Session, raiseload, sessionmaker
 from app.core.config import settings
+from app.core.exceptions import ConflictError
 
+
+class RaiseOnLazyLoadSession(Session):
+    """
+    Сессия, в которой любая ленивая загрузка связи вызывает ошибку.
+    Включается в тестах (и через DB_RAISE_ON_LAZY_LOAD), чтобы N+1 запросы
+    при сериализации ответа падали сразу, а не молча множили запросы.
+    Связи, нужные ответу, должны загружаться явно (selectinload/joinedload).
+    """
+
+
+@event.listens_for(RaiseOnLazyLoadSession, "do_orm_execute")
+def _raise_on_lazy_load(state: ORMExecuteState):
+    if state.is_select and not state.is_column_load and not state.is_relationship_load:
+        state.statement = state.statement.options(raiseload("*"))
+
+
+# Синхронный движок: используется скриптами (seed_data) и Alembic
 engine = create_engine(
     settings.DATABASE_URL,
     pool_pre_ping=True,
@@ -11,14 +32,57 @@ engine = create_engine(
 
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# Асинхронный движок для API (psycopg3 поддерживает asyncio с тем же URL)
+async_engine = create_async_engine(
+    settings.DATABASE_URL,
+    pool_pre_ping=True,
+    pool_size=settings.DB_POOL_SIZE,
+    max_overflow=settings.DB_MAX_OVERFLOW,
+    echo=settings.DEBUG
+)
+
+# expire_on_commit=False: после commit атрибуты остаются загруженными,
+# иначе сериализация ответа попыталась бы выполнить ленивый запрос вне event loop
+AsyncSessionLocal = async_sessionmaker(
+    bind=async_engine,
+    class_=AsyncSession,
+    sync_session_class=RaiseOnLazyLoadSession if settings.DB_RAISE_ON_LAZY_LOAD else Session,
+    autoflush=False,
+    expire_on_commit=False,
+)
+
 Base = declarative_base()
 
 
-def get_db():
-    """Dependency для получения сессии БД"""
-    db = SessionLocal()
-    try:
+def insert_on_conflict_do_nothing(db: AsyncSession, model, *index_elements: str, index_where=None):
+    """
+    INSERT ... ON CONFLICT (index_elements) DO NOTHING для диалекта сессии
+    (PostgreSQL в работе, SQLite в тестах). Для частичного уникального
+    индекса index_where - условие индекса.
+    """
+    insert = sqlite_insert if db.get_bind().dialect.name == "sqlite" else postgresql_insert
+    return insert(model).on_conflict_do_nothing(index_elements=list(index_elements), index_where=index_where)
+
+
+async def get_db():
+    """Dependency для получения асинхронной сессии БД"""
+    async with AsyncSessionLocal() as db:
         yield db
-    finally:
-        db.close()
 
+
+async def transition_status(db: AsyncSession, model, id, expected, **values) -> None:
+    """
+    Переход статуса с оптимистичной блокировкой: UPDATE ... WHERE id = :id
+    AND status = :expected. Если параллельный запрос уже изменил статус,
+    строка не обновится - транзакция откатывается с ошибкой 409.
+    В PostgreSQL обновленная строка остается заблокированной до commit,
+    поэтому зависимые записи (площадка, чат) создаются без гонок.
+    """
+    result = await db.execute(
+        update(model)
+        .where(model.id == id, model.status == expected)
+        .values(**values)
+    )
+    if result.rowcount != 1:
+        await db.rollback()
+        raise ConflictError(f"{model.__name__} was modified by another request")
@@ -48,6 +48,17 @@ class BadRequestError(APIException):
         )
 
 
+class ConflictError(APIException):
+    """Ошибка 409 - конфликт с параллельным изменением ресурса"""
+    
+    def __init__(self, message: str):
+        super().__init__(
+            status_code=status.HTTP_409_CONFLICT,
+            error_code="CONFLICT",
+            message=message
+        )
+
+
 class InternalServerError(APIException):
     """Ошибка 500 - внутренняя ошибка сервера"""
     
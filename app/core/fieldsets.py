@@ -0,0 +1,75 @@
+"""
+Частичные ответы (sparse fieldsets).
+
+Параметр fields= списков (например, fields=id,name,price,image_url) задает
+ключи JSON, которые нужны клиенту. Эндпоинт по нему сужает и SQL - загружает
+только нужные столбцы и связи (load_only, предзагрузка связей только по
+запросу), - и сериализацию: ответ строится по схеме только с этими полями.
+Поле id отдается всегда.
+"""
+from functools import lru_cache
+from typing import FrozenSet, List, Optional, Type
+
+from pydantic import BaseModel, TypeAdapter, create_model, field_validator
+
+from app.core.exceptions import BadRequestError
+from app.schemas.base import BaseSchema
+
+
+def parse_fields(fields: Optional[str], schema: Type[BaseModel]) -> Optional[FrozenSet[str]]:
+    """
+    Имена полей схемы по параметру fields= (ключи JSON ответа).
+    None - параметр не передан, нужен полный ответ.
+    """
+    if fields is None:
+        return None
+    by_key = {info.alias or name: name for name, info in schema.model_fields.items()}
+    keys = {key.strip() for key in fields.split(",") if key.strip()}
+    unknown = keys - by_key.keys()
+    if unknown:
+        raise BadRequestError(f"Unknown fields: {', '.join(sorted(unknown))}")
+    return frozenset(by_key[key] for key in keys) | {"id"}
+
+
+def field_key(schema: Type[BaseModel], name: str) -> str:
+    """Ключ JSON поля схемы (он же имя атрибута модели)"""
+    return schema.model_fields[name].alias or name
+
+
+@lru_cache(maxsize=256)
+def sparse_schema(schema: Type[BaseModel], names: FrozenSet[str]) -> Type[BaseModel]:
+    """Схема только с полями names; валидаторы полей переносятся из исходной схемы"""
+    fields = {
+        name: (info.annotation, info)
+        for name, info in schema.model_fields.items()
+        if name in names
+    }
+    validators = {
+        key: field_validator(*decorator.info.fields, mode=decorator.info.mode, check_fields=False)(
+            decorator.func.__func__
+        )
+        for key, decorator in schema.__pydantic_decorators__.field_validators.items()
+        if names.intersection(decorator.info.fields)
+    }
+    return create_model(
+        f"{schema.__name__}Fields",
+        __base__=BaseSchema,
+        __validators__=validators,
+        **fields,
+    )
+
+
+@lru_cache(maxsize=256)
+def sparse_list_adapter(schema: Type[BaseModel], names: FrozenSet[str]) -> TypeAdapter:
+    """TypeAdapter списка частичных объектов (создается один раз на набор полей)"""
+    return TypeAdapter(List[sparse_schema(schema, names)])
+
+
+def load_columns(model, schema: Type[BaseModel], names: FrozenSet[str]) -> list:
+    """Атрибуты-столбцы модели для полей names (для load_only)"""
+    table = model.__table__
+    return [
+        getattr(model, key)
+        for key in (field_key(schema, name) for name in names)
+        if key in table.c
+    ]
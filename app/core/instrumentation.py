@@ -0,0 +1,142 @@
+"""
+SQL-статистика запросов API.
+
+События движка SQLAlchemy (любого Engine, включая sync_engine асинхронного)
+считают выполненные statements, время в БД и затронутые строки и добавляют
+их в статистику текущего HTTP запроса (contextvar, который выставляет
+QueryStatsMiddleware). По окончании ответа статистика уходит:
+- в заголовок Server-Timing: db;dur=<мс>;desc="<N> queries, <M> rows";
+- в лог (key=value); при превышении REQUEST_QUERY_WARNING_THRESHOLD - warning.
+
+Строки - rowcount курсора: для SELECT его сообщает psycopg, SQLite - только
+для INSERT/UPDATE/DELETE.
+
+Тесты проверяют бюджет запросов эндпоинта по заголовку ответа
+(parse_server_timing / assert_query_budget в tests/conftest.py).
+"""
+import logging
+import re
+import time
+from contextvars import ContextVar
+from dataclasses import dataclass
+from typing import Optional
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+SERVER_TIMING_HEADER = "Server-Timing"
+_SERVER_TIMING_RE = re.compile(r'db;dur=(?P<dur>[\d.]+);desc="(?P<statements>\d+) queries, (?P<rows>\d+) rows"')
+_QUERY_START_KEY = "query_start"
+
+
+@dataclass
+class QueryStats:
+    """SQL-статистика одного HTTP запроса"""
+    statements: int = 0
+    db_time: float = 0.0  # секунды
+    rows: int = 0
+
+    def server_timing(self) -> str:
+        return f'db;dur={self.db_time * 1000:.2f};desc="{self.statements} queries, {self.rows} rows"'
+
+
+_current_stats: ContextVar[Optional[QueryStats]] = ContextVar("query_stats", default=None)
+
+
+def current_query_stats() -> Optional[QueryStats]:
+    """Статистика текущего HTTP запроса (None вне запроса)"""
+    return _current_stats.get()
+
+
+def parse_server_timing(header: str) -> Optional[QueryStats]:
+    """QueryStats из заголовка Server-Timing ответа (None, если метрики db нет)"""
+    match = _SERVER_TIMING_RE.search(header or "")
+    if match is None:
+        return None
+    return QueryStats(
+        statements=int(match["statements"]),
+        db_time=float(match["dur"]) / 1000,
+        rows=int(match["rows"]),
+    )
+
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if _current_stats.get() is not None:
+        conn.info.setdefault(_QUERY_START_KEY, []).append(time.perf_counter())
+
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    stats = _current_stats.get()
+    if stats is None:
+        return
+    started = conn.info[_QUERY_START_KEY].pop()
+    stats.statements += 1
+    stats.db_time += time.perf_counter() - started
+    if cursor.rowcount > 0:
+        stats.rows += cursor.rowcount
+
+
+@event.listens_for(Engine, "handle_error")
+def _handle_error(exception_context):
+    starts = exception_context.connection.info.get(_QUERY_START_KEY) if exception_context.connection else None
+    if starts:
+        starts.pop()
+
+
+class QueryStatsMiddleware:
+    """ASGI middleware: SQL-статистика запроса в Server-Timing и в лог"""
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats = QueryStats()
+        token = _current_stats.set(stats)
+        started = time.perf_counter()
+        status_code = 500
+
+        async def send_with_stats(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                MutableHeaders(scope=message).append(SERVER_TIMING_HEADER, stats.server_timing())
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_stats)
+        finally:
+            _current_stats.reset(token)
+            _log_request(scope, status_code, stats, time.perf_counter() - started)
+
+
+def _log_request(scope: Scope, status_code: int, stats: QueryStats, duration: float) -> None:
+    level = logging.WARNING if stats.statements > settings.REQUEST_QUERY_WARNING_THRESHOLD else logging.INFO
+    if not logger.isEnabledFor(level):
+        return
+    logger.log(
+        level,
+        "method=%s path=%s status=%d queries=%d db_ms=%.2f rows=%d duration_ms=%.2f",
+        scope["method"], scope["path"], status_code,
+        stats.statements, stats.db_time * 1000, stats.rows, duration * 1000,
+        extra={
+            "http_method": scope["method"],
+            "http_path": scope["path"],
+            "http_status": status_code,
+            "db_statements": stats.statements,
+            "db_time_ms": round(stats.db_time * 1000, 2),
+            "db_rows": stats.rows,
+            "duration_ms": round(duration * 1000, 2),
+        },
+    )
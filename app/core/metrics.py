@@ -0,0 +1,233 @@
+"""
+Метрики процесса в формате Prometheus (GET /metrics).
+
+Задержка запросов собирается MetricsMiddleware в гистограммы по шаблону
+маршрута (/api/v1/projects/{id}), методу и статусу. Счетчики гистограммы
+создаются при первом запросе к маршруту; дальше каждый запрос только
+увеличивает числа в уже существующих списках. Запросы, не попавшие ни в один
+маршрут, учитываются под route="unmatched", чтобы произвольные URL не
+раздували число серий.
+
+Остальные значения снимаются в момент запроса /metrics:
+- пул соединений асинхронного движка (занятые, свободные, overflow);
+- трансляция в WebSocket сервис: счетчики BroadcastDispatcher и число
+  недоставленных строк outbox (очередь трансляции; пропускается, если БД
+  недоступна - остальные метрики от БД не зависят);
+- кэш ответов: попадания, промахи и доля попаданий;
+- задержка event loop (LoopLagMonitor): насколько позже запланированного
+  просыпается периодическая задача.
+"""
+import asyncio
+import time
+from bisect import bisect_left
+from collections import defaultdict
+from typing import Dict, List, Optional
+
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core.config import settings
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+# Границы корзин гистограммы задержки, секунды
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+UNMATCHED_ROUTE = "unmatched"
+
+
+class RequestMetrics:
+    """Гистограммы задержки запросов: route -> method -> status -> [корзины..., +Inf, sum]"""
+
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        self.buckets = buckets
+        self._series: Dict[str, Dict[str, Dict[int, List[float]]]] = defaultdict(lambda: defaultdict(dict))
+
+    def observe(self, route: str, method: str, status_code: int, duration: float) -> None:
+        by_status = self._series[route][method]
+        series = by_status.get(status_code)
+        if series is None:
+            series = by_status[status_code] = [0] * (len(self.buckets) + 1) + [0.0]
+        # Корзина - первая граница, не меньшая длительности (последняя - +Inf)
+        series[bisect_left(self.buckets, duration)] += 1
+        series[-1] += duration
+
+    def render(self, lines: List[str]) -> None:
+        name = "http_request_duration_seconds"
+        lines.append(f"# HELP {name} HTTP request latency by route template, method and status")
+        lines.append(f"# TYPE {name} histogram")
+        for route, by_method in sorted(self._series.items()):
+            for method, by_status in sorted(by_method.items()):
+                for status_code, series in sorted(by_status.items()):
+                    labels = f'method="{method}",route="{_escape(route)}",status="{status_code}"'
+                    cumulative = 0
+                    for bound, count in zip(self.buckets, series):
+                        cumulative += count
+                        lines.append(f'{name}_bucket{{{labels},le="{bound}"}} {cumulative}')
+                    cumulative += series[len(self.buckets)]
+                    lines.append(f'{name}_bucket{{{labels},le="+Inf"}} {cumulative}')
+                    lines.append(f"{name}_sum{{{labels}}} {series[-1]}")
+                    lines.append(f"{name}_count{{{labels}}} {cumulative}")
+
+    def clear(self) -> None:
+        self._series.clear()
+
+
+request_metrics = RequestMetrics()
+
+
+class MetricsMiddleware:
+    """ASGI middleware: задержка каждого HTTP запроса в request_metrics"""
+
+    def __init__(self, app: ASGIApp, metrics: RequestMetrics = request_metrics):
+        self.app = app
+        self.metrics = metrics
+        # id(маршрут) -> шаблон; объекты маршрутов живут все время работы
+        # приложения (и не хешируются), шаблон строится один раз на маршрут
+        self._templates: Dict[int, str] = {}
+
+    def route_template(self, scope: Scope) -> str:
+        route = scope.get("route")
+        if route is None:
+            return UNMATCHED_ROUTE
+        template = self._templates.get(id(route))
+        if template is None:
+            template = self._templates[id(route)] = route_template(scope)
+        return template
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        started = time.perf_counter()
+        status_code = 500
+
+        async def send_with_status(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            self.metrics.observe(
+                self.route_template(scope),
+                scope["method"],
+                status_code,
+                time.perf_counter() - started,
+            )
+
+
+def route_template(scope: Scope) -> str:
+    """
+    Шаблон маршрута запроса (/api/v1/projects/{id}) после роутинга.
+    Путь подключенного роутера (scope["route"].path, "/{id}") не содержит
+    префикса include_router. Префикс - часть пути запроса перед участком,
+    который маршрут строит сам из параметров (url_path_for); к нему
+    добавляется шаблон маршрута.
+    """
+    route = scope.get("route")
+    if route is None:
+        return UNMATCHED_ROUTE
+    path = scope["path"]
+    try:
+        suffix = route.url_path_for(route.name, **scope.get("path_params", {}))
+    except Exception:
+        return route.path
+    if not path.endswith(suffix):
+        return route.path
+    return path[:len(path) - len(suffix)] + route.path
+
+
+class LoopLagMonitor:
+    """
+    Задержка event loop: фоновая задача спит interval секунд и измеряет,
+    насколько позже запланированного она проснулась (блокирующий код,
+    перегрузка корутинами).
+    """
+
+    def __init__(self, interval: float = 0.5):
+        self.interval = interval
+        self.last_lag = 0.0
+        self.max_lag = 0.0
+        self._worker: Optional[asyncio.Task] = None
+
+    async def start(self) -> None:
+        if self._worker is None:
+            self._worker = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._worker is None:
+            return
+        self._worker.cancel()
+        try:
+            await self._worker
+        except asyncio.CancelledError:
+            pass
+        self._worker = None
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            scheduled = loop.time() + self.interval
+            await asyncio.sleep(self.interval)
+            self.record(loop.time() - scheduled)
+
+    def record(self, lag: float) -> None:
+        self.last_lag = max(lag, 0.0)
+        self.max_lag = max(self.max_lag, self.last_lag)
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _gauge(lines: List[str], name: str, help_text: str, value, kind: str = "gauge") -> None:
+    """Метрика без меток (gauge или counter)"""
+    lines.append(f"# HELP {name} {help_text}")
+    lines.append(f"# TYPE {name} {kind}")
+    lines.append(f"{name} {value}")
+
+
+def render_metrics(
+    pool,
+    broadcast: dict,
+    outbox_backlog: Optional[int],
+    cache,
+    loop_lag: LoopLagMonitor,
+    metrics: RequestMetrics = request_metrics,
+) -> str:
+    """
+    Текст метрик в формате Prometheus.
+    pool - пул соединений движка, broadcast - BroadcastDispatcher.snapshot(),
+    outbox_backlog - число строк outbox (None - не удалось получить),
+    cache - кэш ответов.
+    """
+    lines: List[str] = []
+    metrics.render(lines)
+
+    _gauge(lines, "db_pool_size", "Configured size of the async engine connection pool", pool.size())
+    _gauge(lines, "db_pool_checked_out", "Connections currently checked out of the pool", pool.checkedout())
+    _gauge(lines, "db_pool_checked_in", "Idle connections in the pool", pool.checkedin())
+    _gauge(lines, "db_pool_overflow", "Connections opened above the pool size", max(pool.overflow(), 0))
+
+    if outbox_backlog is not None:
+        _gauge(lines, "broadcast_queue_depth", "Outbox messages waiting for broadcast", outbox_backlog)
+    _gauge(lines, "broadcast_messages_sent_total", "Messages accepted by the WebSocket service",
+           broadcast["sent"], kind="counter")
+    _gauge(lines, "broadcast_messages_failed_total", "Messages not delivered after all retries",
+           broadcast["failed"], kind="counter")
+    _gauge(lines, "broadcast_retries_total", "Broadcast delivery retries", broadcast["retries"], kind="counter")
+    _gauge(lines, "broadcast_batches_total", "Broadcast batches sent", broadcast["batches"], kind="counter")
+    _gauge(lines, "broadcast_batch_latency_seconds", "Time from outbox insert to delivery of the last batch",
+           broadcast["last_latency"])
+
+    _gauge(lines, "response_cache_hits_total", "Response cache hits", cache.hits, kind="counter")
+    _gauge(lines, "response_cache_misses_total", "Response cache misses", cache.misses, kind="counter")
+    _gauge(lines, "response_cache_hit_ratio", "Response cache hit ratio since process start", cache.hit_ratio())
+
+    _gauge(lines, "event_loop_lag_seconds", "Event loop lag measured by the last probe", loop_lag.last_lag)
+    _gauge(lines, "event_loop_lag_max_seconds", "Maximum event loop lag since process start", loop_lag.max_lag)
+    return "\n".join(lines) + "\n"
+
+
+loop_lag_monitor = LoopLagMonitor(interval=settings.METRICS_LOOP_LAG_INTERVAL_SECONDS)
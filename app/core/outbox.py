@@ -0,0 +1,201 @@
+"""
+Релей transactional outbox: переносит сообщения из таблицы broadcast_outbox
+в WebSocket сервис.
+
+Эндпоинты только пишут строку outbox в своей транзакции и будят релей.
+Если трансляция отключена (пустой WEBSOCKET_SERVICE_URL), строки не пишутся:
+их некому было бы доставить и удалить.
+Релей забирает пакет в короткой транзакции: выбирает строки (FOR UPDATE
+SKIP LOCKED), выставляет им аренду locked_until и сразу делает commit. Сама
+отправка через BroadcastDispatcher (со всеми повторами) идет вне транзакции,
+не удерживая блокировки строк и соединение пула; после подтверждения строки
+удаляются. Пока аренда не истекла, другие воркеры эти строки не берут; если
+воркер упал посреди отправки, строки снова станут доступны по истечении
+OUTBOX_LEASE_SECONDS. Если сервис недоступен, строки остаются в таблице
+и отправляются повторно - сообщения могут прийти дважды, WebSocket сервис
+отбрасывает повторы по messageId. Каждая неудачная попытка увеличивает
+attempts и откладывает строку на экспоненциально растущую задержку
+(не больше OUTBOX_MAX_BACKOFF_SECONDS); после OUTBOX_MAX_ATTEMPTS попыток
+строка удаляется с записью в лог.
+"""
+import asyncio
+import logging
+from datetime import datetime, timedelta
+from typing import List, Optional
+
+from sqlalchemy import delete, func, or_, select, update
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from app.core.broadcast import BroadcastDispatcher, BroadcastUnavailable, broadcast_dispatcher
+from app.core.config import settings
+from app.core.database import AsyncSessionLocal
+from app.models.outbox import BroadcastOutbox
+
+logger = logging.getLogger(__name__)
+
+
+async def outbox_backlog(db: AsyncSession) -> int:
+    """Число строк outbox, ожидающих отправки (глубина очереди трансляции)"""
+    return await db.scalar(select(func.count()).select_from(BroadcastOutbox))
+
+
+class OutboxRelay:
+    """Фоновая доставка строк outbox пакетами"""
+
+    def __init__(
+        self,
+        session_factory: async_sessionmaker,
+        dispatcher: BroadcastDispatcher,
+        batch_size: int = 100,
+        poll_interval: float = 1.0,
+        lease: float = 60.0,
+        max_attempts: int = 20,
+        retry_backoff: float = 1.0,
+        max_backoff: float = 300.0,
+    ):
+        self.session_factory = session_factory
+        self.dispatcher = dispatcher
+        self.batch_size = batch_size
+        self.poll_interval = poll_interval
+        self.lease = lease
+        self.max_attempts = max_attempts
+        self.retry_backoff = retry_backoff
+        self.max_backoff = max_backoff
+        self._wakeup: Optional[asyncio.Event] = None
+        self._worker: Optional[asyncio.Task] = None
+
+    @property
+    def enabled(self) -> bool:
+        """Без WebSocket сервиса строки outbox не пишутся и релей не запускается"""
+        return self.dispatcher.enabled
+
+    @property
+    def running(self) -> bool:
+        return self._worker is not None and not self._worker.done()
+
+    async def start(self) -> None:
+        """Запускает релей (после запуска диспетчера)"""
+        if not self.enabled or self.running:
+            return
+        self._wakeup = asyncio.Event()
+        self._worker = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """Останавливает релей; недоставленные строки остаются в outbox"""
+        if self._worker is None:
+            return
+        self._worker.cancel()
+        try:
+            await self._worker
+        except asyncio.CancelledError:
+            pass
+        self._worker = None
+        self._wakeup = None
+
+    def notify(self) -> None:
+        """Будит релей после commit, чтобы не ждать следующего опроса"""
+        if self._wakeup is not None:
+            self._wakeup.set()
+
+    async def drain(self) -> int:
+        """
+        Отправляет строки outbox пакетами, пока доступные строки не закончатся.
+        Возвращает число доставленных сообщений. Если сервис недоступен,
+        откладывает пакет (attempts + 1) и выбрасывает BroadcastUnavailable.
+        """
+        delivered = 0
+        while True:
+            rows = await self._claim()
+            if not rows:
+                return delivered
+
+            ids = [row.message_id for row in rows]
+            waited = (datetime.utcnow() - min(row.created_at for row in rows)).total_seconds()
+            try:
+                accepted = await self.dispatcher.deliver([row.payload for row in rows], waited=waited)
+            except BroadcastUnavailable:
+                await self._retry_later(rows)
+                raise
+            if accepted:
+                delivered += len(ids)
+            else:
+                # Отклоненный пакет не будет принят и при повторе
+                logger.error("Dropping %d outbox messages rejected by WebSocket service", len(ids))
+            async with self.session_factory() as db:
+                await db.execute(delete(BroadcastOutbox).where(BroadcastOutbox.message_id.in_(ids)))
+                await db.commit()
+
+    async def _claim(self) -> List[BroadcastOutbox]:
+        """Забирает пакет доступных строк и арендует его на lease секунд"""
+        now = datetime.utcnow()
+        async with self.session_factory() as db:
+            rows = (
+                await db.execute(
+                    select(BroadcastOutbox)
+                    .where(or_(BroadcastOutbox.locked_until.is_(None), BroadcastOutbox.locked_until <= now))
+                    .order_by(BroadcastOutbox.created_at, BroadcastOutbox.message_id)
+                    .limit(self.batch_size)
+                    .with_for_update(skip_locked=True)
+                )
+            ).scalars().all()
+            if rows:
+                await db.execute(
+                    update(BroadcastOutbox)
+                    .where(BroadcastOutbox.message_id.in_([row.message_id for row in rows]))
+                    .values(locked_until=now + timedelta(seconds=self.lease))
+                )
+                await db.commit()
+            return rows
+
+    def backoff(self, attempts: int) -> float:
+        """Задержка перед следующей попыткой после attempts неудачных"""
+        return min(self.retry_backoff * 2 ** (attempts - 1), self.max_backoff)
+
+    async def _retry_later(self, rows: List[BroadcastOutbox]) -> None:
+        """Откладывает неотправленный пакет; строки, исчерпавшие попытки, удаляет"""
+        attempts = max(row.attempts for row in rows) + 1
+        expired = [row.message_id for row in rows if row.attempts + 1 >= self.max_attempts]
+        retry = [row.message_id for row in rows if row.attempts + 1 < self.max_attempts]
+        async with self.session_factory() as db:
+            if expired:
+                logger.error(
+                    "Dropping %d outbox messages after %d failed attempts: %s",
+                    len(expired), self.max_attempts, ", ".join(str(id) for id in expired)
+                )
+                await db.execute(delete(BroadcastOutbox).where(BroadcastOutbox.message_id.in_(expired)))
+            if retry:
+                await db.execute(
+                    update(BroadcastOutbox)
+                    .where(BroadcastOutbox.message_id.in_(retry))
+                    .values(
+                        attempts=BroadcastOutbox.attempts + 1,
+                        locked_until=datetime.utcnow() + timedelta(seconds=self.backoff(attempts)),
+                    )
+                )
+            await db.commit()
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), self.poll_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            try:
+                await self.drain()
+            except BroadcastUnavailable as e:
+                logger.error("%s, outbox will be retried with backoff", e)
+            except Exception:
+                logger.exception("Outbox relay failed")
+
+
+outbox_relay = OutboxRelay(
+    session_factory=AsyncSessionLocal,
+    dispatcher=broadcast_dispatcher,
+    batch_size=settings.BROADCAST_BATCH_SIZE,
+    poll_interval=settings.OUTBOX_POLL_INTERVAL_SECONDS,
+    lease=settings.OUTBOX_LEASE_SECONDS,
+    max_attempts=settings.OUTBOX_MAX_ATTEMPTS,
+    retry_backoff=settings.OUTBOX_RETRY_BACKOFF_SECONDS,
+    max_backoff=settings.OUTBOX_MAX_BACKOFF_SECONDS,
+)
@@ -0,0 +1,145 @@
+"""
+Курсорная (keyset) пагинация.
+
+Курсор - непрозрачная для клиента строка, в которой закодированы значения
+ключа сортировки последней отданной записи. Следующая страница начинается
+строго после этой позиции, поэтому стоимость запроса не растет с номером страницы.
+"""
+import base64
+import binascii
+import json
+from datetime import datetime
+from typing import Any, Optional, Sequence
+from uuid import UUID
+
+from sqlalchemy import Boolean, and_, func, or_, select, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.sql.expression import ClauseElement, ColumnElement, Executable
+
+from app.core.exceptions import BadRequestError
+
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+BEFORE_CURSOR_HEADER = "X-Before-Cursor"
+AFTER_CURSOR_HEADER = "X-After-Cursor"
+TOTAL_COUNT_HEADER = "X-Total-Count"
+PAGINATION_HEADERS = [NEXT_CURSOR_HEADER, BEFORE_CURSOR_HEADER, AFTER_CURSOR_HEADER, TOTAL_COUNT_HEADER]
+# Если планировщик оценивает выборку больше порога, точный COUNT не выполняется
+EXACT_COUNT_THRESHOLD = 10000
+
+
+def encode_cursor(*values: Any) -> str:
+    """Кодирует значения ключа сортировки в курсор"""
+    payload = [
+        value.isoformat() if isinstance(value, datetime)
+        else str(value) if isinstance(value, UUID)
+        else value
+        for value in values
+    ]
+    raw = json.dumps(payload, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, *types: type, nullable: bool = True) -> tuple:
+    """
+    Декодирует курсор и приводит значения к указанным типам (datetime, UUID, ...).
+    None допускается для любой позиции, если nullable=True.
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        if not isinstance(payload, list) or len(payload) != len(types):
+            raise ValueError("cursor arity mismatch")
+        values = tuple(_parse(value, type_) for value, type_ in zip(payload, types))
+    except (ValueError, TypeError, binascii.Error):
+        raise BadRequestError("Invalid cursor")
+    if not nullable and any(value is None for value in values):
+        raise BadRequestError("Invalid cursor")
+    return values
+
+
+class _KeysetPredicate(ColumnElement):
+    """
+    Условие "строго после позиции values" для сортировки по columns
+    (лексикографически, все колонки в одном направлении)
+    """
+    type = Boolean()
+    # Сравнение, а не логическая колонка: без "= 1" на СУБД без типа BOOLEAN
+    _is_implicitly_boolean = True
+    inherit_cache = False
+
+    def __init__(self, columns: Sequence, values: Sequence, ascending: bool):
+        self.columns = list(columns)
+        self.values = list(values)
+        self.ascending = ascending
+
+    def row_value(self):
+        """(a, b) > (x, y): PostgreSQL проходит индекс (a, b) одним диапазоном"""
+        left, right = tuple_(*self.columns), tuple_(*self.values)
+        return left > right if self.ascending else left < right
+
+    def expanded(self):
+        """(a > x) OR (a = x AND b > y) OR ... - для СУБД без сравнения row values"""
+        clauses = []
+        for i, (column, value) in enumerate(zip(self.columns, self.values)):
+            step = column > value if self.ascending else column < value
+            equal_prefix = [c == v for c, v in zip(self.columns[:i], self.values[:i])]
+            clauses.append(and_(*equal_prefix, step))
+        return or_(*clauses)
+
+
+@compiles(_KeysetPredicate)
+def _compile_keyset_predicate(element: _KeysetPredicate, compiler, **kw) -> str:
+    return compiler.process(element.row_value(), **kw)
+
+
+@compiles(_KeysetPredicate, "mssql")
+@compiles(_KeysetPredicate, "oracle")
+def _compile_keyset_predicate_expanded(element: _KeysetPredicate, compiler, **kw) -> str:
+    # Скобки: условие может стоять в AND с другими фильтрами
+    return compiler.process(element.expanded().self_group(), **kw)
+
+
+def keyset_predicate(columns: Sequence, values: Sequence, ascending: bool = True) -> ColumnElement:
+    """
+    Условие "строго после позиции values" для сортировки по columns.
+    Сравнение row values (PostgreSQL, SQLite, MySQL); на СУБД без него -
+    эквивалентное раскрытие через OR.
+    """
+    return _KeysetPredicate(columns, values, ascending)
+
+
+def _parse(value: Any, type_: type) -> Optional[Any]:
+    if value is None:
+        return None
+    if type_ is datetime:
+        return datetime.fromisoformat(value)
+    return type_(value)
+
+
+class _Explain(Executable, ClauseElement):
+    """EXPLAIN (FORMAT JSON) для запроса (оценка числа строк планировщиком)"""
+    inherit_cache = False
+
+    def __init__(self, statement):
+        self.statement = statement
+
+
+@compiles(_Explain, "postgresql")
+def _compile_explain(element: _Explain, compiler, **kw) -> str:
+    return "EXPLAIN (FORMAT JSON) " + compiler.process(element.statement, **kw)
+
+
+async def estimated_count(db: AsyncSession, query) -> int:
+    """
+    Число строк запроса (фильтры без сортировки и лимита).
+    На PostgreSQL сначала берется оценка планировщика: для больших выборок
+    она и возвращается (без прохода по всем строкам), для небольших
+    выполняется точный COUNT. На других СУБД - всегда точный COUNT.
+    """
+    if db.get_bind().dialect.name == "postgresql":
+        plan = (await db.execute(_Explain(query))).scalar_one()
+        estimate = int(plan[0]["Plan"]["Plan Rows"])
+        if estimate > EXACT_COUNT_THRESHOLD:
+            return estimate
+    return (await db.execute(select(func.count()).select_from(query.subquery()))).scalar_one()
@@ -0,0 +1,216 @@
+"""
+Pub/sub событий чатов.
+
+Подписчики (WebSocket и SSE соединения) получают собственную ограниченную
+очередь в ChatHub своего процесса. Публикация не ждет подписчиков: событие
+сериализуется один раз и раскладывается по очередям; если клиент не успевает
+читать и его очередь заполнена, самое старое событие отбрасывается, чтобы
+медленный клиент не тормозил остальных.
+
+Доставка события в ChatHub зависит от CHAT_PUBSUB_BACKEND:
+- local - только подписчикам текущего процесса (один воркер);
+- postgres - через NOTIFY в канал chat_events. Каждый процесс держит одно
+  соединение с LISTEN на все чаты и раскладывает события по своим подписчикам,
+  поэтому сообщение доходит до клиентов, подключенных к любому воркеру.
+В обоих случаях событие уходит только после commit транзакции сообщения.
+
+То же соединение LISTEN слушает и другие каналы процесса, зарегистрированные
+через listen() (инвалидация кэша ответов между воркерами).
+"""
+import asyncio
+import logging
+from collections import defaultdict
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Awaitable, Callable, Dict, Optional, Set
+from uuid import UUID
+
+import psycopg
+from sqlalchemy import event, func, select
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.database import AsyncSessionLocal
+from app.models.chat import Message
+from app.schemas.chat import MessageResponse
+
+logger = logging.getLogger(__name__)
+
+CHAT_EVENTS_CHANNEL = "chat_events"
+# Предел NOTIFY - 8000 байт; более длинные события передаются ссылкой на сообщение
+NOTIFY_PAYLOAD_LIMIT = 7900
+_PENDING_EVENTS_KEY = "chat_events"
+
+
+class ChatHub:
+    """Подписки на события чатов"""
+
+    def __init__(self, queue_size: int = 100):
+        self.queue_size = queue_size
+        self.dropped = 0
+        self._subscribers: Dict[UUID, Set[asyncio.Queue]] = defaultdict(set)
+
+    @asynccontextmanager
+    async def subscribe(self, chat_id: UUID) -> AsyncIterator[asyncio.Queue]:
+        """Очередь событий чата на время жизни соединения"""
+        queue: asyncio.Queue = asyncio.Queue(maxsize=self.queue_size)
+        self._subscribers[chat_id].add(queue)
+        try:
+            yield queue
+        finally:
+            subscribers = self._subscribers.get(chat_id)
+            if subscribers is not None:
+                subscribers.discard(queue)
+                if not subscribers:
+                    del self._subscribers[chat_id]
+
+    def publish(self, chat_id: UUID, event: str) -> int:
+        """
+        Раскладывает уже сериализованное событие по очередям подписчиков чата.
+        Возвращает число подписчиков.
+        """
+        subscribers = self._subscribers.get(chat_id, ())
+        for queue in subscribers:
+            if queue.full():
+                queue.get_nowait()
+                self.dropped += 1
+            queue.put_nowait(event)
+        return len(subscribers)
+
+    def has_subscribers(self, chat_id: UUID) -> bool:
+        return chat_id in self._subscribers
+
+    def subscriber_count(self) -> int:
+        """Число открытых подписок во всех чатах"""
+        return sum(len(subscribers) for subscribers in self._subscribers.values())
+
+
+chat_hub = ChatHub(queue_size=settings.CHAT_STREAM_QUEUE_SIZE)
+
+
+def message_event(message: Message) -> str:
+    """Сообщение для потоков WebSocket/SSE: тот же JSON, что и в REST ответе"""
+    return MessageResponse.model_validate(message).model_dump_json(by_alias=True)
+
+
+def notify_payload(message: Message, event: str) -> str:
+    """
+    Payload NOTIFY: "<chat_id> <событие>" или, если событие не помещается
+    в предел NOTIFY, "<chat_id> <message_id>" - слушатель загрузит сообщение из БД.
+    """
+    payload = f"{message.chat_id} {event}"
+    if len(payload.encode()) <= NOTIFY_PAYLOAD_LIMIT:
+        return payload
+    return f"{message.chat_id} {message.id}"
+
+
+async def publish_message_event(db: AsyncSession, message: Message) -> None:
+    """
+    Публикует новое сообщение подписчикам чата. Вызывается до commit
+    (flush не нужен: событие собирается из полей объекта message):
+    - local: событие откладывается в session.info и раздается подписчикам
+      в after_commit, при rollback отбрасывается;
+    - postgres: pg_notify выполняется внутри транзакции, PostgreSQL доставляет
+      уведомление слушателям только при commit.
+    """
+    event = message_event(message)
+    if settings.CHAT_PUBSUB_BACKEND == "postgres":
+        # NOTIFY доставляется слушателям в момент commit
+        await db.execute(select(func.pg_notify(CHAT_EVENTS_CHANNEL, notify_payload(message, event))))
+    else:
+        db.sync_session.info.setdefault(_PENDING_EVENTS_KEY, []).append((message.chat_id, event))
+
+
+@event.listens_for(Session, "after_commit")
+def _publish_pending_events(session: Session):
+    for chat_id, chat_event in session.info.pop(_PENDING_EVENTS_KEY, ()):
+        chat_hub.publish(chat_id, chat_event)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_pending_events(session: Session):
+    session.info.pop(_PENDING_EVENTS_KEY, None)
+
+
+class PostgresChatListener:
+    """
+    Одно соединение LISTEN на процесс: получает события всех чатов
+    и раскладывает их по подписчикам ChatHub. При обрыве соединения
+    переподключается с экспоненциальной задержкой; события, пришедшие
+    за время обрыва, клиенты могут догрузить через историю сообщений (after).
+    """
+
+    def __init__(
+        self,
+        hub: ChatHub,
+        database_url: str,
+        session_factory: async_sessionmaker,
+        max_reconnect_delay: float = 30.0,
+    ):
+        self.hub = hub
+        # psycopg принимает URL без указания драйвера SQLAlchemy
+        self.conninfo = make_url(database_url).set(drivername="postgresql").render_as_string(hide_password=False)
+        self.session_factory = session_factory
+        self.max_reconnect_delay = max_reconnect_delay
+        self._handlers: Dict[str, Callable[[str], Awaitable[None]]] = {CHAT_EVENTS_CHANNEL: self.dispatch}
+        self._worker: Optional[asyncio.Task] = None
+
+    def listen(self, channel: str, handler: Callable[[str], Awaitable[None]]) -> None:
+        """Дополнительный канал на том же соединении (регистрируется до start)"""
+        self._handlers[channel] = handler
+
+    async def start(self) -> None:
+        """Запускает слушателя (вызывается в lifespan приложения)"""
+        if self._worker is None:
+            self._worker = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._worker is None:
+            return
+        self._worker.cancel()
+        try:
+            await self._worker
+        except asyncio.CancelledError:
+            pass
+        self._worker = None
+
+    async def _run(self) -> None:
+        delay = 1.0
+        while True:
+            try:
+                async with await psycopg.AsyncConnection.connect(self.conninfo, autocommit=True) as conn:
+                    for channel in self._handlers:
+                        await conn.execute(f"LISTEN {channel}")
+                    delay = 1.0
+                    async for notify in conn.notifies():
+                        await self._handlers[notify.channel](notify.payload)
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception("Chat events listener failed, reconnecting in %.0fs", delay)
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, self.max_reconnect_delay)
+
+    async def dispatch(self, payload: str) -> None:
+        """Раскладывает payload NOTIFY по подписчикам процесса"""
+        try:
+            chat_id, body = payload.split(" ", 1)
+            chat_id = UUID(chat_id)
+            message_id = None if body.startswith("{") else UUID(body)
+        except ValueError:
+            logger.warning("Malformed chat event payload: %.100s", payload)
+            return
+        if not self.hub.has_subscribers(chat_id):
+            return
+        if message_id is None:
+            self.hub.publish(chat_id, body)
+            return
+        # Событие не поместилось в NOTIFY: загружаем сообщение по id
+        async with self.session_factory() as db:
+            message = await db.get(Message, message_id)
+        if message is not None:
+            self.hub.publish(chat_id, message_event(message))
+
+
+chat_listener = PostgresChatListener(chat_hub, settings.DATABASE_URL, AsyncSessionLocal)
@@ -0,0 +1,43 @@
+"""
+Быстрый путь сериализации больших списков.
+
+Обычный ответ эндпоинта собирает ORM-объекты, валидирует каждый через схему
+Pydantic и только потом сериализует. Для схем, поля которых один к одному
+совпадают со столбцами таблицы (ключи JSON - alias полей, то есть имена
+столбцов), это лишняя работа: эндпоинт выбирает только нужные столбцы
+(schema_columns), а строки сериализуются напрямую через orjson (RowsResponse)
+- без identity map сессии, без моделей и без повторной валидации данных,
+которые уже проверены при записи в БД.
+
+Схемы с преобразованиями полей (например, ProjectResponse) этим путем
+не сериализуются: для них используются заранее созданные TypeAdapter.
+"""
+from typing import Any, List, Sequence, Type
+
+import orjson
+from fastapi import Response
+from pydantic import BaseModel
+
+
+def schema_columns(schema: Type[BaseModel], model) -> List[Any]:
+    """
+    Столбцы модели для полей схемы, в порядке полей схемы.
+    Ошибка при импорте, если у поля схемы нет одноименного столбца.
+    """
+    table = model.__table__
+    columns = []
+    for name, field in schema.model_fields.items():
+        key = field.alias or name
+        if key not in table.c:
+            raise ValueError(f"{schema.__name__}.{name}: no column '{key}' in {table.name}")
+        columns.append(table.c[key])
+    return columns
+
+
+class RowsResponse(Response):
+    """JSON массив из строк запроса (RowMapping) через orjson"""
+    media_type = "application/json"
+
+    def render(self, content: Sequence[Any]) -> bytes:
+        # UUID, datetime и Enum (по значению) orjson сериализует сам
+        return orjson.dumps([dict(row) for row in content])
@@ -0,0 +1,38 @@
+"""
+Снимок (snapshot) дорогого результата в памяти процесса с коротким TTL.
+
+Снимок живет в пределах одного процесса: при нескольких воркерах каждый держит
+свою копию, поэтому расхождение между ними ограничено TTL.
+"""
+import time
+from typing import Any, Awaitable, Callable, Optional
+
+
+class TTLSnapshot:
+    """Значение, которое пересчитывается не чаще раза в ttl секунд"""
+
+    def __init__(self, ttl: float):
+        self.ttl = ttl
+        self._value: Optional[Any] = None
+        self._expires_at = 0.0
+        # Номер поколения растет при каждой инвалидации: результат загрузки,
+        # начатой до инвалидации, не должен попасть в снимок
+        self._generation = 0
+
+    async def get_or_load(self, loader: Callable[[], Awaitable[Any]]) -> Any:
+        """Возвращает актуальный снимок или загружает его через loader"""
+        if self._value is not None and time.monotonic() < self._expires_at:
+            return self._value
+
+        generation = self._generation
+        value = await loader()
+        if self.ttl > 0 and generation == self._generation:
+            self._value = value
+            self._expires_at = time.monotonic() + self.ttl
+        return value
+
+    def invalidate(self) -> None:
+        """Сбрасывает снимок: следующий запрос загрузит свежие данные"""
+        self._generation += 1
+        self._value = None
+        self._expires_at = 0.0
@@ -1,12 +1,26 @@
-from fastapi import FastAPI, Request, HTTPException
+from fastapi import Depends, FastAPI, Request, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, Response
 from fastapi.exceptions import RequestValidationError
 from pydantic import ValidationError
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.ext.asyncio import AsyncSession
+from contextlib import asynccontextmanager
+import asyncio
 import logging
 
+from app.core.broadcast import broadcast_dispatcher
+from app.core.outbox import outbox_backlog, outbox_relay
+from app.core.pubsub import chat_listener
 from app.core.config import settings
 from app.core.exceptions import APIException
+from app.core.cache import CACHE_INVALIDATION_CHANNEL, apply_remote_invalidation, response_cache
+from app.core.compression import CompressionMiddleware
+from app.core.instrumentation import QueryStatsMiddleware
+from app.core.metrics import CONTENT_TYPE as METRICS_CONTENT_TYPE, MetricsMiddleware, loop_lag_monitor, render_metrics
+from app.core.database import async_engine, get_db
+from app.core.conditional import VALIDATOR_HEADERS
+from app.core.pagination import PAGINATION_HEADERS
 from app.api.v1.router import api_router
 
 # Настройка логирования
@@ -16,12 +30,32 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Запуск и остановка фоновых компонентов приложения"""
+    await loop_lag_monitor.start()
+    await broadcast_dispatcher.start()
+    await outbox_relay.start()
+    if response_cache.broadcast:
+        chat_listener.listen(CACHE_INVALIDATION_CHANNEL, apply_remote_invalidation)
+    if settings.CHAT_PUBSUB_BACKEND == "postgres" or response_cache.broadcast:
+        await chat_listener.start()
+    yield
+    await chat_listener.stop()
+    await outbox_relay.stop()
+    await broadcast_dispatcher.stop()
+    await response_cache.close()
+    await loop_lag_monitor.stop()
+
+
 app = FastAPI(
     title=settings.APP_NAME,
     version=settings.APP_VERSION,
     debug=settings.DEBUG,
     docs_url="/docs",
-    redoc_url="/redoc"
+    redoc_url="/redoc",
+    lifespan=lifespan
 )
 
 # CORS middleware (для работы с мобильным приложением)
@@ -31,8 +65,23 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=PAGINATION_HEADERS + VALIDATOR_HEADERS,
 )
 
+# SQL-статистика запроса: заголовок Server-Timing и лог
+app.add_middleware(QueryStatsMiddleware)
+
+# Сжатие ответов по Accept-Encoding (большие списки по мобильной сети)
+app.add_middleware(
+    CompressionMiddleware,
+    minimum_size=settings.COMPRESSION_MINIMUM_SIZE,
+    gzip_level=settings.COMPRESSION_GZIP_LEVEL,
+    brotli_quality=settings.COMPRESSION_BROTLI_QUALITY,
+)
+
+# Гистограммы задержки запросов по шаблону маршрута для /metrics
+app.add_middleware(MetricsMiddleware)
+
 
 # Обработчик исключений API
 @app.exception_handler(APIException)
@@ -112,3 +161,26 @@ async def root():
 async def health_check():
     """Эндпоинт для проверки здоровья приложения"""
     return {"status": "ok"}
+
+
+@app.get("/metrics", include_in_schema=False)
+async def metrics(db: AsyncSession = Depends(get_db)):
+    """
+    Метрики процесса в формате Prometheus.
+    Глубина очереди трансляции - единственное значение из БД: если БД
+    недоступна или не отвечает за METRICS_DB_TIMEOUT_SECONDS, метрика
+    пропускается, остальные (в том числе пул соединений) отдаются.
+    """
+    try:
+        backlog = await asyncio.wait_for(outbox_backlog(db), settings.METRICS_DB_TIMEOUT_SECONDS)
+    except (SQLAlchemyError, OSError, asyncio.TimeoutError) as e:
+        logger.warning("Outbox backlog unavailable for /metrics: %r", e)
+        backlog = None
+    body = render_metrics(
+        pool=async_engine.pool,
+        broadcast=broadcast_dispatcher.snapshot(),
+        outbox_backlog=backlog,
+        cache=response_cache,
+        loop_lag=loop_lag_monitor,
+    )
+    return Response(body, media_type=METRICS_CONTENT_TYPE)
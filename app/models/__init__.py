@@ -3,6 +3,8 @@ from app.models.document import Document
 from app.models.construction_site import ConstructionSite, Camera
 from app.models.chat import Chat, Message
 from app.models.completion import FinalDocument
+from app.models.notification import Notification
+from app.models.outbox import BroadcastOutbox
 
 __all__ = [
     "Project",
@@ -13,5 +15,7 @@ __all__ = [
     "Chat",
     "Message",
     "FinalDocument",
+    "Notification",
+    "BroadcastOutbox",
 ]
 
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, String, DateTime, ForeignKey, Boolean, Integer
+from sqlalchemy import Column, String, DateTime, ForeignKey, Boolean, Integer, Index, func, select, text
 from sqlalchemy.orm import relationship
 from sqlalchemy.dialects.postgresql import UUID
 import uuid
@@ -10,12 +10,30 @@ from app.core.database import Base
 class Chat(Base):
     """Модель чата с специалистом"""
     __tablename__ = "chats"
+    __table_args__ = (
+        # Активный чат проекта: project_id = ? AND is_active ORDER BY created_at
+        Index("ix_chats_project_id_created_at", "project_id", "created_at"),
+        # Не более одного активного чата у проекта: параллельное создание чата
+        # (одобрение, /start, массовое одобрение) пропускается ON CONFLICT DO NOTHING
+        Index(
+            "ux_chats_project_id_active",
+            "project_id",
+            unique=True,
+            postgresql_where=text("is_active"),
+            sqlite_where=text("is_active"),
+        ),
+    )
 
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     project_id = Column(UUID(as_uuid=True), ForeignKey("projects.id", ondelete="CASCADE"), nullable=False)
     specialist_name = Column(String(255), nullable=False)
     specialist_avatar_url = Column(String(1000), nullable=True)
     is_active = Column(Boolean, default=True, nullable=False)
+    # Сводка по сообщениям: обновляется в той же транзакции, что и запись сообщений,
+    # чтобы список чатов не сканировал таблицу messages
+    last_message = Column(String(2000), nullable=True)
+    last_message_at = Column(DateTime, nullable=True)
+    unread_count = Column(Integer, default=0, server_default="0", nullable=False)
     created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False)
 
@@ -26,6 +44,17 @@ class Chat(Base):
 class Message(Base):
     """Модель сообщения в чате"""
     __tablename__ = "messages"
+    __table_args__ = (
+        # Keyset-пагинация истории чата по (sent_at, id)
+        Index("ix_messages_chat_id_sent_at_id", "chat_id", "sent_at", "id"),
+        # Непрочитанные сообщения специалиста (отметка прочтения, пересчет сводки)
+        Index(
+            "ix_messages_chat_id_unread_from_specialist",
+            "chat_id",
+            postgresql_where=text("is_from_specialist AND NOT is_read"),
+            sqlite_where=text("is_from_specialist AND NOT is_read"),
+        ),
+    )
 
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     chat_id = Column(UUID(as_uuid=True), ForeignKey("chats.id", ondelete="CASCADE"), nullable=False)
@@ -37,3 +66,39 @@ class Message(Base):
 
     chat = relationship("Chat", back_populates="messages")
 
+
+
+# Список активных чатов: ORDER BY last_message_at DESC NULLS LAST, id DESC.
+# SQLite не поддерживает NULLS LAST в индексах, поэтому индекс только для PostgreSQL.
+Index(
+    "ix_chats_active_last_message_at",
+    Chat.last_message_at.desc().nulls_last(),
+    Chat.id.desc(),
+    postgresql_where=text("is_active"),
+).ddl_if(dialect="postgresql")
+
+
+def chat_summary_values() -> dict:
+    """
+    Сводные поля чата, пересчитанные по таблице messages.
+    Используется в UPDATE chats для заполнения и восстановления сводки.
+    """
+    latest = (
+        select(Message)
+        .where(Message.chat_id == Chat.id)
+        .order_by(Message.sent_at.desc(), Message.id.desc())
+        .limit(1)
+    )
+    return {
+        "last_message": latest.with_only_columns(Message.text).scalar_subquery(),
+        "last_message_at": latest.with_only_columns(Message.sent_at).scalar_subquery(),
+        "unread_count": (
+            select(func.count(Message.id))
+            .where(
+                Message.chat_id == Chat.id,
+                Message.is_from_specialist == True,  # noqa: E712
+                Message.is_read == False,  # noqa: E712
+            )
+            .scalar_subquery()
+        ),
+    }
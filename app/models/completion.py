@@ -1,4 +1,4 @@
-from sqlalchemy import Column, String, DateTime, ForeignKey, Enum as SQLEnum
+from sqlalchemy import Column, String, DateTime, ForeignKey, Index, Enum as SQLEnum
 from sqlalchemy.orm import relationship
 from sqlalchemy.dialects.postgresql import UUID
 import uuid
@@ -18,6 +18,9 @@ class FinalDocumentStatus(str, enum.Enum):
 class FinalDocument(Base):
     """Модель финального документа для завершения строительства"""
     __tablename__ = "final_documents"
+    __table_args__ = (
+        Index("ix_final_documents_project_id", "project_id"),
+    )
 
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     project_id = Column(UUID(as_uuid=True), ForeignKey("projects.id", ondelete="CASCADE"), nullable=False)
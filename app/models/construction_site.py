@@ -1,4 +1,4 @@
-from sqlalchemy import Column, String, DateTime, ForeignKey, Float, Boolean
+from sqlalchemy import Column, String, DateTime, ForeignKey, Float, Boolean, Index
 from sqlalchemy.orm import relationship
 from sqlalchemy.dialects.postgresql import UUID
 import uuid
@@ -10,6 +10,9 @@ from app.core.database import Base
 class Camera(Base):
     """Модель камеры на строительной площадке"""
     __tablename__ = "cameras"
+    __table_args__ = (
+        Index("ix_cameras_construction_site_id", "construction_site_id"),
+    )
 
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     construction_site_id = Column(UUID(as_uuid=True), ForeignKey("construction_sites.id", ondelete="CASCADE"), nullable=False)
@@ -27,6 +30,10 @@ class Camera(Base):
 class ConstructionSite(Base):
     """Модель строительной площадки"""
     __tablename__ = "construction_sites"
+    __table_args__ = (
+        # Порядок и курсор списка construction-objects
+        Index("ix_construction_sites_created_at_id", "created_at", "id"),
+    )
 
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     project_id = Column(UUID(as_uuid=True), ForeignKey("projects.id", ondelete="CASCADE"), nullable=False, unique=True)
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, String, DateTime, ForeignKey, Enum as SQLEnum
+from sqlalchemy import Column, String, DateTime, ForeignKey, Index, Enum as SQLEnum, text
 from sqlalchemy.orm import relationship
 from sqlalchemy.dialects.postgresql import UUID
 import uuid
@@ -19,6 +19,19 @@ class DocumentStatus(str, enum.Enum):
 class Document(Base):
     """Модель документа, требующего согласования"""
     __tablename__ = "documents"
+    __table_args__ = (
+        # Список документов: ORDER BY created_at DESC, id DESC с фильтрами по проекту и статусу
+        Index("ix_documents_created_at_id", "created_at", "id"),
+        Index("ix_documents_project_id_created_at_id", "project_id", "created_at", "id"),
+        Index("ix_documents_status_created_at_id", "status", "created_at", "id"),
+        # Очередь документов на согласовании (уведомления, модерация)
+        Index(
+            "ix_documents_pending_created_at",
+            "created_at",
+            postgresql_where=text("status = 'PENDING'"),
+            sqlite_where=text("status = 'PENDING'"),
+        ),
+    )
 
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     project_id = Column(UUID(as_uuid=True), ForeignKey("projects.id", ondelete="CASCADE"), nullable=False)
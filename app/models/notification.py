@@ -0,0 +1,87 @@
+from sqlalchemy import Column, String, DateTime, ForeignKey, Boolean, Index, Enum as SQLEnum, event, insert
+from sqlalchemy.dialects.postgresql import UUID
+import uuid
+from datetime import datetime
+import enum
+
+from app.core.database import Base
+from app.models.document import Document, DocumentStatus
+
+
+class NotificationType(str, enum.Enum):
+    """Типы уведомлений администратора"""
+    NEW_REQUEST = "new_request"
+    NEW_DOCUMENT = "new_document"
+    NEW_MESSAGE = "new_message"
+    CAMERA_OFFLINE = "camera_offline"
+
+
+class Notification(Base):
+    """
+    Модель уведомления администратора.
+    Записывается в момент события (в той же транзакции), поэтому лента
+    уведомлений читается по индексу страницами, без сканирования проектов и документов.
+    """
+    __tablename__ = "notifications"
+    __table_args__ = (
+        # Лента: ORDER BY created_at DESC, id DESC (все / только непрочитанные)
+        Index("ix_notifications_is_read_created_at", "is_read", "created_at", "id"),
+        Index("ix_notifications_created_at", "created_at", "id"),
+        Index("ix_notifications_project_id", "project_id"),
+    )
+
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    type = Column(SQLEnum(NotificationType), nullable=False)
+    title = Column(String(255), nullable=False)
+    message = Column(String(2000), nullable=False)
+    # Документы и чаты удаляются только вместе с проектом, поэтому каскад
+    # по project_id удаляет и их уведомления; document_id/chat_id - ссылки без FK
+    project_id = Column(UUID(as_uuid=True), ForeignKey("projects.id", ondelete="CASCADE"), nullable=True)
+    document_id = Column(UUID(as_uuid=True), nullable=True)
+    chat_id = Column(UUID(as_uuid=True), nullable=True)
+    is_read = Column(Boolean, default=False, nullable=False)
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+
+
+def request_notification(project) -> Notification:
+    """Уведомление о запросе проекта на строительство"""
+    return Notification(
+        type=NotificationType.NEW_REQUEST,
+        title="Новый запрос на строительство",
+        message=f"Проект '{project.name}' запрошен на строительство",
+        project_id=project.id,
+    )
+
+
+def message_notification(chat, message) -> Notification:
+    """Уведомление о новом сообщении пользователя в чате"""
+    return Notification(
+        type=NotificationType.NEW_MESSAGE,
+        title="Новое сообщение",
+        message=message.text,
+        project_id=chat.project_id,
+        chat_id=chat.id,
+        created_at=message.sent_at,
+    )
+
+
+@event.listens_for(Document, "after_insert")
+def _notify_document_submitted(mapper, connection, target: Document):
+    """
+    Документы создаются не только через API (сидирование, импорт), поэтому
+    уведомление о документе на согласовании пишется на уровне модели.
+    """
+    if target.status != DocumentStatus.PENDING:
+        return
+    connection.execute(
+        insert(Notification).values(
+            id=uuid.uuid4(),
+            type=NotificationType.NEW_DOCUMENT,
+            title="Новый документ на согласование",
+            message=f"Документ '{target.title}' требует согласования",
+            project_id=target.project_id,
+            document_id=target.id,
+            is_read=False,
+            created_at=target.submitted_at or target.created_at or datetime.utcnow(),
+        )
+    )
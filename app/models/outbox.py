@@ -0,0 +1,26 @@
+from sqlalchemy import Column, DateTime, Integer, Index, JSON
+from sqlalchemy.dialects.postgresql import UUID
+from datetime import datetime
+
+from app.core.database import Base
+
+
+class BroadcastOutbox(Base):
+    """
+    Исходящие сообщения для трансляции в WebSocket сервис (transactional outbox).
+    Строка пишется в той же транзакции, что и сообщение, и удаляется только
+    после того, как WebSocket сервис принял пакет (доставка at-least-once).
+    """
+    __tablename__ = "broadcast_outbox"
+    __table_args__ = (
+        # Порядок выборки пакетов релеем
+        Index("ix_broadcast_outbox_created_at", "created_at", "message_id"),
+    )
+
+    # Одно сообщение - не более одной строки: повторная запись отклоняется ключом
+    message_id = Column(UUID(as_uuid=True), primary_key=True)
+    payload = Column(JSON, nullable=False)
+    attempts = Column(Integer, default=0, nullable=False)
+    # Пакет отправляется релеем: до этого времени строку не берут другие воркеры
+    locked_until = Column(DateTime, nullable=True)
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
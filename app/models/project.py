@@ -1,5 +1,5 @@
-from sqlalchemy import Column, String, Float, Integer, DateTime, ForeignKey, Enum as SQLEnum
-from sqlalchemy.orm import relationship
+from sqlalchemy import Column, String, Float, Integer, DateTime, ForeignKey, Index, Enum as SQLEnum, select
+from sqlalchemy.orm import joinedload, relationship, selectinload
 from sqlalchemy.dialects.postgresql import UUID
 import uuid
 from datetime import datetime
@@ -25,6 +25,9 @@ class ProjectStatus(str, enum.Enum):
 class ProjectStage(Base):
     """Модель этапа строительства проекта"""
     __tablename__ = "project_stages"
+    __table_args__ = (
+        Index("ix_project_stages_project_id", "project_id"),
+    )
 
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     project_id = Column(UUID(as_uuid=True), ForeignKey("projects.id", ondelete="CASCADE"), nullable=False)
@@ -39,6 +42,11 @@ class ProjectStage(Base):
 class Project(Base):
     """Модель проекта строительства"""
     __tablename__ = "projects"
+    __table_args__ = (
+        # Каталог: ORDER BY created_at DESC; запросы на строительство: status = ? ORDER BY created_at
+        Index("ix_projects_created_at", "created_at"),
+        Index("ix_projects_status_created_at", "status", "created_at"),
+    )
 
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     name = Column(String(255), nullable=False)
@@ -68,3 +76,18 @@ class Project(Base):
             return self.construction_site.id
         return None
 
+
+
+def project_select():
+    """
+    select(Project) с предзагрузкой этапов и строительной площадки.
+    ProjectResponse читает stages и object_id, а ленивая загрузка
+    в AsyncSession недоступна. Площадка (один к одному) подтягивается
+    LEFT JOIN в основном запросе, этапы - SELECT ... IN по 500 проектов
+    (размер пакета selectinload), поэтому страница до 500 проектов
+    сериализуется за два запроса.
+    """
+    return select(Project).options(
+        joinedload(Project.construction_site),
+        selectinload(Project.stages),
+    )
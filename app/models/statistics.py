@@ -0,0 +1,82 @@
+"""
+Сводная статистика админ-панели: один запрос с условными агрегатами
+и снимок в памяти процесса, который сбрасывается при изменении
+проектов и документов.
+"""
+from itertools import chain
+
+from sqlalchemy import event, func, inspect, select, true
+from sqlalchemy.orm import ORMExecuteState, Session
+
+from app.core.config import settings
+from app.core.snapshot import TTLSnapshot
+from app.models.document import Document, DocumentStatus
+from app.models.project import Project, ProjectStatus
+
+statistics_snapshot = TTLSnapshot(ttl=settings.ADMIN_STATISTICS_TTL_SECONDS)
+
+# Атрибуты, от которых зависит статистика
+_TRACKED_ATTRIBUTES = {
+    Project: ("status", "price"),
+    Document: ("status",),
+}
+_DIRTY_KEY = "statistics_dirty"
+
+
+def statistics_select():
+    """
+    Все показатели статистики одним запросом: по одному проходу по projects
+    и documents с COUNT(*) FILTER (WHERE ...) вместо отдельного запроса
+    на каждый показатель.
+    """
+    projects = select(
+        func.count().label("total_projects"),
+        func.count().filter(Project.status == ProjectStatus.AVAILABLE).label("available_projects"),
+        func.count().filter(Project.status == ProjectStatus.REQUESTED).label("requested_projects"),
+        func.count().filter(Project.status == ProjectStatus.CONSTRUCTION).label("in_progress_projects"),
+        func.sum(Project.price).filter(Project.status == ProjectStatus.CONSTRUCTION).label("total_revenue"),
+        func.avg(Project.price).label("average_price"),
+    ).subquery()
+    documents = select(
+        func.count().label("total_documents"),
+        func.count().filter(Document.status == DocumentStatus.PENDING).label("pending_documents"),
+        func.count().filter(Document.status == DocumentStatus.APPROVED).label("approved_documents"),
+        func.count().filter(Document.status == DocumentStatus.REJECTED).label("rejected_documents"),
+    ).subquery()
+    # Оба подзапроса возвращают ровно одну строку
+    return select(projects, documents).select_from(projects.join(documents, true()))
+
+
+def _changes_statistics(obj) -> bool:
+    attributes = _TRACKED_ATTRIBUTES.get(type(obj))
+    if attributes is None:
+        return False
+    state = inspect(obj)
+    if state.pending or state.deleted or not state.has_identity:
+        return True
+    return any(state.attrs[name].history.has_changes() for name in attributes)
+
+
+@event.listens_for(Session, "before_flush")
+def _track_statistics_changes(session: Session, flush_context, instances):
+    if any(_changes_statistics(obj) for obj in chain(session.new, session.dirty, session.deleted)):
+        session.info[_DIRTY_KEY] = True
+
+
+@event.listens_for(Session, "do_orm_execute")
+def _track_bulk_statistics_changes(state: ORMExecuteState):
+    if (state.is_update or state.is_delete) and any(
+        mapper.class_ in _TRACKED_ATTRIBUTES for mapper in state.all_mappers
+    ):
+        state.session.info[_DIRTY_KEY] = True
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_statistics(session: Session):
+    if session.info.pop(_DIRTY_KEY, False):
+        statistics_snapshot.invalidate()
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_statistics_changes(session: Session):
+    session.info.pop(_DIRTY_KEY, None)
@@ -1,6 +1,4 @@
-from pydantic import BaseModel, field_validator, ConfigDict
-from typing import Any
-import enum
+from pydantic import BaseModel, ConfigDict
 
 
 class BaseSchema(BaseModel):
@@ -9,20 +7,14 @@ class BaseSchema(BaseModel):
     model_config = ConfigDict(
         from_attributes=True,
         populate_by_name=True,
+        # Поля статусов объявлены типами Enum (str, Enum): проверка и запись
+        # значения в JSON выполняются в pydantic-core. use_enum_values не
+        # используется: он добавляет Python-вызов .value на каждое поле
         # Используем имя поля (camelCase) для сериализации JSON
         # alias используется только для чтения из snake_case
     )
-    
-    @field_validator('*', mode='before')
-    @classmethod
-    def convert_enum_to_value(cls, v: Any) -> Any:
-        """Конвертирует Enum в строковое значение"""
-        if isinstance(v, enum.Enum):
-            return v.value
-        return v
 
 
 class EmptyResponse(BaseModel):
     """Пустой ответ для POST запросов"""
     pass
-
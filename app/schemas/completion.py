@@ -3,6 +3,7 @@ from typing import List, Optional, Any
 from datetime import datetime
 from uuid import UUID
 
+from app.models.completion import FinalDocumentStatus
 from app.schemas.base import BaseSchema
 
 
@@ -12,7 +13,7 @@ class FinalDocumentResponse(BaseSchema):
     title: str
     description: str = ""  # Мобильное приложение ожидает обязательное поле
     fileUrl: Optional[str] = Field(None, alias="file_url")
-    status: str  # "pending" | "signed" | "rejected"
+    status: FinalDocumentStatus
     submittedAt: Optional[datetime] = Field(None, alias="submitted_at")
     signedAt: Optional[datetime] = Field(None, alias="signed_at")
     signatureUrl: Optional[str] = Field(None, alias="signature_url")
@@ -3,6 +3,7 @@ from typing import List, Optional, Any
 from datetime import datetime
 from uuid import UUID
 
+from app.models.project import StageStatus
 from app.schemas.base import BaseSchema
 
 
@@ -40,7 +41,7 @@ class ConstructionObjectStageResponse(BaseSchema):
     """Схема этапа для объекта строительства (повторяет этап проекта)"""
     id: UUID
     name: str
-    status: str
+    status: StageStatus
 
 
 class ConstructionObjectResponse(BaseSchema):
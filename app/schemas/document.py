@@ -3,6 +3,7 @@ from typing import Optional, Any
 from datetime import datetime
 from uuid import UUID
 
+from app.models.document import DocumentStatus
 from app.schemas.base import BaseSchema
 
 
@@ -13,7 +14,7 @@ class DocumentResponse(BaseSchema):
     title: str
     description: str = ""  # Мобильное приложение ожидает обязательное поле
     fileUrl: Optional[str] = Field(None, alias="file_url")
-    status: str  # "pending" | "under_review" | "approved" | "rejected"
+    status: DocumentStatus
     submittedAt: Optional[datetime] = Field(None, alias="submitted_at")
     approvedAt: Optional[datetime] = Field(None, alias="approved_at")
     rejectionReason: Optional[str] = Field(None, alias="rejection_reason")
@@ -2,6 +2,7 @@ from pydantic import BaseModel, Field, field_validator
 from typing import List, Optional, Any
 from uuid import UUID
 
+from app.models.project import ProjectStatus, StageStatus
 from app.schemas.base import BaseSchema
 
 
@@ -9,7 +10,7 @@ class ProjectStageResponse(BaseSchema):
     """Схема этапа проекта для ответа"""
     id: UUID
     name: str
-    status: str  # "pending" | "in_progress" | "completed"
+    status: StageStatus
 
 
 class ProjectResponse(BaseSchema):
@@ -24,7 +25,7 @@ class ProjectResponse(BaseSchema):
     imageUrl: Optional[str] = Field(None, alias="image_url")
     bedrooms: int = 0
     bathrooms: int = 0
-    status: str = "available"
+    status: ProjectStatus = ProjectStatus.AVAILABLE
     objectId: Optional[UUID] = Field(None, alias="object_id")
     stages: List[ProjectStageResponse] = []
     
@@ -0,0 +1,54 @@
+"""
+Скрипт для пересчета сводных полей чатов (last_message, last_message_at, unread_count).
+
+Сводка поддерживается эндпоинтами чатов при записи сообщений. Скрипт нужен после
+прямых изменений таблицы messages (импорт, ручные правки) или для проверки
+рассинхронизации.
+
+Запуск:
+    python -m app.scripts.rebuild_chat_summaries [chat_id ...]
+"""
+import sys
+import os
+
+# Добавляем корневую директорию проекта в путь
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(__file__))))
+
+from typing import Optional, Sequence
+from uuid import UUID
+
+from sqlalchemy import update
+from sqlalchemy.orm import Session
+from app.core.database import SessionLocal
+from app.models.chat import Chat, chat_summary_values
+
+
+def rebuild_chat_summaries(db: Session, chat_ids: Optional[Sequence[UUID]] = None) -> int:
+    """
+    Пересчитывает сводку одним UPDATE по всем (или указанным) чатам.
+    Возвращает количество обновленных чатов.
+    """
+    statement = update(Chat).values(**chat_summary_values())
+    if chat_ids:
+        statement = statement.where(Chat.id.in_(chat_ids))
+    result = db.execute(statement.execution_options(synchronize_session=False))
+    db.commit()
+    return result.rowcount
+
+
+def main(argv: Sequence[str]):
+    chat_ids = [UUID(value) for value in argv]
+    db = SessionLocal()
+    try:
+        updated = rebuild_chat_summaries(db, chat_ids)
+        print(f"✅ Сводка пересчитана для чатов: {updated}")
+    except Exception as e:
+        print(f"\n❌ Ошибка при пересчете сводки чатов: {e}")
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -20,6 +20,7 @@ from app.models.document import Document, DocumentStatus
 from app.models.construction_site import ConstructionSite, Camera
 from app.models.chat import Chat, Message
 from app.models.completion import FinalDocument, FinalDocumentStatus
+from app.scripts.rebuild_chat_summaries import rebuild_chat_summaries
 
 
 def create_tables():
@@ -264,6 +265,8 @@ def seed_chats(db: Session, projects: list[Project]):
             db.add(message)
     
     db.commit()
+    # Сообщения добавлены напрямую, минуя API - заполняем сводку чатов
+    rebuild_chat_summaries(db)
 
 
 def seed_final_documents(db: Session, projects: list[Project]):
@@ -1,22 +1,75 @@
+import os
+import tempfile
+
 import pytest
 from fastapi.testclient import TestClient
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
+from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker
-from sqlalchemy.pool import StaticPool
+from sqlalchemy.pool import NullPool
+
+# Трансляция в WebSocket сервис в тестах отключена
+os.environ["WEBSOCKET_SERVICE_URL"] = ""
 
-from app.core.database import Base, get_db
+from app.core.cache import response_cache
+from app.core.database import Base, RaiseOnLazyLoadSession, get_db
+from app.core.instrumentation import SERVER_TIMING_HEADER, QueryStats, parse_server_timing
 from app.main import app
+from app.models.statistics import statistics_snapshot
+
+# Рассылка инвалидации кэша между воркерами (NOTIFY) в тестах на SQLite отключена
+response_cache.broadcast = False
+
+# Тестовая база данных SQLite во временном файле: синхронная сессия тестов
+# и асинхронная сессия приложения должны видеть одни и те же данные
+TEST_DB_PATH = os.path.join(tempfile.mkdtemp(), "test.db")
+SQLALCHEMY_DATABASE_URL = f"sqlite:///{TEST_DB_PATH}"
+ASYNC_SQLALCHEMY_DATABASE_URL = f"sqlite+aiosqlite:///{TEST_DB_PATH}"
+
+
+@compiles(UUID, "sqlite")
+def _compile_uuid_sqlite(type_, compiler, **kw):
+    # Столбец типа UUID получает в SQLite NUMERIC affinity: hex-строка вида
+    # "1234e567..." сохранялась бы числом. CHAR дает TEXT affinity.
+    return "CHAR(32)"
 
-# Тестовая база данных в памяти
-SQLALCHEMY_DATABASE_URL = "sqlite:///:memory:"
 
 engine = create_engine(
     SQLALCHEMY_DATABASE_URL,
     connect_args={"check_same_thread": False},
-    poolclass=StaticPool,
+    poolclass=NullPool,
 )
 TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+async_engine = create_async_engine(ASYNC_SQLALCHEMY_DATABASE_URL, poolclass=NullPool)
+# Ленивая загрузка связей в эндпоинтах запрещена: N+1 запросы падают в тестах
+TestingAsyncSessionLocal = async_sessionmaker(
+    bind=async_engine,
+    sync_session_class=RaiseOnLazyLoadSession,
+    autoflush=False,
+    expire_on_commit=False,
+)
+
+
+def pytest_addoption(parser):
+    parser.addoption("--benchmark", action="store_true", help="запустить бенчмарки (tests/test_benchmarks.py)")
+
+
+def pytest_configure(config):
+    config.addinivalue_line("markers", "benchmark: бенчмарк, запускается только с --benchmark")
+
+
+def pytest_collection_modifyitems(config, items):
+    # Бенчмарки меряют время и долго заполняют базу: только по явному запросу
+    if config.getoption("--benchmark"):
+        return
+    skip = pytest.mark.skip(reason="бенчмарк: запуск с --benchmark")
+    for item in items:
+        if "benchmark" in item.keywords:
+            item.add_marker(skip)
+
 
 @pytest.fixture(scope="function")
 def db_session():
@@ -32,15 +85,42 @@ def db_session():
 
 @pytest.fixture(scope="function")
 def client(db_session):
-    """Создает тестовый клиент с переопределенной сессией БД"""
-    def override_get_db():
-        try:
-            yield db_session
-        finally:
-            pass
-    
+    """Создает тестовый клиент с переопределенной асинхронной сессией БД"""
+    async def override_get_db():
+        async with TestingAsyncSessionLocal() as db:
+            yield db
+
     app.dependency_overrides[get_db] = override_get_db
+    # Снимки в памяти процесса не должны переживать пересоздание тестовой БД
+    statistics_snapshot.invalidate()
+    response_cache.clear()
     with TestClient(app) as test_client:
         yield test_client
     app.dependency_overrides.clear()
 
+
+def assert_query_budget(response, max_statements: int) -> QueryStats:
+    """
+    Бюджет запроса: эндпоинт выполнил не больше max_statements SQL statements
+    (по заголовку Server-Timing ответа). Возвращает статистику запроса.
+    """
+    stats = parse_server_timing(response.headers.get(SERVER_TIMING_HEADER))
+    assert stats is not None, f"{SERVER_TIMING_HEADER} without db metric"
+    request = response.request
+    assert stats.statements <= max_statements, (
+        f"{request.method} {request.url.path}: {stats.statements} SQL statements, budget {max_statements}"
+    )
+    return stats
+
+
+@pytest.fixture
+def query_counter():
+    """Тексты SQL-запросов, выполненных приложением через асинхронный движок"""
+    statements = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(async_engine.sync_engine, "before_cursor_execute", before_cursor_execute)
+    yield statements
+    event.remove(async_engine.sync_engine, "before_cursor_execute", before_cursor_execute)
@@ -0,0 +1,274 @@
+import pytest
+from sqlalchemy.exc import IntegrityError
+from uuid import uuid4
+from datetime import datetime, timedelta
+from app.models.chat import Chat
+from app.models.construction_site import ConstructionSite
+from app.models.notification import Notification, NotificationType
+from app.models.project import Project, ProjectStage, ProjectStatus
+from app.models.document import Document, DocumentStatus
+from tests.conftest import assert_query_budget
+
+
+def _add_project(db_session, status, price, documents=()):
+    project = Project(
+        id=uuid4(),
+        name="Проект",
+        address="Москва",
+        area=100.0,
+        floors=2,
+        price=price,
+        status=status
+    )
+    project.documents = [
+        Document(id=uuid4(), title="Документ", status=document_status)
+        for document_status in documents
+    ]
+    db_session.add(project)
+    db_session.commit()
+    return project
+
+
+def test_get_statistics(client, db_session):
+    """Статистика считается одним запросом"""
+    _add_project(db_session, ProjectStatus.AVAILABLE, 1000000.0, [DocumentStatus.PENDING])
+    _add_project(db_session, ProjectStatus.REQUESTED, 2000000.0, [DocumentStatus.APPROVED])
+    _add_project(
+        db_session,
+        ProjectStatus.CONSTRUCTION,
+        3000000.0,
+        [DocumentStatus.REJECTED, DocumentStatus.PENDING]
+    )
+
+    response = client.get("/api/v1/admin/statistics")
+    assert response.status_code == 200
+    assert response.json() == {
+        "totalProjects": 3,
+        "availableProjects": 1,
+        "requestedProjects": 1,
+        "inProgressProjects": 1,
+        "totalDocuments": 4,
+        "pendingDocuments": 2,
+        "approvedDocuments": 1,
+        "rejectedDocuments": 1,
+        "totalRevenue": 3000000.0,
+        "averageProjectPrice": 2000000.0,
+    }
+    assert_query_budget(response, 1)
+
+
+def test_get_statistics_empty(client):
+    """Статистика пустой базы"""
+    response = client.get("/api/v1/admin/statistics")
+    assert response.status_code == 200
+    data = response.json()
+    assert data["totalProjects"] == 0
+    assert data["totalRevenue"] == 0.0
+    assert data["averageProjectPrice"] == 0.0
+
+
+def test_statistics_snapshot_invalidated_on_state_change(client, db_session):
+    """Повторный запрос берется из снимка, смена статуса документа сбрасывает его"""
+    project = _add_project(db_session, ProjectStatus.AVAILABLE, 1000000.0, [DocumentStatus.PENDING])
+    document_id = project.documents[0].id
+
+    assert client.get("/api/v1/admin/statistics").json()["pendingDocuments"] == 1
+    response = client.get("/api/v1/admin/statistics")
+    assert response.json()["pendingDocuments"] == 1
+    assert_query_budget(response, 0)
+
+    response = client.post(f"/api/v1/documents/{document_id}/approve")
+    assert response.status_code == 204
+
+    data = client.get("/api/v1/admin/statistics").json()
+    assert data["pendingDocuments"] == 0
+    assert data["approvedDocuments"] == 1
+
+
+def test_notifications_written_on_events(client, db_session):
+    """Уведомления записываются при запросе проекта, документе на согласовании и сообщении пользователя"""
+    project = _add_project(db_session, ProjectStatus.AVAILABLE, 1000000.0, [DocumentStatus.PENDING])
+    chat = Chat(id=uuid4(), project_id=project.id, specialist_name="Специалист")
+    db_session.add(chat)
+    db_session.commit()
+
+    assert client.post(f"/api/v1/projects/{project.id}/request").status_code == 204
+    # Повторный запрос не дублирует уведомление
+    assert client.post(f"/api/v1/projects/{project.id}/request").status_code == 204
+    client.post(f"/api/v1/chats/{chat.id}/messages", json={"text": "Когда начнем?"})
+    client.post(f"/api/v1/chats/{chat.id}/messages", json={"text": "Ответ", "from_specialist": True})
+
+    response = client.get("/api/v1/admin/notifications")
+    assert response.status_code == 200
+    data = response.json()
+    assert sorted(item["type"] for item in data) == ["new_document", "new_message", "new_request"]
+    message = next(item for item in data if item["type"] == "new_message")
+    assert message["chatId"] == str(chat.id)
+    assert message["projectId"] == str(project.id)
+    assert all(not item["isRead"] for item in data)
+
+
+def test_notifications_pagination_and_read_state(client, db_session):
+    """Лента листается курсором, отметка прочтения сохраняется"""
+    project = _add_project(db_session, ProjectStatus.AVAILABLE, 1000000.0)
+    base_time = datetime.utcnow()
+    for i in range(5):
+        db_session.add(Notification(
+            id=uuid4(),
+            type=NotificationType.NEW_MESSAGE,
+            title="Новое сообщение",
+            message=f"Сообщение {i}",
+            project_id=project.id,
+            created_at=base_time + timedelta(minutes=i)
+        ))
+    db_session.commit()
+
+    response = client.get("/api/v1/admin/notifications", params={"limit": 3})
+    first_page = response.json()
+    assert [item["message"] for item in first_page] == ["Сообщение 4", "Сообщение 3", "Сообщение 2"]
+
+    response = client.get(
+        "/api/v1/admin/notifications",
+        params={"limit": 3, "cursor": response.headers["X-Next-Cursor"]}
+    )
+    assert [item["message"] for item in response.json()] == ["Сообщение 1", "Сообщение 0"]
+    assert "X-Next-Cursor" not in response.headers
+
+    response = client.post(f"/api/v1/admin/notifications/{first_page[0]['id']}/read")
+    assert response.status_code == 204
+    unread = client.get("/api/v1/admin/notifications", params={"unread_only": True}).json()
+    assert len(unread) == 4
+    assert first_page[0]["id"] not in [item["id"] for item in unread]
+
+    response = client.post(f"/api/v1/admin/notifications/{uuid4()}/read")
+    assert response.status_code == 404
+
+
+def test_batch_approve_requests(client, db_session):
+    """Массовое одобрение создает недостающие площадки и чаты, существующие не дублирует"""
+    first = _add_project(db_session, ProjectStatus.REQUESTED, 1000000.0)
+    second = _add_project(db_session, ProjectStatus.REQUESTED, 2000000.0)
+    db_session.add_all([
+        ConstructionSite(id=uuid4(), project_id=first.id),
+        Chat(id=uuid4(), project_id=second.id, specialist_name="Специалист"),
+        ProjectStage(id=uuid4(), project_id=second.id, name="Фундамент"),
+    ])
+    db_session.commit()
+
+    response = client.post(
+        "/api/v1/admin/projects/batch-approve",
+        json={"ids": [str(first.id), str(second.id), str(second.id)]}
+    )
+    assert response.status_code == 200
+    data = {item["id"]: item for item in response.json()}
+    assert set(data) == {str(first.id), str(second.id)}
+    assert all(item["status"] == "construction" and item["object_id"] for item in data.values())
+    assert [stage["name"] for stage in data[str(second.id)]["stages"]] == ["Фундамент"]
+
+    for project in (first, second):
+        assert db_session.query(ConstructionSite).filter_by(project_id=project.id).count() == 1
+        assert db_session.query(Chat).filter_by(project_id=project.id).count() == 1
+
+
+def test_single_active_chat_per_project(db_session):
+    """У проекта может быть только один активный чат, неактивных - сколько угодно"""
+    project = _add_project(db_session, ProjectStatus.CONSTRUCTION, 1000000.0)
+    db_session.add_all([
+        Chat(id=uuid4(), project_id=project.id, specialist_name="Специалист", is_active=False),
+        Chat(id=uuid4(), project_id=project.id, specialist_name="Специалист", is_active=False),
+        Chat(id=uuid4(), project_id=project.id, specialist_name="Специалист"),
+    ])
+    db_session.commit()
+
+    db_session.add(Chat(id=uuid4(), project_id=project.id, specialist_name="Специалист"))
+    with pytest.raises(IntegrityError):
+        db_session.commit()
+    db_session.rollback()
+
+
+def test_batch_approve_rejects_whole_batch(client, db_session):
+    """Если хотя бы один проект не в статусе REQUESTED, пакет не применяется"""
+    requested = _add_project(db_session, ProjectStatus.REQUESTED, 1000000.0)
+    available = _add_project(db_session, ProjectStatus.AVAILABLE, 1000000.0)
+
+    response = client.post(
+        "/api/v1/admin/projects/batch-approve",
+        json={"ids": [str(requested.id), str(available.id)]}
+    )
+    assert response.status_code == 400
+    db_session.expire_all()
+    assert db_session.get(Project, requested.id).status == ProjectStatus.REQUESTED
+    assert db_session.query(ConstructionSite).count() == 0
+
+
+def test_batch_approve_query_count_is_constant(client, db_session):
+    """Число запросов массового одобрения не зависит от размера пакета (1-1000)"""
+    counts = {}
+    for size in (1, 10, 100, 1000):
+        projects = [
+            Project(
+                id=uuid4(),
+                name=f"Проект {i}",
+                address="Москва",
+                area=100.0,
+                floors=2,
+                price=1000000.0,
+                status=ProjectStatus.REQUESTED
+            )
+            for i in range(size)
+        ]
+        db_session.add_all(projects)
+        db_session.commit()
+
+        response = client.post(
+            "/api/v1/admin/projects/batch-approve",
+            json={"ids": [str(project.id) for project in projects]}
+        )
+        assert response.status_code == 200
+        assert len(response.json()) == size
+        counts[size] = assert_query_budget(response, 5).statements
+
+    assert len(set(counts.values())) == 1
+
+
+def test_batch_moderate_documents(client, db_session):
+    """Пакет документов рассматривается одним UPDATE; повторное рассмотрение отклоняется целиком"""
+    project = _add_project(
+        db_session,
+        ProjectStatus.AVAILABLE,
+        1000000.0,
+        [DocumentStatus.PENDING] * 1000 + [DocumentStatus.APPROVED]
+    )
+    # Порядок документов после перезагрузки связи не определен: отбираем по статусу
+    pending = [document.id for document in project.documents if document.status == DocumentStatus.PENDING]
+
+    response = client.post(
+        "/api/v1/admin/documents/batch-approve",
+        json={"ids": [str(document_id) for document_id in pending[:600]]}
+    )
+    assert response.status_code == 204
+    assert_query_budget(response, 1)
+
+    response = client.post(
+        "/api/v1/admin/documents/batch-reject",
+        json={"ids": [str(document_id) for document_id in pending[599:]], "reason": "Нет подписи"}
+    )
+    assert response.status_code == 400
+
+    response = client.post(
+        "/api/v1/admin/documents/batch-reject",
+        json={"ids": [str(document_id) for document_id in pending[600:]], "reason": "Нет подписи"}
+    )
+    assert response.status_code == 204
+
+    db_session.expire_all()
+    documents = {document.id: document for document in db_session.query(Document)}
+    assert all(
+        documents[document_id].status == DocumentStatus.APPROVED and documents[document_id].approved_at
+        for document_id in pending[:600]
+    )
+    assert all(
+        documents[document_id].status == DocumentStatus.REJECTED
+        and documents[document_id].rejection_reason == "Нет подписи"
+        for document_id in pending[600:]
+    )
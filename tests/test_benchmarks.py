@@ -0,0 +1,119 @@
+"""
+Бенчмарки сериализации больших списков (по умолчанию пропускаются).
+
+Запуск: python -m pytest tests/test_benchmarks.py --benchmark -s
+
+Сравнивается процессорное время прежнего пути (схема с Python-валидатором
+на каждом поле, model_dump и json.dumps, как JSONResponse) и текущего
+(заранее созданный TypeAdapter / столбцы + orjson) на 10 000 строк.
+Байты ответов проверяют обычные тесты, здесь - только время.
+"""
+import asyncio
+import json
+import time
+from enum import Enum
+from typing import Any, List
+
+import pytest
+from pydantic import field_validator
+from sqlalchemy import select
+
+from app.api.v1.endpoints.chats import _MESSAGE_COLUMNS
+from app.api.v1.endpoints.projects import _projects_adapter
+from app.core.responses import RowsResponse
+from app.models.chat import Message
+from app.models.project import Project, project_select
+from app.schemas.chat import MessageResponse
+from app.schemas.project import ProjectResponse
+from tests.conftest import TestingAsyncSessionLocal
+from tests.test_chats import _add_messages
+from tests.test_projects import _add_projects_with_relations
+from tests.test_schemas import _WildcardStage
+
+pytestmark = pytest.mark.benchmark
+
+ROWS = 10_000
+# Текущий путь должен быть заметно быстрее прежнего, а не на уровне шума
+MARGIN = 0.8
+
+
+class _WildcardProject(ProjectResponse):
+    """Прежняя схема проекта: строковый статус и валидатор на каждом поле"""
+    status: str = "available"
+    stages: List[_WildcardStage] = []
+
+    @field_validator('*', mode='before')
+    @classmethod
+    def convert_enum_to_value(cls, v: Any) -> Any:
+        if isinstance(v, Enum):
+            return v.value
+        return v
+
+
+class _WildcardMessage(MessageResponse):
+    """Прежняя схема сообщения: валидатор на каждом поле"""
+
+    @field_validator('*', mode='before')
+    @classmethod
+    def convert_enum_to_value(cls, v: Any) -> Any:
+        if isinstance(v, Enum):
+            return v.value
+        return v
+
+
+def _legacy_body(schema, rows) -> bytes:
+    """Прежний путь: модель на каждую строку, model_dump и json.dumps (JSONResponse.render)"""
+    content = [schema.model_validate(row).model_dump(mode="json", by_alias=True) for row in rows]
+    return json.dumps(content, ensure_ascii=False, allow_nan=False, separators=(",", ":")).encode()
+
+
+def _cpu_time(path) -> float:
+    """Лучшее из пяти процессорное время пути"""
+    timings = []
+    for _ in range(5):
+        begin = time.process_time()
+        path()
+        timings.append(time.process_time() - begin)
+    return min(timings)
+
+
+def _report(name: str, legacy: float, current: float) -> None:
+    print(f"\n{name}, {ROWS} rows: legacy {legacy * 1000:.0f} ms CPU, current {current * 1000:.0f} ms CPU")
+    assert current < legacy * MARGIN
+
+
+def test_projects_serialization_benchmark(db_session):
+    """GET /projects: сериализация загруженных проектов"""
+    _add_projects_with_relations(db_session, ROWS)
+
+    async def load():
+        async with TestingAsyncSessionLocal() as db:
+            return (await db.execute(project_select().order_by(Project.created_at.desc()))).scalars().all()
+
+    projects = asyncio.run(load())
+    legacy = _cpu_time(lambda: _legacy_body(_WildcardProject, projects))
+    current = _cpu_time(
+        lambda: _projects_adapter.dump_json(
+            _projects_adapter.validate_python(projects, from_attributes=True), by_alias=True
+        )
+    )
+    _report("GET /projects", legacy, current)
+
+
+def test_messages_serialization_benchmark(db_session):
+    """GET /chats/{id}/messages: выборка и сериализация сообщений"""
+    chat = _add_messages(db_session, ROWS)
+
+    async def legacy_path():
+        async with TestingAsyncSessionLocal() as db:
+            rows = (await db.execute(select(Message).where(Message.chat_id == chat.id))).scalars().all()
+            return _legacy_body(_WildcardMessage, rows)
+
+    async def rows_path():
+        async with TestingAsyncSessionLocal() as db:
+            rows = (await db.execute(select(*_MESSAGE_COLUMNS).where(Message.chat_id == chat.id))).mappings().all()
+            return RowsResponse(rows).body
+
+    legacy = _cpu_time(lambda: asyncio.run(legacy_path()))
+    current = _cpu_time(lambda: asyncio.run(rows_path()))
+    _report("GET /chats/{id}/messages", legacy, current)
@@ -0,0 +1,245 @@
+import asyncio
+import json
+import threading
+from datetime import datetime, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from uuid import uuid4
+
+import pytest
+
+from app.core.broadcast import BATCH_PATH, BroadcastDispatcher, BroadcastUnavailable, broadcast_dispatcher
+from app.core.outbox import OutboxRelay
+from app.models.chat import Chat
+from app.models.outbox import BroadcastOutbox
+from app.models.project import Project
+from tests.conftest import TestingAsyncSessionLocal
+
+
+class StubBroadcastServer:
+    """Локальная заглушка MessageBroadcastController: запоминает пакеты"""
+
+    def __init__(self, fail_first: int = 0):
+        self.batches = []
+        self.paths = []
+        self.fail_first = fail_first
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                body = self.rfile.read(int(self.headers["Content-Length"]))
+                stub.paths.append(self.path)
+                if stub.fail_first > 0:
+                    stub.fail_first -= 1
+                    self.send_response(503)
+                else:
+                    stub.batches.append(json.loads(body))
+                    self.send_response(200)
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.url = f"http://127.0.0.1:{self.server.server_port}"
+
+    def __enter__(self):
+        threading.Thread(target=self.server.serve_forever, args=(0.05,), daemon=True).start()
+        return self
+
+    def __exit__(self, *exc):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+def _payload():
+    return {"messageId": str(uuid4()), "chatId": str(uuid4()), "text": "Привет"}
+
+
+def _deliver(dispatcher, payloads):
+    async def run():
+        await dispatcher.start()
+        try:
+            return await dispatcher.deliver(payloads)
+        finally:
+            await dispatcher.stop()
+
+    return asyncio.run(run())
+
+
+def test_batch_delivered_through_pool():
+    """Пакет уходит одним POST, метрики считают сообщения и пакеты"""
+    payloads = [_payload() for _ in range(3)]
+    with StubBroadcastServer() as stub:
+        dispatcher = BroadcastDispatcher(stub.url)
+        assert _deliver(dispatcher, payloads) is True
+
+    assert stub.paths == [BATCH_PATH]
+    assert stub.batches == [payloads]
+    metrics = dispatcher.snapshot()
+    assert (metrics["sent"], metrics["batches"], metrics["failed"]) == (3, 1, 0)
+
+
+def test_retry_with_backoff():
+    """Ошибки 5xx повторяются, пакет доставляется после восстановления"""
+    with StubBroadcastServer(fail_first=2) as stub:
+        dispatcher = BroadcastDispatcher(stub.url, retry_backoff=0.01)
+        assert _deliver(dispatcher, [_payload()]) is True
+
+    assert len(stub.batches) == 1
+    assert dispatcher.metrics.retries == 2
+    assert dispatcher.metrics.sent == 1
+
+
+def test_failed_after_retries():
+    """После исчерпания повторов сообщения считаются неотправленными"""
+    with StubBroadcastServer(fail_first=10) as stub:
+        dispatcher = BroadcastDispatcher(stub.url, max_retries=1, retry_backoff=0.01)
+        with pytest.raises(BroadcastUnavailable):
+            _deliver(dispatcher, [_payload(), _payload()])
+
+    assert stub.batches == []
+    assert dispatcher.metrics.failed == 2
+    assert dispatcher.metrics.sent == 0
+
+
+def test_disabled_without_url():
+    """Без URL сервиса диспетчер не открывает пул соединений"""
+    dispatcher = BroadcastDispatcher("")
+    asyncio.run(dispatcher.start())
+    assert not dispatcher.running
+
+
+@pytest.fixture
+def broadcast_enabled(monkeypatch):
+    """Трансляция включена: эндпоинт пишет строки outbox (сам релей в тестах не запущен)"""
+    monkeypatch.setattr(broadcast_dispatcher, "base_url", "http://websocket:8080")
+
+
+def _post_messages(client, db_session, count):
+    project = Project(id=uuid4(), name="Проект", address="Москва", area=100.0, floors=2, price=1000000.0)
+    chat = Chat(id=uuid4(), project_id=project.id, specialist_name="Специалист")
+    db_session.add_all([project, chat])
+    db_session.commit()
+    return [
+        client.post(f"/api/v1/chats/{chat.id}/messages", json={"text": f"Сообщение {i}"}).json()["id"]
+        for i in range(count)
+    ]
+
+
+def _drain(relay):
+    async def run():
+        await relay.dispatcher.start()
+        try:
+            return await relay.drain()
+        finally:
+            await relay.dispatcher.stop()
+
+    return asyncio.run(run())
+
+
+def test_outbox_skipped_when_broadcast_disabled(client, db_session):
+    """Без WebSocket сервиса строки outbox не пишутся: их некому доставить"""
+    _post_messages(client, db_session, 2)
+    assert db_session.query(BroadcastOutbox).count() == 0
+
+
+def test_outbox_written_with_message_and_relayed(client, db_session, broadcast_enabled):
+    """Сообщение попадает в outbox в той же транзакции, релей доставляет и удаляет строки"""
+    message_ids = _post_messages(client, db_session, 3)
+    assert sorted(str(row.message_id) for row in db_session.query(BroadcastOutbox)) == sorted(message_ids)
+
+    with StubBroadcastServer() as stub:
+        relay = OutboxRelay(TestingAsyncSessionLocal, BroadcastDispatcher(stub.url))
+        assert _drain(relay) == 3
+
+    assert [item["messageId"] for batch in stub.batches for item in batch] == message_ids
+    db_session.expire_all()
+    assert db_session.query(BroadcastOutbox).count() == 0
+
+
+def test_outbox_kept_while_service_unavailable(client, db_session, broadcast_enabled):
+    """Пока WebSocket сервис недоступен, строки outbox сохраняются для повтора"""
+    message_ids = _post_messages(client, db_session, 2)
+
+    with StubBroadcastServer(fail_first=100) as stub:
+        relay = OutboxRelay(
+            TestingAsyncSessionLocal,
+            BroadcastDispatcher(stub.url, max_retries=1, retry_backoff=0.01)
+        )
+        with pytest.raises(BroadcastUnavailable):
+            _drain(relay)
+
+    rows = db_session.query(BroadcastOutbox).all()
+    assert len(rows) == 2
+    assert all(row.attempts == 1 and row.locked_until > datetime.utcnow() for row in rows)
+
+    with StubBroadcastServer() as stub:
+        relay = OutboxRelay(TestingAsyncSessionLocal, BroadcastDispatcher(stub.url))
+        # Пакет отложен на время задержки повтора
+        assert _drain(relay) == 0
+        db_session.query(BroadcastOutbox).update({"locked_until": None})
+        db_session.commit()
+        assert _drain(relay) == 2
+
+    assert [item["messageId"] for batch in stub.batches for item in batch] == message_ids
+
+
+def test_outbox_batch_leased_during_delivery(client, db_session, broadcast_enabled):
+    """Пакет отправляется вне транзакции; арендованные строки не берет второй релей"""
+    message_ids = _post_messages(client, db_session, 2)
+    claimed = []
+
+    class ConcurrentDispatcher(BroadcastDispatcher):
+        async def deliver(self, payloads, waited=0.0):
+            # Во время отправки строки не заблокированы, но арендованы
+            claimed.append(await OutboxRelay(TestingAsyncSessionLocal, self)._claim())
+            return await super().deliver(payloads, waited=waited)
+
+    with StubBroadcastServer() as stub:
+        relay = OutboxRelay(TestingAsyncSessionLocal, ConcurrentDispatcher(stub.url))
+        assert _drain(relay) == 2
+
+    assert claimed == [[]]
+    assert [item["messageId"] for batch in stub.batches for item in batch] == message_ids
+    assert db_session.query(BroadcastOutbox).count() == 0
+
+
+def test_outbox_expired_lease_reclaimed(client, db_session, broadcast_enabled):
+    """Строки упавшего посреди отправки релея снова доставляются после истечения аренды"""
+    message_ids = _post_messages(client, db_session, 2)
+    db_session.query(BroadcastOutbox).update({"locked_until": datetime.utcnow() + timedelta(minutes=1)})
+    db_session.commit()
+
+    with StubBroadcastServer() as stub:
+        relay = OutboxRelay(TestingAsyncSessionLocal, BroadcastDispatcher(stub.url))
+        assert _drain(relay) == 0
+
+        db_session.query(BroadcastOutbox).update({"locked_until": datetime.utcnow() - timedelta(seconds=1)})
+        db_session.commit()
+        assert _drain(relay) == 2
+
+    assert [item["messageId"] for batch in stub.batches for item in batch] == message_ids
+
+
+def test_outbox_retry_backoff_and_attempts_limit(client, db_session, broadcast_enabled, caplog):
+    """Задержка повтора растет с attempts до предела, после max_attempts строки удаляются"""
+    relay = OutboxRelay(TestingAsyncSessionLocal, BroadcastDispatcher(""), retry_backoff=1.0, max_backoff=5.0)
+    assert [relay.backoff(attempts) for attempts in (1, 2, 3, 4, 10)] == [1.0, 2.0, 4.0, 5.0, 5.0]
+
+    _post_messages(client, db_session, 2)
+    db_session.query(BroadcastOutbox).update({"attempts": 2})
+    db_session.commit()
+
+    with StubBroadcastServer(fail_first=100) as stub:
+        relay = OutboxRelay(
+            TestingAsyncSessionLocal,
+            BroadcastDispatcher(stub.url, max_retries=1, retry_backoff=0.01),
+            max_attempts=3,
+        )
+        with pytest.raises(BroadcastUnavailable):
+            _drain(relay)
+
+    db_session.expire_all()
+    assert db_session.query(BroadcastOutbox).count() == 0
+    assert "after 3 failed attempts" in caplog.text
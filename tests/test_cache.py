@@ -0,0 +1,198 @@
+import asyncio
+import json
+import time
+from uuid import uuid4
+
+from app.core.cache import (
+    ALL_TAG,
+    CACHE_INVALIDATION_CHANNEL,
+    INSTANCE_ID,
+    CachedResponse,
+    MemoryCacheBackend,
+    RedisCacheBackend,
+    apply_remote_invalidation,
+    invalidation_payload,
+    response_cache,
+)
+from app.models.construction_site import ConstructionSite
+from app.models.project import Project, ProjectStage, StageStatus
+from tests.conftest import assert_query_budget
+
+
+class FakeRedis:
+    """Локальная замена redis.asyncio: только используемые кэшем команды"""
+
+    def __init__(self):
+        self.values = {}
+        self.sets = {}
+
+    async def get(self, key):
+        entry = self.values.get(key)
+        if entry is None or entry[1] <= time.monotonic():
+            return None
+        return entry[0].encode()
+
+    async def set(self, key, value, px):
+        self.values[key] = (value, time.monotonic() + px / 1000)
+
+    async def sadd(self, key, member):
+        self.sets.setdefault(key, set()).add(member.encode())
+
+    async def pexpire(self, key, ttl):
+        pass
+
+    async def smembers(self, key):
+        return set(self.sets.get(key, ()))
+
+    async def delete(self, *keys):
+        for key in keys:
+            key = key.decode() if isinstance(key, bytes) else key
+            self.values.pop(key, None)
+            self.sets.pop(key, None)
+
+    async def aclose(self):
+        pass
+
+
+def _entry(body: str) -> CachedResponse:
+    return CachedResponse(body=body.encode(), headers={"ETag": f'W/"{body}"'})
+
+
+def test_memory_backend_lru_ttl_and_tags():
+    """LRU вытесняет давно не читанные записи, TTL и теги сбрасывают записи"""
+    backend = MemoryCacheBackend(max_entries=2)
+
+    async def run():
+        await backend.set("a", _entry("a"), {"projects:1"}, ttl=60)
+        await backend.set("b", _entry("b"), {"projects:2"}, ttl=60)
+        assert await backend.get("a") is not None
+        await backend.set("c", _entry("c"), {"projects:1"}, ttl=60)
+        # "b" читали раньше всех - вытеснена
+        assert await backend.get("b") is None
+        await backend.invalidate({"projects:1"})
+        assert await backend.get("a") is None and await backend.get("c") is None
+
+        await backend.set("d", _entry("d"), set(), ttl=0.01)
+        await asyncio.sleep(0.02)
+        assert await backend.get("d") is None
+
+    asyncio.run(run())
+    assert len(backend) == 0
+
+
+def test_redis_backend_with_stand_in():
+    """Redis бэкенд: записи с TTL и сброс по тегам через множества ключей"""
+    client = FakeRedis()
+    backend = RedisCacheBackend(client)
+
+    async def run():
+        await backend.set("/projects?", _entry("list"), {"*", "projects"}, ttl=60)
+        await backend.set("/projects/1?", _entry("one"), {"*", "projects:1"}, ttl=60)
+        assert (await backend.get("/projects?")).body == b"list"
+        await backend.invalidate({"projects"})
+        assert await backend.get("/projects?") is None
+        assert (await backend.get("/projects/1?")).headers == {"ETag": 'W/"one"'}
+        await backend.invalidate({"*"})
+        assert await backend.get("/projects/1?") is None
+
+    asyncio.run(run())
+
+
+def _add_project(db_session):
+    project = Project(id=uuid4(), name="Проект", address="Москва", area=100.0, floors=2, price=1000000.0)
+    project.stages = [ProjectStage(id=uuid4(), name="Фундамент", status=StageStatus.PENDING)]
+    project.construction_site = ConstructionSite(id=uuid4())
+    db_session.add(project)
+    db_session.commit()
+    return project
+
+
+def test_project_served_from_cache_until_changed(client, db_session):
+    """Повторное чтение проекта не обращается к БД; изменение этапа через админку сбрасывает запись"""
+    project = _add_project(db_session)
+    other = _add_project(db_session)
+    url = f"/api/v1/projects/{project.id}"
+    first = client.get(url).json()
+
+    response = client.get(url)
+    assert response.json() == first
+    assert_query_budget(response, 0)
+
+    # Изменение другого проекта запись не трогает
+    response = client.put(f"/api/v1/admin/projects/{other.id}", json={"name": "Другой"})
+    assert response.status_code == 200
+    assert_query_budget(client.get(url), 0)
+
+    response = client.put(
+        f"/api/v1/admin/projects/{project.id}/stages/{project.stages[0].id}",
+        json={"status": "completed"}
+    )
+    assert response.status_code == 200
+    assert client.get(url).json()["stages"][0]["status"] == "completed"
+
+    # Условный UPDATE перехода статуса сбрасывает запись проекта
+    client.post(f"/api/v1/projects/{project.id}/request")
+    assert client.get(url).json()["status"] == "requested"
+
+
+def test_list_and_site_invalidated_by_inserts(client, db_session):
+    """Новый проект сбрасывает кэш списка, новая камера - кэш площадки"""
+    project = _add_project(db_session)
+    assert len(client.get("/api/v1/projects").json()) == 1
+    _add_project(db_session)
+    assert len(client.get("/api/v1/projects").json()) == 2
+
+    url = f"/api/v1/construction-sites/project/{project.id}"
+    assert client.get(url).json()["cameras"] == []
+    response = client.post(
+        f"/api/v1/admin/construction-sites/{project.construction_site.id}/cameras",
+        json={"name": "Камера 1", "stream_url": "rtsp://camera/1"}
+    )
+    assert response.status_code == 201
+    assert [camera["name"] for camera in client.get(url).json()["cameras"]] == ["Камера 1"]
+
+
+
+def test_invalidation_from_other_worker(client, db_session):
+    """NOTIFY другого воркера сбрасывает запись, собственный - пропускается"""
+    project = _add_project(db_session)
+    url = f"/api/v1/projects/{project.id}"
+    client.get(url)
+
+    payload = invalidation_payload({f"projects:{project.id}"})
+    asyncio.run(apply_remote_invalidation(payload))
+    assert_query_budget(client.get(url), 0)
+
+    asyncio.run(apply_remote_invalidation(payload.replace(INSTANCE_ID, uuid4().hex, 1)))
+    response = client.get(url)
+    assert response.status_code == 200
+    assert assert_query_budget(response, 3).statements > 0
+
+
+def test_invalidation_payload_fits_notify():
+    """Набор тегов, не помещающийся в NOTIFY, заменяется сбросом всего кэша"""
+    tags = {f"projects:{uuid4()}" for _ in range(500)}
+    instance_id, body = invalidation_payload(tags).split(" ", 1)
+    assert (instance_id, json.loads(body)) == (INSTANCE_ID, [ALL_TAG])
+    assert json.loads(invalidation_payload({"projects"}).split(" ", 1)[1]) == ["projects"]
+
+
+def test_invalidation_notified_in_commit(db_session, monkeypatch):
+    """Теги несброшенных (без flush) изменений уходят NOTIFY в той же транзакции"""
+    project = _add_project(db_session)
+    monkeypatch.setattr(response_cache, "broadcast", True)
+    notified = []
+    # В SQLite нет pg_notify: подменяем функцией, запоминающей вызовы
+    db_session.connection().connection.driver_connection.create_function(
+        "pg_notify", 2, lambda channel, payload: notified.append((channel, payload))
+    )
+
+    project.name = "Новое имя"
+    db_session.commit()
+    assert [channel for channel, _ in notified] == [CACHE_INVALIDATION_CHANNEL]
+    assert notified[0][1] == invalidation_payload({f"projects:{project.id}"})
+
+    # Транзакция без изменений кэшируемых таблиц ничего не отправляет
+    db_session.connection()
+    db_session.commit()
+    assert len(notified) == 1
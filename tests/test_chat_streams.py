@@ -0,0 +1,177 @@
+import asyncio
+from uuid import uuid4
+
+import pytest
+from fastapi import WebSocketDisconnect
+
+from app.api.v1.endpoints.chats import _sse_events
+from app.core.pubsub import (
+    NOTIFY_PAYLOAD_LIMIT,
+    ChatHub,
+    PostgresChatListener,
+    chat_hub,
+    message_event,
+    notify_payload,
+    publish_message_event,
+)
+from app.models.chat import Chat, Message
+from app.models.project import Project
+from tests.conftest import TestingAsyncSessionLocal
+
+
+def _add_chat(db_session):
+    project = Project(id=uuid4(), name="Проект", address="Москва", area=100.0, floors=2, price=1000000.0)
+    chat = Chat(id=uuid4(), project_id=project.id, specialist_name="Специалист")
+    db_session.add_all([project, chat])
+    db_session.commit()
+    return chat.id
+
+
+def test_websocket_receives_new_messages(client, db_session):
+    """Сообщение, отправленное через REST, приходит подписчику WebSocket"""
+    chat_id = _add_chat(db_session)
+
+    with client.websocket_connect(f"/api/v1/chats/{chat_id}/ws") as websocket:
+        response = client.post(f"/api/v1/chats/{chat_id}/messages", json={"text": "Привет"})
+        assert response.status_code == 201
+        event = websocket.receive_json()
+
+    assert event == response.json()
+    assert event["chat_id"] == str(chat_id)
+    assert chat_hub.subscriber_count() == 0
+
+
+def test_websocket_unknown_chat(client, db_session):
+    """Подключение к несуществующему чату отклоняется"""
+    with pytest.raises(WebSocketDisconnect) as exc_info:
+        with client.websocket_connect(f"/api/v1/chats/{uuid4()}/ws"):
+            pass
+    assert exc_info.value.code == 1008
+
+
+def test_sse_unknown_chat(client, db_session):
+    """Поток SSE несуществующего чата - 404"""
+    response = client.get(f"/api/v1/chats/{uuid4()}/events")
+    assert response.status_code == 404
+
+
+def test_sse_events_format():
+    """SSE поток: событие message с JSON, heartbeat-комментарий, отписка при закрытии"""
+    chat_id = uuid4()
+
+    async def run():
+        events = _sse_events(chat_id, heartbeat=0.05)
+        assert await events.__anext__() == "retry: 3000\n\n"
+        chat_hub.publish(chat_id, '{"text": "Привет"}')
+        assert await events.__anext__() == 'event: message\ndata: {"text": "Привет"}\n\n'
+        assert await events.__anext__() == ": ping\n\n"
+        assert chat_hub.subscriber_count() == 1
+        await events.aclose()
+        assert chat_hub.subscriber_count() == 0
+
+    asyncio.run(run())
+
+
+def test_slow_subscriber_drops_oldest_events():
+    """Переполненная очередь подписчика теряет самые старые события, публикация не блокируется"""
+    hub = ChatHub(queue_size=2)
+    chat_id = uuid4()
+
+    async def run():
+        async with hub.subscribe(chat_id) as queue:
+            for i in range(5):
+                assert hub.publish(chat_id, str(i)) == 1
+            return [queue.get_nowait() for _ in range(queue.qsize())]
+
+    assert asyncio.run(run()) == ["3", "4"]
+    assert hub.dropped == 3
+
+
+def test_fanout_to_10k_subscribers():
+    """Каждое событие чата доходит до всех 10 000 подписчиков по порядку, без потерь"""
+    hub = ChatHub()
+    chat_id = uuid4()
+    subscribers = 10_000
+    messages = 10
+
+    async def subscriber(ready: asyncio.Event, started: list):
+        async with hub.subscribe(chat_id) as queue:
+            started.append(True)
+            if len(started) == subscribers:
+                ready.set()
+            return [await queue.get() for _ in range(messages)]
+
+    async def run():
+        ready = asyncio.Event()
+        started = []
+        tasks = [asyncio.create_task(subscriber(ready, started)) for _ in range(subscribers)]
+        await ready.wait()
+        delivered = [hub.publish(chat_id, str(i)) for i in range(messages)]
+        return delivered, await asyncio.gather(*tasks)
+
+    delivered, received = asyncio.run(run())
+    assert delivered == [subscribers] * messages
+    assert len(received) == subscribers
+    assert all(events == [str(i) for i in range(messages)] for events in received)
+    assert hub.dropped == 0
+    assert hub.subscriber_count() == 0
+
+
+def test_notify_payload_falls_back_to_message_id():
+    """Событие больше предела NOTIFY передается ссылкой на сообщение"""
+    message = Message(id=uuid4(), chat_id=uuid4(), text="Привет")
+    assert notify_payload(message, '{"text": "Привет"}') == f'{message.chat_id} {{"text": "Привет"}}'
+    event = '{"text": "%s"}' % ("я" * NOTIFY_PAYLOAD_LIMIT)
+    assert notify_payload(message, event) == f"{message.chat_id} {message.id}"
+
+
+def test_listener_dispatch(db_session):
+    """Слушатель раскладывает NOTIFY подписчикам процесса, длинные события догружает из БД"""
+    chat_id = _add_chat(db_session)
+    message = Message(id=uuid4(), chat_id=chat_id, text="Привет", is_from_specialist=False)
+    db_session.add(message)
+    db_session.commit()
+    hub = ChatHub()
+    listener = PostgresChatListener(hub, "postgresql+psycopg://user:secret@db/app", TestingAsyncSessionLocal)
+    assert listener.conninfo == "postgresql://user:secret@db/app"
+
+    async def run():
+        # Без подписчиков событие пропускается без обращения к БД
+        await listener.dispatch(f"{chat_id} {message.id}")
+        async with hub.subscribe(chat_id) as queue:
+            await listener.dispatch(f'{chat_id} {{"text": "Привет"}}')
+            await listener.dispatch(f"{chat_id} {message.id}")
+            await listener.dispatch("не-событие")
+            return [queue.get_nowait() for _ in range(queue.qsize())]
+
+    events = asyncio.run(run())
+    assert events[0] == '{"text": "Привет"}'
+    assert events[1] == message_event(message)
+    assert len(events) == 2
+
+
+def test_rolled_back_message_is_not_published(db_session):
+    """Событие уходит подписчикам только после commit, откат транзакции его отменяет"""
+    chat_id = _add_chat(db_session)
+
+    async def run():
+        async with chat_hub.subscribe(chat_id) as queue:
+            async with TestingAsyncSessionLocal() as db:
+                message = Message(id=uuid4(), chat_id=chat_id, text="Черновик")
+                db.add(message)
+                await db.flush()
+                await publish_message_event(db, message)
+                await db.rollback()
+                assert queue.empty()
+
+                message = Message(id=uuid4(), chat_id=chat_id, text="Привет")
+                db.add(message)
+                await db.flush()
+                await publish_message_event(db, message)
+                assert queue.empty()
+                await db.commit()
+            return [queue.get_nowait() for _ in range(queue.qsize())]
+
+    events = asyncio.run(run())
+    assert len(events) == 1
+    assert '"Привет"' in events[0]
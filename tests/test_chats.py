@@ -1,8 +1,17 @@
+import asyncio
 import pytest
-from uuid import uuid4
-from datetime import datetime
+from typing import List
+from uuid import UUID, uuid4
+from datetime import datetime, timedelta
+from pydantic import TypeAdapter
+from sqlalchemy import select
+from app.api.v1.endpoints.chats import _MESSAGE_COLUMNS
+from app.core.responses import RowsResponse
 from app.models.project import Project
 from app.models.chat import Chat, Message
+from app.schemas.chat import ChatResponse, MessageResponse
+from app.scripts.rebuild_chat_summaries import rebuild_chat_summaries
+from tests.conftest import TestingAsyncSessionLocal, assert_query_budget
 
 
 def test_get_chats_empty(client):
@@ -196,3 +205,291 @@ def test_mark_messages_as_read(client, db_session):
     db_session.refresh(message)
     assert message.is_read == True
 
+
+
+def test_get_chats_cursor_pagination(client, db_session):
+    """Тест курсорной пагинации списка чатов"""
+    now = datetime.utcnow()
+    chats = []
+    for i in range(4):
+        # У проекта не больше одного активного чата
+        project = Project(
+            id=uuid4(),
+            name=f"Тестовый проект {i}",
+            address="Москва, ул. Тестовая, 1",
+            area=100.5,
+            floors=2,
+            price=5000000.0
+        )
+        db_session.add(project)
+        chat = Chat(
+            id=uuid4(),
+            project_id=project.id,
+            specialist_name=f"Специалист {i}",
+            is_active=True
+        )
+        db_session.add(chat)
+        chats.append(chat)
+    # Последний чат остается без сообщений
+    for i, chat in enumerate(chats[:3]):
+        for minutes in (10, i):
+            db_session.add(Message(
+                id=uuid4(),
+                chat_id=chat.id,
+                text=f"Сообщение {i}-{minutes}",
+                sent_at=now - timedelta(minutes=minutes),
+                is_from_specialist=True,
+                is_read=False
+            ))
+    db_session.commit()
+    rebuild_chat_summaries(db_session)
+    
+    response = client.get("/api/v1/chats", params={"limit": 2})
+    assert response.status_code == 200
+    first_page = response.json()
+    assert [c["id"] for c in first_page] == [str(chats[0].id), str(chats[1].id)]
+    assert first_page[0]["last_message"] == "Сообщение 0-0"
+    assert first_page[0]["unread_count"] == 2
+    cursor = response.headers["X-Next-Cursor"]
+    
+    response = client.get("/api/v1/chats", params={"limit": 2, "cursor": cursor})
+    assert response.status_code == 200
+    second_page = response.json()
+    assert [c["id"] for c in second_page] == [str(chats[2].id), str(chats[3].id)]
+    assert second_page[1]["last_message"] is None
+    assert second_page[1]["unread_count"] == 0
+    assert "X-Next-Cursor" not in response.headers
+
+
+def test_get_chats_invalid_cursor(client):
+    """Тест некорректного курсора"""
+    response = client.get("/api/v1/chats", params={"cursor": "not-a-cursor"})
+    assert response.status_code == 400
+
+
+def test_chat_summary_maintained_on_write(client, db_session):
+    """Тест обновления сводки чата при отправке и прочтении сообщений"""
+    project_id = uuid4()
+    project = Project(
+        id=project_id,
+        name="Тестовый проект",
+        address="Москва, ул. Тестовая, 1",
+        area=100.5,
+        floors=2,
+        price=5000000.0
+    )
+    db_session.add(project)
+    
+    chat_id = uuid4()
+    chat = Chat(
+        id=chat_id,
+        project_id=project_id,
+        specialist_name="Тест",
+        is_active=True
+    )
+    db_session.add(chat)
+    db_session.commit()
+    
+    for text in ("Первое", "Второе"):
+        response = client.post(
+            f"/api/v1/chats/{chat_id}/messages",
+            json={"text": text, "from_specialist": True}
+        )
+        assert response.status_code == 201
+    client.post(f"/api/v1/chats/{chat_id}/messages", json={"text": "Ответ"})
+    
+    data = client.get(f"/api/v1/chats/{chat_id}").json()
+    assert data["last_message"] == "Ответ"
+    assert data["last_message_at"] is not None
+    assert data["unread_count"] == 2
+    
+    response = client.post(f"/api/v1/chats/{chat_id}/messages/read")
+    assert response.status_code == 204
+    data = client.get(f"/api/v1/chats/{chat_id}").json()
+    assert data["unread_count"] == 0
+    assert data["last_message"] == "Ответ"
+
+
+def test_rebuild_chat_summaries(db_session):
+    """Тест пересчета сводки чатов по таблице сообщений"""
+    project_id = uuid4()
+    project = Project(
+        id=project_id,
+        name="Тестовый проект",
+        address="Москва, ул. Тестовая, 1",
+        area=100.5,
+        floors=2,
+        price=5000000.0
+    )
+    db_session.add(project)
+    
+    chat = Chat(
+        id=uuid4(),
+        project_id=project_id,
+        specialist_name="Тест",
+        is_active=True,
+        last_message="Устаревшее",
+        unread_count=10
+    )
+    db_session.add(chat)
+    now = datetime.utcnow()
+    db_session.add(Message(
+        id=uuid4(),
+        chat_id=chat.id,
+        text="Старое",
+        sent_at=now - timedelta(hours=1),
+        is_from_specialist=True,
+        is_read=False
+    ))
+    db_session.add(Message(
+        id=uuid4(),
+        chat_id=chat.id,
+        text="Новое",
+        sent_at=now,
+        is_from_specialist=False,
+        is_read=False
+    ))
+    db_session.commit()
+    
+    assert rebuild_chat_summaries(db_session) == 1
+    db_session.refresh(chat)
+    assert chat.last_message == "Новое"
+    assert chat.last_message_at == now
+    assert chat.unread_count == 1
+
+
+def test_get_messages_keyset_pagination(client, db_session):
+    """Тест постраничной загрузки истории и получения новых сообщений"""
+    project_id = uuid4()
+    project = Project(
+        id=project_id,
+        name="Тестовый проект",
+        address="Москва, ул. Тестовая, 1",
+        area=100.5,
+        floors=2,
+        price=5000000.0
+    )
+    db_session.add(project)
+    
+    chat_id = uuid4()
+    chat = Chat(
+        id=chat_id,
+        project_id=project_id,
+        specialist_name="Тест",
+        is_active=True
+    )
+    db_session.add(chat)
+    
+    start = datetime.utcnow() - timedelta(hours=1)
+    for i in range(5):
+        db_session.add(Message(
+            id=uuid4(),
+            chat_id=chat_id,
+            text=f"Сообщение {i}",
+            sent_at=start + timedelta(minutes=i),
+            is_from_specialist=False,
+            is_read=False
+        ))
+    db_session.commit()
+    
+    # Последняя страница истории
+    response = client.get(f"/api/v1/chats/{chat_id}/messages", params={"limit": 2})
+    assert response.status_code == 200
+    assert [m["text"] for m in response.json()] == ["Сообщение 3", "Сообщение 4"]
+    after_cursor = response.headers["X-After-Cursor"]
+    
+    # Подгрузка более старых сообщений
+    response = client.get(
+        f"/api/v1/chats/{chat_id}/messages",
+        params={"limit": 2, "before": response.headers["X-Before-Cursor"]}
+    )
+    assert [m["text"] for m in response.json()] == ["Сообщение 1", "Сообщение 2"]
+    response = client.get(
+        f"/api/v1/chats/{chat_id}/messages",
+        params={"limit": 2, "before": response.headers["X-Before-Cursor"]}
+    )
+    assert [m["text"] for m in response.json()] == ["Сообщение 0"]
+    assert "X-Before-Cursor" not in response.headers
+    
+    # Новых сообщений нет - курсор возвращается без изменений
+    response = client.get(f"/api/v1/chats/{chat_id}/messages", params={"after": after_cursor})
+    assert response.json() == []
+    assert response.headers["X-After-Cursor"] == after_cursor
+    
+    client.post(f"/api/v1/chats/{chat_id}/messages", json={"text": "Новое"})
+    response = client.get(f"/api/v1/chats/{chat_id}/messages", params={"after": after_cursor})
+    assert [m["text"] for m in response.json()] == ["Новое"]
+    
+    response = client.get(
+        f"/api/v1/chats/{chat_id}/messages",
+        params={"before": after_cursor, "after": after_cursor}
+    )
+    assert response.status_code == 400
+
+
+def _add_messages(db_session, count):
+    project = Project(id=uuid4(), name="Проект", address="Москва", area=100.0, floors=2, price=1000000.0)
+    chat = Chat(id=uuid4(), project_id=project.id, specialist_name="Специалист")
+    base_time = datetime(2026, 10, 17, 12, 0, 0)
+    db_session.add_all([project, chat])
+    db_session.add_all([
+        Message(
+            id=uuid4(),
+            chat_id=chat.id,
+            text=f"Сообщение {i}",
+            # Каждое второе время - без микросекунд
+            sent_at=base_time + timedelta(seconds=i, microseconds=(i % 2) * 1234),
+            is_from_specialist=i % 3 == 0,
+            is_read=i % 2 == 0,
+        )
+        for i in range(count)
+    ])
+    db_session.commit()
+    return chat
+
+
+def test_rows_response_matches_schema_serialization(client, db_session):
+    """Строки через orjson дают тот же JSON, что и сериализация через схему"""
+    chat = _add_messages(db_session, 4)
+    other = Project(id=uuid4(), name="Проект", address="Москва", area=100.0, floors=2, price=1000000.0)
+    db_session.add_all([other, Chat(id=uuid4(), project_id=other.id, specialist_name="Без аватара")])
+    db_session.commit()
+
+    response = client.get(f"/api/v1/chats/{chat.id}/messages")
+    messages = db_session.query(Message).order_by(Message.sent_at).all()
+    expected = TypeAdapter(List[MessageResponse]).dump_json(
+        TypeAdapter(List[MessageResponse]).validate_python(messages, from_attributes=True),
+        by_alias=True,
+    )
+    assert response.content == expected
+
+    response = client.get("/api/v1/chats")
+    chats = {chat.id: chat for chat in db_session.query(Chat)}
+    assert response.json() == [
+        ChatResponse.model_validate(chats[UUID(item["id"])]).model_dump(mode="json", by_alias=True)
+        for item in response.json()
+    ]
+
+
+def test_messages_10k_rows_match_schema_serialization(client, db_session):
+    """10 000 сообщений: столбцы + orjson дают те же байты, что ORM + схема"""
+    chat = _add_messages(db_session, 10_000)
+    adapter = TypeAdapter(List[MessageResponse])
+
+    async def orm_body():
+        async with TestingAsyncSessionLocal() as db:
+            rows = (await db.execute(select(Message).where(Message.chat_id == chat.id))).scalars().all()
+            return adapter.dump_json(adapter.validate_python(rows, from_attributes=True), by_alias=True)
+
+    async def rows_body():
+        async with TestingAsyncSessionLocal() as db:
+            rows = (await db.execute(select(*_MESSAGE_COLUMNS).where(Message.chat_id == chat.id))).mappings().all()
+            return RowsResponse(rows).body
+
+    assert asyncio.run(rows_body()) == asyncio.run(orm_body())
+
+    # Страница истории: проверка доступа к чату и сообщения - два запроса
+    response = client.get(f"/api/v1/chats/{chat.id}/messages", params={"limit": 200})
+    assert response.status_code == 200
+    assert len(response.json()) == 200
+    assert_query_budget(response, 2)
@@ -0,0 +1,146 @@
+import asyncio
+import zlib
+from uuid import uuid4
+
+import pytest
+from starlette.responses import PlainTextResponse, StreamingResponse
+
+from app.core.compression import CompressionMiddleware, negotiate_encoding
+from app.models.chat import Chat, Message
+from app.models.construction_site import ConstructionSite
+from app.models.project import Project, ProjectStage, StageStatus
+
+
+def test_negotiate_encoding():
+    """Выбор кодировки по q-весам; при равных весах - по предпочтению сервера"""
+    available = ("br", "gzip")
+    assert negotiate_encoding("gzip, deflate, br", available) == "br"
+    assert negotiate_encoding("gzip;q=1.0, br;q=0.5", available) == "gzip"
+    assert negotiate_encoding("br;q=0, *", available) == "gzip"
+    assert negotiate_encoding("identity", available) is None
+    assert negotiate_encoding("gzip;q=0", available) is None
+    assert negotiate_encoding("", available) is None
+
+
+async def _call(app, accept_encoding: str):
+    """Вызывает ASGI приложение и возвращает отправленные сообщения"""
+    messages = []
+    scope = {
+        "type": "http", "method": "GET", "path": "/", "query_string": b"",
+        "headers": [(b"accept-encoding", accept_encoding.encode())],
+    }
+
+    requests = [{"type": "http.request", "body": b"", "more_body": False}]
+
+    async def receive():
+        if requests:
+            return requests.pop()
+        # Клиент не отключается: StreamingResponse ждет отключения до конца потока
+        await asyncio.Event().wait()
+
+    async def send(message):
+        messages.append(message)
+
+    await app(scope, receive, send)
+    return messages
+
+
+def _headers(start):
+    return {key.decode(): value.decode() for key, value in start["headers"]}
+
+
+def _vary(headers) -> list:
+    return [value.strip() for value in headers["vary"].split(",")]
+
+
+def test_minimum_size_and_excluded_types():
+    """Маленькие ответы и поток событий не сжимаются"""
+    middleware = CompressionMiddleware(PlainTextResponse("ok"), minimum_size=100)
+    start, body = asyncio.run(_call(middleware, "gzip"))
+    assert "content-encoding" not in _headers(start)
+    assert "Accept-Encoding" in _vary(_headers(start))
+    assert body["body"] == b"ok"
+
+    events = StreamingResponse(iter(["data: x\n\n" * 100]), media_type="text/event-stream")
+    start, *_ = asyncio.run(_call(CompressionMiddleware(events, minimum_size=100), "gzip"))
+    assert "content-encoding" not in _headers(start)
+
+
+def test_streaming_chunks_decode_incrementally():
+    """Каждая часть потокового ответа разжимается сразу после получения"""
+    chunks = [f"[{i}]".encode() * 200 for i in range(3)]
+    app = CompressionMiddleware(StreamingResponse(iter(chunks), media_type="application/json"), minimum_size=100)
+    start, *parts = asyncio.run(_call(app, "gzip"))
+    headers = _headers(start)
+    assert headers["content-encoding"] == "gzip"
+    assert "content-length" not in headers
+
+    decompressor = zlib.decompressobj(16 + zlib.MAX_WBITS)
+    decoded = [decompressor.decompress(part["body"]) for part in parts]
+    assert decoded[:len(chunks)] == chunks
+    assert decompressor.eof
+
+
+def _add_projects(db_session, count):
+    projects = []
+    for i in range(count):
+        project = Project(
+            id=uuid4(), name=f"Проект {i}", address=f"Москва, ул. Тестовая, {i}",
+            description="Двухэтажный дом из газобетона с террасой", area=120.5, floors=2, price=7500000.0,
+        )
+        project.stages = [
+            ProjectStage(id=uuid4(), name=f"Этап {n}", status=StageStatus.PENDING) for n in range(5)
+        ]
+        project.construction_site = ConstructionSite(id=uuid4())
+        projects.append(project)
+    db_session.add_all(projects)
+    chat = Chat(id=uuid4(), project_id=projects[0].id, specialist_name="Специалист")
+    db_session.add(chat)
+    db_session.add_all([
+        Message(id=uuid4(), chat_id=chat.id, text=f"Сообщение {i} о ходе работ", is_from_specialist=i % 2 == 0)
+        for i in range(count)
+    ])
+    db_session.commit()
+    return chat
+
+
+def test_large_responses_compressed(client, db_session):
+    """Большой список сжимается gzip, тело после распаковки не меняется"""
+    _add_projects(db_session, 20)
+    plain = client.get("/api/v1/projects", headers={"Accept-Encoding": "identity"})
+    assert "content-encoding" not in plain.headers
+
+    compressed = client.get("/api/v1/projects", headers={"Accept-Encoding": "gzip"})
+    assert compressed.headers["content-encoding"] == "gzip"
+    assert "Accept-Encoding" in _vary(compressed.headers)
+    assert compressed.content == plain.content
+    assert int(compressed.headers["content-length"]) < len(plain.content)
+    # Условные заголовки сохраняются
+    assert compressed.headers["etag"] == plain.headers["etag"]
+
+
+def test_brotli_response(client, db_session):
+    """brotli выбирается, если клиент его поддерживает"""
+    pytest.importorskip("brotli")
+    _add_projects(db_session, 20)
+    plain = client.get("/api/v1/projects", headers={"Accept-Encoding": "identity"})
+    response = client.get("/api/v1/projects", headers={"Accept-Encoding": "gzip, br"})
+    assert response.headers["content-encoding"] == "br"
+    assert response.content == plain.content
+
+
+def test_compression_savings(client, db_session):
+    """Большие списки на проводе занимают меньше трети исходного размера"""
+    chat = _add_projects(db_session, 200)
+    endpoints = [
+        "/api/v1/projects",
+        "/api/v1/construction-objects",
+        f"/api/v1/chats/{chat.id}/messages?limit=200",
+    ]
+    for url in endpoints:
+        body = client.get(url, headers={"Accept-Encoding": "identity"}).content
+        for encoding in CompressionMiddleware(None).encodings:
+            wire = client.get(url, headers={"Accept-Encoding": encoding})
+            assert wire.headers["content-encoding"] == encoding
+            assert wire.content == body
+            assert int(wire.headers["content-length"]) < len(body) / 3
@@ -1,8 +1,10 @@
 import pytest
 from uuid import uuid4
 from datetime import datetime, timedelta
-from app.models.project import Project
+from app.models.chat import Chat
+from app.models.project import Project, ProjectStage, StageStatus
 from app.models.construction_site import ConstructionSite, Camera
+from tests.conftest import assert_query_budget
 
 
 def test_get_construction_site_by_project(client, db_session):
@@ -162,3 +164,76 @@ def test_get_camera_not_found(client, db_session):
     response = client.get(f"/api/v1/construction-sites/{site_id}/cameras/{fake_camera_id}")
     assert response.status_code == 404
 
+
+
+def _add_construction_objects(db_session, count):
+    base_time = datetime.utcnow()
+    for i in range(count):
+        project = Project(
+            id=uuid4(),
+            name=f"Объект {i}",
+            address="Москва",
+            area=100.0,
+            floors=2,
+            price=1000000.0
+        )
+        project.stages = [ProjectStage(id=uuid4(), name="Фундамент", status=StageStatus.PENDING)]
+        project.construction_site = ConstructionSite(id=uuid4(), created_at=base_time + timedelta(minutes=i))
+        project.chats = [Chat(id=uuid4(), specialist_name="Специалист")]
+        db_session.add(project)
+    db_session.commit()
+
+
+def test_get_construction_objects_pagination(client, db_session):
+    """Список объектов строится фиксированным числом запросов и листается курсором"""
+    _add_construction_objects(db_session, 5)
+
+    response = client.get("/api/v1/construction-objects", params={"limit": 3})
+    assert response.status_code == 200
+    first_page = response.json()
+    assert [item["name"] for item in first_page] == ["Объект 0", "Объект 1", "Объект 2"]
+    assert all(item["chat_id"] and len(item["stages"]) == 1 for item in first_page)
+    # Площадки с проектами и чатами + этапы страницы
+    assert_query_budget(response, 2)
+
+    cursor = response.headers["X-Next-Cursor"]
+    response = client.get("/api/v1/construction-objects", params={"limit": 3, "cursor": cursor})
+    assert response.status_code == 200
+    assert [item["name"] for item in response.json()] == ["Объект 3", "Объект 4"]
+    assert "X-Next-Cursor" not in response.headers
+
+    response = client.get("/api/v1/construction-objects")
+    assert len(response.json()) == 5
+
+
+def test_get_construction_objects_sparse_fields(client, db_session, query_counter):
+    """fields= сужает SELECT и ответ; курсор страниц сохраняется"""
+    _add_construction_objects(db_session, 3)
+    response = client.get("/api/v1/construction-objects", params={"fields": "name,price", "limit": 2})
+    assert response.status_code == 200
+    data = response.json()
+    assert [set(item) for item in data] == [{"id", "name", "price"}] * 2
+    # Без этапов и подзапроса чата, только нужные столбцы
+    assert_query_budget(response, 1)
+    assert "chats" not in query_counter[0] and "address" not in query_counter[0]
+
+    cursor = response.headers["X-Next-Cursor"]
+    response = client.get("/api/v1/construction-objects", params={"fields": "chat_id,stages", "cursor": cursor})
+    data = response.json()
+    assert len(data) == 1 and set(data[0]) == {"id", "chat_id", "stages"}
+    assert data[0]["chat_id"] and len(data[0]["stages"]) == 1
+
+
+def test_get_construction_object_by_id(client, db_session):
+    """Детали объекта строительства"""
+    _add_construction_objects(db_session, 1)
+    site = db_session.query(ConstructionSite).first()
+
+    response = client.get(f"/api/v1/construction-objects/{site.id}")
+    assert response.status_code == 200
+    data = response.json()
+    assert data["id"] == str(site.id)
+    assert data["chat_id"]
+
+    response = client.get(f"/api/v1/construction-objects/{uuid4()}")
+    assert response.status_code == 404
@@ -1,8 +1,15 @@
+import asyncio
 import pytest
 from uuid import uuid4
-from datetime import datetime
+from datetime import datetime, timedelta
+from sqlalchemy import select
+from sqlalchemy.dialects import mssql, postgresql
+from app.api.v1.endpoints.documents import approve_document
+from app.core.exceptions import ConflictError
+from app.core.pagination import _Explain, keyset_predicate
 from app.models.project import Project
 from app.models.document import Document, DocumentStatus
+from tests.conftest import TestingAsyncSessionLocal, assert_query_budget
 
 
 def test_get_documents_empty(client):
@@ -109,3 +116,149 @@ def test_reject_document(client, db_session):
     assert document.status == DocumentStatus.REJECTED
     assert document.rejection_reason == "Несоответствие требованиям"
 
+
+
+def test_get_document_conditional(client, db_session):
+    """Документ отдает ETag и Last-Modified; 304 по любому из валидаторов"""
+    project = Project(id=uuid4(), name="Проект", address="Москва", area=100.0, floors=2, price=1000000.0)
+    document = Document(id=uuid4(), project_id=project.id, title="Документ", status=DocumentStatus.PENDING)
+    db_session.add_all([project, document])
+    db_session.commit()
+
+    response = client.get(f"/api/v1/documents/{document.id}")
+    etag = response.headers["ETag"]
+    last_modified = response.headers["Last-Modified"]
+
+    response = client.get(f"/api/v1/documents/{document.id}", headers={"If-None-Match": f'"other", {etag}'})
+    assert response.status_code == 304
+    response = client.get(f"/api/v1/documents/{document.id}", headers={"If-Modified-Since": last_modified})
+    assert response.status_code == 304
+    assert response.headers["Last-Modified"] == last_modified
+
+    response = client.post(f"/api/v1/documents/{document.id}/approve")
+    assert response.status_code == 204
+    response = client.get(f"/api/v1/documents/{document.id}", headers={"If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.json()["status"] == "approved"
+
+    response = client.get("/api/v1/documents")
+    response = client.get("/api/v1/documents", headers={"If-None-Match": response.headers["ETag"]})
+    assert response.status_code == 304
+
+
+def test_get_documents_sparse_fields(client, db_session, query_counter):
+    """fields= сужает SELECT и ответ списка документов"""
+    project = Project(id=uuid4(), name="Проект", address="Москва", area=100.0, floors=2, price=1000000.0)
+    db_session.add(project)
+    db_session.add_all([
+        Document(id=uuid4(), project_id=project.id, title=f"Документ {i}", description="Описание")
+        for i in range(3)
+    ])
+    db_session.commit()
+
+    response = client.get("/api/v1/documents", params={"fields": "title,status"})
+    assert response.status_code == 200
+    assert [set(item) for item in response.json()] == [{"id", "title", "status"}] * 3
+    assert response.json()[0]["status"] == "pending"
+    assert "description" not in query_counter[0]
+
+    etag = response.headers["ETag"]
+    response = client.get("/api/v1/documents", params={"fields": "title,status"}, headers={"If-None-Match": etag})
+    assert response.status_code == 304
+
+    assert client.get("/api/v1/documents", params={"fields": "unknown"}).status_code == 400
+
+
+def test_get_documents_filters_and_pagination(client, db_session):
+    """Фильтры по проекту и статусу, страницы по курсору (новые первыми) и число документов"""
+    projects = [
+        Project(id=uuid4(), name=f"Проект {i}", address="Москва", area=100.0, floors=2, price=1000000.0)
+        for i in range(2)
+    ]
+    db_session.add_all(projects)
+    base_time = datetime(2026, 10, 17, 12, 0, 0)
+    db_session.add_all([
+        Document(
+            id=uuid4(),
+            project_id=projects[i % 2].id,
+            title=f"Документ {i}",
+            status=DocumentStatus.APPROVED if i % 3 == 0 else DocumentStatus.PENDING,
+            created_at=base_time + timedelta(minutes=i),
+        )
+        for i in range(10)
+    ])
+    db_session.commit()
+
+    params = {"project_id": str(projects[0].id), "limit": 2, "include_total": "true"}
+    response = client.get("/api/v1/documents", params=params)
+    assert response.status_code == 200
+    assert [item["title"] for item in response.json()] == ["Документ 8", "Документ 6"]
+    assert response.headers["X-Total-Count"] == "5"
+    # COUNT и страница
+    assert_query_budget(response, 2)
+
+    titles = []
+    cursor = response.headers["X-Next-Cursor"]
+    while cursor:
+        response = client.get("/api/v1/documents", params={"project_id": str(projects[0].id), "limit": 2, "cursor": cursor})
+        titles += [item["title"] for item in response.json()]
+        cursor = response.headers.get("X-Next-Cursor")
+    assert titles == ["Документ 4", "Документ 2", "Документ 0"]
+
+    response = client.get("/api/v1/documents", params={"status": "approved"})
+    assert [item["title"] for item in response.json()] == ["Документ 9", "Документ 6", "Документ 3", "Документ 0"]
+    assert "X-Next-Cursor" not in response.headers and "X-Total-Count" not in response.headers
+
+    assert client.get("/api/v1/documents", params={"status": "unknown"}).status_code == 422
+    assert client.get("/api/v1/documents", params={"cursor": "broken"}).status_code == 400
+
+
+def test_estimated_count_uses_planner_on_postgresql():
+    """На PostgreSQL число строк сначала оценивается через EXPLAIN"""
+    query = select(Document.id).where(Document.status == DocumentStatus.PENDING)
+    sql = str(_Explain(query).compile(dialect=postgresql.dialect()))
+    assert sql.startswith("EXPLAIN (FORMAT JSON) SELECT documents.id")
+
+
+def test_keyset_predicate_uses_row_values():
+    """Курсор - сравнение row values (один диапазон индекса), без него - раскрытие через OR"""
+    key = (Document.created_at, Document.id)
+    query = select(Document.id).where(
+        Document.project_id == uuid4(),
+        keyset_predicate(key, (datetime.utcnow(), uuid4()), ascending=False),
+    )
+    sql = str(query.compile(dialect=postgresql.dialect()))
+    assert "AND (documents.created_at, documents.id) < (" in sql
+    assert " OR " not in sql
+
+    sql = str(query.compile(dialect=mssql.dialect()))
+    assert "AND (documents.created_at < :created_at_1 OR documents.created_at = :created_at_2 AND" in sql
+
+
+def test_approve_document_conflict(db_session):
+    """Если статус изменил параллельный запрос, одобрение завершается 409 и ничего не меняет"""
+    project = Project(id=uuid4(), name="Проект", address="Москва", area=100.0, floors=2, price=1000000.0)
+    document = Document(id=uuid4(), project_id=project.id, title="Документ", status=DocumentStatus.PENDING)
+    db_session.add_all([project, document])
+    db_session.commit()
+
+    async def approve_stale():
+        async with TestingAsyncSessionLocal() as db:
+            # Первый запрос прочитал документ в статусе PENDING...
+            stale = await db.get(Document, document.id)
+            # ...а второй успел его отклонить
+            db_session.query(Document).filter_by(id=document.id).update(
+                {"status": DocumentStatus.REJECTED, "rejection_reason": "Нет подписи"}
+            )
+            db_session.commit()
+            assert stale.status == DocumentStatus.PENDING
+            await approve_document(document.id, db)
+
+    with pytest.raises(ConflictError) as exc_info:
+        asyncio.run(approve_stale())
+    assert exc_info.value.status_code == 409
+
+    db_session.expire_all()
+    document = db_session.get(Document, document.id)
+    assert document.status == DocumentStatus.REJECTED
+    assert document.approved_at is None
@@ -0,0 +1,86 @@
+import logging
+from datetime import datetime, timedelta
+from uuid import uuid4
+
+import pytest
+
+from app.core.instrumentation import QueryStats, parse_server_timing
+from app.models.chat import Chat, Message
+from app.models.construction_site import ConstructionSite
+from app.models.document import Document
+from app.models.project import Project, ProjectStage, StageStatus
+from tests.conftest import assert_query_budget
+
+
+def _add_data(db_session):
+    base_time = datetime(2026, 10, 17, 12, 0, 0)
+    for i in range(5):
+        project = Project(id=uuid4(), name=f"Проект {i}", address="Москва", area=100.0, floors=2, price=1000000.0)
+        project.stages = [ProjectStage(id=uuid4(), name=f"Этап {n}", status=StageStatus.PENDING) for n in range(3)]
+        project.construction_site = ConstructionSite(id=uuid4(), created_at=base_time + timedelta(minutes=i))
+        project.documents = [Document(id=uuid4(), title=f"Документ {n}") for n in range(3)]
+        chat = Chat(id=uuid4(), specialist_name="Специалист")
+        chat.messages = [Message(id=uuid4(), text=f"Сообщение {n}", is_from_specialist=False) for n in range(3)]
+        project.chats = [chat]
+        db_session.add(project)
+    db_session.commit()
+    return project, chat
+
+
+def test_server_timing_format():
+    """Метрика db в Server-Timing разбирается обратно в статистику"""
+    header = QueryStats(statements=3, db_time=0.01234, rows=7).server_timing()
+    assert header == 'db;dur=12.34;desc="3 queries, 7 rows"'
+    assert parse_server_timing(f'app;dur=1, {header}') == QueryStats(statements=3, db_time=0.01234, rows=7)
+    assert parse_server_timing("app;dur=1") is None
+
+
+@pytest.mark.parametrize("url, budget", [
+    ("/api/v1/chats", 3),
+    ("/api/v1/chats/{chat_id}/messages", 2),
+    ("/api/v1/projects", 2),
+    ("/api/v1/projects/{project_id}", 2),
+    ("/api/v1/construction-objects", 2),
+    ("/api/v1/documents", 1),
+    ("/api/v1/admin/statistics", 1),
+])
+def test_endpoint_query_budgets(client, db_session, url, budget):
+    """Число SQL statements read-эндпоинтов не зависит от объема данных"""
+    project, chat = _add_data(db_session)
+    response = client.get(url.format(chat_id=chat.id, project_id=project.id))
+    assert response.status_code == 200
+    assert_query_budget(response, budget)
+
+
+def test_query_budget_exceeded(client, db_session):
+    """Превышение бюджета - ошибка теста с эндпоинтом и числом запросов"""
+    project, _ = _add_data(db_session)
+    response = client.get("/api/v1/projects")
+    with pytest.raises(AssertionError, match="GET /api/v1/projects: 2 SQL statements, budget 1"):
+        assert_query_budget(response, 1)
+
+
+def test_rows_and_request_log(client, db_session, caplog):
+    """Измененные строки учитываются, запрос логируется с SQL-статистикой"""
+    project, _ = _add_data(db_session)
+    document_ids = [str(document.id) for document in project.documents]
+
+    with caplog.at_level(logging.INFO, logger="app.core.instrumentation"):
+        response = client.post("/api/v1/admin/documents/batch-approve", json={"ids": document_ids})
+    assert response.status_code == 204
+    stats = assert_query_budget(response, 1)
+    assert stats.rows == 3 and stats.db_time > 0
+
+    record = next(record for record in caplog.records if record.http_path == "/api/v1/admin/documents/batch-approve")
+    assert record.levelno == logging.INFO
+    assert (record.http_status, record.db_statements, record.db_rows) == (204, 1, 3)
+    assert "queries=1" in record.getMessage()
+
+
+def test_query_warning_threshold(client, db_session, caplog, monkeypatch):
+    """Запрос с числом statements выше порога логируется как warning"""
+    monkeypatch.setattr("app.core.instrumentation.settings.REQUEST_QUERY_WARNING_THRESHOLD", 1)
+    _add_data(db_session)
+    with caplog.at_level(logging.WARNING, logger="app.core.instrumentation"):
+        client.get("/api/v1/projects")
+    assert [record.db_statements for record in caplog.records] == [2]
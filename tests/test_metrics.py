@@ -0,0 +1,103 @@
+from uuid import uuid4
+
+import pytest
+from sqlalchemy.exc import OperationalError
+
+import app.main
+from app.core.cache import response_cache
+from app.core.metrics import LoopLagMonitor, RequestMetrics, request_metrics
+from app.models.outbox import BroadcastOutbox
+from app.models.project import Project
+
+
+@pytest.fixture(autouse=True)
+def _clear_request_metrics():
+    request_metrics.clear()
+    yield
+    request_metrics.clear()
+
+
+def _metric_values(text: str) -> dict:
+    """Значения метрик по строке имени с метками"""
+    return dict(
+        line.rsplit(" ", 1)
+        for line in text.splitlines()
+        if line and not line.startswith("#")
+    )
+
+
+def test_histogram_buckets_are_cumulative():
+    """Корзины гистограммы накопительные, +Inf равна числу запросов"""
+    metrics = RequestMetrics(buckets=(0.1, 1.0))
+    for duration in (0.05, 0.5, 0.5, 3.0):
+        metrics.observe("/items/{id}", "GET", 200, duration)
+    lines = []
+    metrics.render(lines)
+    values = _metric_values("\n".join(lines))
+
+    labels = 'method="GET",route="/items/{id}",status="200"'
+    assert values[f'http_request_duration_seconds_bucket{{{labels},le="0.1"}}'] == "1"
+    assert values[f'http_request_duration_seconds_bucket{{{labels},le="1.0"}}'] == "3"
+    assert values[f'http_request_duration_seconds_bucket{{{labels},le="+Inf"}}'] == "4"
+    assert values[f"http_request_duration_seconds_count{{{labels}}}"] == "4"
+    assert float(values[f"http_request_duration_seconds_sum{{{labels}}}"]) == pytest.approx(4.05)
+
+
+def test_loop_lag_keeps_maximum():
+    monitor = LoopLagMonitor(interval=0.1)
+    monitor.record(0.2)
+    monitor.record(-0.001)
+    assert (monitor.last_lag, monitor.max_lag) == (0.0, 0.2)
+
+
+def test_requests_grouped_by_route_template(client, db_session):
+    """Запросы к разным id учитываются в одной серии шаблона маршрута"""
+    projects = [Project(id=uuid4(), name=f"Проект {i}", address="Москва", area=100.0, floors=2, price=1.0) for i in range(2)]
+    db_session.add_all(projects)
+    db_session.commit()
+
+    for project in projects:
+        assert client.get(f"/api/v1/projects/{project.id}").status_code == 200
+    assert client.get(f"/api/v1/projects/{uuid4()}").status_code == 404
+    # Значение параметра совпадает с сегментом префикса
+    assert client.get("/api/v1/projects/projects").status_code == 422
+    assert client.get("/no-such-path").status_code == 404
+
+    response = client.get("/metrics")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain; version=0.0.4")
+    values = _metric_values(response.text)
+    route = 'route="/api/v1/projects/{id}"'
+    assert values[f'http_request_duration_seconds_count{{method="GET",{route},status="200"}}'] == "2"
+    assert values[f'http_request_duration_seconds_count{{method="GET",{route},status="404"}}'] == "1"
+    assert values['http_request_duration_seconds_count{method="GET",route="unmatched",status="404"}'] == "1"
+    assert values[f'http_request_duration_seconds_count{{method="GET",{route},status="422"}}'] == "1"
+    assert not any("{id}/{id}" in name for name in values)
+
+
+def test_runtime_gauges(client, db_session):
+    """Пул соединений, очередь трансляции, кэш и задержка event loop"""
+    db_session.add_all([BroadcastOutbox(message_id=uuid4(), payload={"type": "message"}) for _ in range(3)])
+    db_session.commit()
+
+    values = _metric_values(client.get("/metrics").text)
+    assert values["broadcast_queue_depth"] == "3"
+    assert values["broadcast_messages_sent_total"] == "0"
+    assert int(values["db_pool_overflow"]) >= 0
+    assert float(values["response_cache_hit_ratio"]) == response_cache.hit_ratio()
+    for name in ("db_pool_size", "db_pool_checked_out", "event_loop_lag_seconds", "event_loop_lag_max_seconds"):
+        assert name in values
+
+
+def test_metrics_served_without_database(client, monkeypatch):
+    """Недоступная БД убирает только глубину очереди, остальные метрики отдаются"""
+    async def failing_backlog(db):
+        raise OperationalError("SELECT count(*)", {}, ConnectionRefusedError("connection refused"))
+
+    monkeypatch.setattr(app.main, "outbox_backlog", failing_backlog)
+    response = client.get("/metrics")
+    assert response.status_code == 200
+    values = _metric_values(response.text)
+    assert "broadcast_queue_depth" not in values
+    for name in ("db_pool_size", "broadcast_messages_sent_total", "response_cache_hit_ratio", "event_loop_lag_seconds"):
+        assert name in values
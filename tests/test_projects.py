@@ -1,6 +1,15 @@
+import asyncio
+
 import pytest
-from uuid import uuid4
+from uuid import UUID, uuid4
+from sqlalchemy import select
+from sqlalchemy.exc import InvalidRequestError
+from sqlalchemy.orm import selectinload
+from app.models.chat import Chat
+from app.models.construction_site import ConstructionSite
 from app.models.project import Project, ProjectStage, StageStatus
+from app.schemas.project import ProjectResponse
+from tests.conftest import TestingAsyncSessionLocal, assert_query_budget
 
 
 def test_get_projects_empty(client):
@@ -82,3 +91,138 @@ def test_request_construction(client, db_session):
     response = client.post(f"/api/v1/projects/{project_id}/request")
     assert response.status_code == 204
 
+
+def test_start_construction_is_idempotent(client, db_session):
+    """Повторный запуск строительства не создает вторую площадку и второй чат"""
+    project = Project(id=uuid4(), name="Проект", address="Москва", area=100.0, floors=2, price=1000000.0)
+    db_session.add(project)
+    db_session.commit()
+
+    for address in ("Москва, ул. Первая, 1", "Москва, ул. Вторая, 2"):
+        response = client.post(f"/api/v1/projects/{project.id}/start", json={"address": address})
+        assert response.status_code == 200
+        assert response.json()["status"] == "construction"
+
+    assert response.json()["address"] == "Москва, ул. Вторая, 2"
+    assert db_session.query(ConstructionSite).filter_by(project_id=project.id).count() == 1
+    assert db_session.query(Chat).filter_by(project_id=project.id).count() == 1
+
+
+def _add_projects_with_relations(db_session, count):
+    for i in range(count):
+        project = Project(
+            id=uuid4(),
+            name=f"Проект {i}",
+            address="Москва",
+            description="Описание",
+            area=100.0,
+            floors=2,
+            price=1000000.0
+        )
+        project.stages = [
+            ProjectStage(id=uuid4(), name=f"Этап {j}", status=StageStatus.PENDING)
+            for j in range(3)
+        ]
+        project.construction_site = ConstructionSite(id=uuid4())
+        db_session.add(project)
+    db_session.commit()
+
+
+def test_get_projects_query_count_is_constant(client, db_session):
+    """Число запросов списка проектов не зависит от количества проектов"""
+    _add_projects_with_relations(db_session, 1)
+    response = client.get("/api/v1/projects")
+    assert response.status_code == 200
+    single = assert_query_budget(response, 2).statements
+
+    _add_projects_with_relations(db_session, 9)
+    response = client.get("/api/v1/projects")
+    assert response.status_code == 200
+    data = response.json()
+    assert len(data) == 10
+    assert all(len(item["stages"]) == 3 and item["object_id"] for item in data)
+    assert assert_query_budget(response, 2).statements == single
+
+
+def test_get_projects_10k_rows(client, db_session):
+    """10 000 проектов: ответ совпадает с сериализацией схемы по объектам"""
+    _add_projects_with_relations(db_session, 10_000)
+    response = client.get("/api/v1/projects")
+    assert response.status_code == 200
+    # Проекты одним запросом, этапы - пакетами selectinload по 500 проектов
+    assert_query_budget(response, 1 + 10_000 // 500)
+
+    projects = {
+        project.id: project
+        for project in db_session.scalars(
+            select(Project).options(selectinload(Project.stages), selectinload(Project.construction_site))
+        )
+    }
+    ids = [UUID(item["id"]) for item in response.json()]
+    assert len(ids) == 10_000
+    expected = b"[" + b",".join(
+        ProjectResponse.model_validate(projects[id]).model_dump_json(by_alias=True).encode() for id in ids
+    ) + b"]"
+    assert response.content == expected
+
+
+def test_get_projects_not_modified(client, db_session):
+    """Повторный запрос с If-None-Match получает 304, изменение этапа меняет ETag"""
+    _add_projects_with_relations(db_session, 2)
+    response = client.get("/api/v1/projects")
+    etag = response.headers["ETag"]
+    assert response.headers["Cache-Control"] == "private, no-cache"
+    assert "Last-Modified" not in response.headers
+
+    response = client.get("/api/v1/projects", headers={"If-None-Match": etag})
+    assert response.status_code == 304
+    assert response.content == b""
+    assert response.headers["ETag"] == etag
+    # Ответ из кэша: без обращения к БД
+    assert_query_budget(response, 0)
+
+    stage = db_session.query(ProjectStage).first()
+    stage.status = StageStatus.COMPLETED
+    db_session.commit()
+    response = client.get("/api/v1/projects", headers={"If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.headers["ETag"] != etag
+
+    project_id = response.json()[0]["id"]
+    response = client.get(f"/api/v1/projects/{project_id}")
+    response = client.get(f"/api/v1/projects/{project_id}", headers={"If-None-Match": response.headers["ETag"]})
+    assert response.status_code == 304
+
+
+def test_get_projects_sparse_fields(client, db_session, query_counter):
+    """fields= сужает и SELECT, и JSON; этапы и площадка загружаются только по запросу"""
+    _add_projects_with_relations(db_session, 3)
+    response = client.get("/api/v1/projects", params={"fields": "name,price,image_url"})
+    assert response.status_code == 200
+    data = response.json()
+    assert len(data) == 3
+    assert all(set(item) == {"id", "name", "price", "image_url"} for item in data)
+    assert all(isinstance(item["price"], int) for item in data)
+    assert_query_budget(response, 1)
+    assert "description" not in query_counter[0] and "bedrooms" not in query_counter[0]
+
+    response = client.get("/api/v1/projects", params={"fields": "stages,object_id"})
+    data = response.json()
+    assert all(set(item) == {"id", "stages", "object_id"} and len(item["stages"]) == 3 for item in data)
+    assert_query_budget(response, 2)
+
+    response = client.get("/api/v1/projects", params={"fields": "name,secret"})
+    assert response.status_code == 400
+
+
+def test_lazy_load_raises_in_tests(db_session):
+    """Ленивая загрузка связи без явной предзагрузки падает, а не выполняет запрос"""
+    _add_projects_with_relations(db_session, 1)
+
+    async def load_stages():
+        async with TestingAsyncSessionLocal() as db:
+            project = (await db.execute(select(Project))).scalars().first()
+            return project.stages
+
+    with pytest.raises(InvalidRequestError, match="lazy=.raise"):
+        asyncio.run(load_stages())
@@ -0,0 +1,89 @@
+from enum import Enum
+from typing import Any, List, get_args
+from uuid import uuid4
+
+from pydantic import TypeAdapter, field_validator
+
+from app.models.project import Project, ProjectStage, ProjectStatus, StageStatus
+from app.schemas.base import BaseSchema
+from app.schemas.project import ProjectResponse, ProjectStageResponse
+
+
+class _WildcardStage(ProjectStageResponse):
+    """Прежний вариант: Python-валидатор на каждом поле и строковый статус"""
+    status: str
+
+    @field_validator('*', mode='before')
+    @classmethod
+    def convert_enum_to_value(cls, v: Any) -> Any:
+        if isinstance(v, Enum):
+            return v.value
+        return v
+
+
+def _all_schemas(cls=BaseSchema):
+    for subclass in cls.__subclasses__():
+        yield subclass
+        yield from _all_schemas(subclass)
+
+
+def test_schemas_have_no_wildcard_validators():
+    """Схемы не навешивают Python-валидаторы на все поля"""
+    for schema in _all_schemas():
+        # Прежние схемы для сравнения в тестах и бенчмарках
+        if schema.__module__.startswith("tests."):
+            continue
+        for decorator in schema.__pydantic_decorators__.field_validators.values():
+            assert '*' not in decorator.info.fields, schema.__name__
+
+
+def _enum_annotation(annotation):
+    """Enum поля (в том числе внутри Optional) или None"""
+    for candidate in (annotation, *get_args(annotation)):
+        if isinstance(candidate, type) and issubclass(candidate, Enum):
+            return candidate
+    return None
+
+
+def test_enum_fields_validated_without_python_calls():
+    """Enum-поля схем проверяются схемой enum pydantic-core без Python-функций (.value и т.п.)"""
+    enum_fields = 0
+    for schema in _all_schemas():
+        if schema.__module__.startswith("tests."):
+            continue
+        fields = schema.__pydantic_core_schema__["schema"]["fields"]
+        for name, field in schema.model_fields.items():
+            if _enum_annotation(field.annotation) is None:
+                continue
+            core = fields[name]["schema"]
+            while core["type"] in ("default", "nullable"):
+                core = core["schema"]
+            assert core["type"] == "enum", f"{schema.__name__}.{name}: {core['type']}"
+            enum_fields += 1
+    assert enum_fields > 0
+
+
+def test_enum_fields_serialize_by_value():
+    """Статусы принимаются как Enum или строка и в JSON отдаются значением"""
+    project = Project(
+        id=uuid4(), name="Проект", address="Москва", area=100.0, floors=2, price=1000000.5, bedrooms=3, bathrooms=2,
+        status=ProjectStatus.CONSTRUCTION,
+        stages=[ProjectStage(id=uuid4(), name="Фундамент", status=StageStatus.IN_PROGRESS)],
+    )
+    data = ProjectResponse.model_validate(project).model_dump(by_alias=True, mode="json")
+    assert data["status"] == "construction"
+    assert data["stages"][0]["status"] == "in_progress"
+    assert ProjectStageResponse(id=uuid4(), name="Этап", status="completed").status == "completed"
+
+
+def test_enum_fields_match_wildcard_validator_output():
+    """Enum-поля без Python-валидатора дают те же байты, что прежний валидатор на каждом поле"""
+    stages = [
+        ProjectStage(id=uuid4(), name=f"Этап {i}", status=list(StageStatus)[i % len(StageStatus)])
+        for i in range(1_000)
+    ]
+    compiled = TypeAdapter(List[ProjectStageResponse])
+    wildcard = TypeAdapter(List[_WildcardStage])
+    compiled_body = compiled.dump_json(compiled.validate_python(stages, from_attributes=True), by_alias=True)
+    wildcard_body = wildcard.dump_json(wildcard.validate_python(stages, from_attributes=True), by_alias=True)
+    assert compiled_body == wildcard_body
@@ -12,6 +12,11 @@ import reactor.core.publisher.Sinks;
 
 import java.time.LocalDateTime;
 import java.time.format.DateTimeFormatter;
+import java.util.Collections;
+import java.util.LinkedHashMap;
+import java.util.List;
+import java.util.Map;
+import java.util.Set;
 import java.util.UUID;
 
 @Slf4j
@@ -20,8 +25,24 @@ import java.util.UUID;
 @RequiredArgsConstructor
 public class MessageBroadcastController {
 
+    /**
+     * REST API доставляет сообщения at-least-once (outbox), поэтому одно сообщение
+     * может прийти повторно. Недавно транслированные messageId запоминаются,
+     * повторы подтверждаются без повторной отправки в комнату.
+     */
+    private static final int RECENT_MESSAGE_IDS_LIMIT = 10_000;
+
     private final ChatRoomManager chatRoomManager;
 
+    private final Set<String> recentMessageIds = Collections.newSetFromMap(
+            Collections.synchronizedMap(new LinkedHashMap<String, Boolean>() {
+                @Override
+                protected boolean removeEldestEntry(Map.Entry<String, Boolean> eldest) {
+                    return size() > RECENT_MESSAGE_IDS_LIMIT;
+                }
+            })
+    );
+
     @PostMapping("/message")
     public ResponseEntity<String> broadcastMessage(
             @RequestBody BroadcastMessageRequest request
@@ -30,39 +51,16 @@ public class MessageBroadcastController {
             log.info("Received broadcast request: messageId={}, chatId={}, text={}, fromSpecialist={}", 
                     request.messageId(), request.chatId(), request.text(), request.fromSpecialist());
             
-            UUID chatId = UUID.fromString(request.chatId());
-            ChatRoomManager.ChatRoom room = chatRoomManager.getRoom(chatId);
-            
-            // Парсим дату из ISO формата
-            // Jackson автоматически парсит ISO формат в LocalDateTime
-            LocalDateTime sentAt = request.sentAt() != null 
-                    ? request.sentAt() 
-                    : LocalDateTime.now();
-            
-            // Используем текущее время для createAt, так как это время создания записи в Java сервисе
-            LocalDateTime createAt = LocalDateTime.now();
-            
-            ChatMessage message = new ChatMessage(
-                    UUID.fromString(request.messageId()),
-                    chatId,
-                    request.text(),
-                    request.fromSpecialist(),
-                    request.isRead(),
-                    sentAt,
-                    createAt
-            );
-            
-            log.info("Broadcasting message to chat room: chatId={}, messageId={}", chatId, message.id());
-            Sinks.EmitResult result = room.getSink().tryEmitNext(message);
+            Sinks.EmitResult result = emit(request);
             
             if (result.isFailure()) {
                 log.error("Failed to broadcast message: result={}, messageId={}, chatId={}", 
-                        result, request.messageId(), chatId);
+                        result, request.messageId(), request.chatId());
                 return ResponseEntity.status(HttpStatus.INTERNAL_SERVER_ERROR)
                         .body("Failed to broadcast message: " + result);
             }
             
-            log.info("Message broadcasted successfully: messageId={} to chat: {}", request.messageId(), chatId);
+            log.info("Message broadcasted successfully: messageId={} to chat: {}", request.messageId(), request.chatId());
             return ResponseEntity.ok("Message broadcasted");
         } catch (Exception e) {
             log.error("Error broadcasting message: messageId={}, chatId={}", 
@@ -72,6 +70,71 @@ public class MessageBroadcastController {
         }
     }
 
+    /**
+     * Пакетная трансляция: REST API копит сообщения за короткое окно и отправляет
+     * их одним запросом. Ошибка отдельного сообщения (переполнение буфера комнаты)
+     * логируется и не приводит к повтору всего пакета, иначе остальные сообщения
+     * пакета были бы доставлены повторно.
+     */
+    @PostMapping("/messages")
+    public ResponseEntity<String> broadcastMessages(
+            @RequestBody List<BroadcastMessageRequest> requests
+    ) {
+        log.info("Received broadcast batch: size={}", requests.size());
+        int failed = 0;
+        for (BroadcastMessageRequest request : requests) {
+            try {
+                Sinks.EmitResult result = emit(request);
+                if (result.isFailure()) {
+                    failed++;
+                    log.error("Failed to broadcast message: result={}, messageId={}, chatId={}",
+                            result, request.messageId(), request.chatId());
+                }
+            } catch (Exception e) {
+                failed++;
+                log.error("Error broadcasting message: messageId={}, chatId={}",
+                        request.messageId(), request.chatId(), e);
+            }
+        }
+        return ResponseEntity.ok("Messages broadcasted: " + (requests.size() - failed) + "/" + requests.size());
+    }
+
+    private Sinks.EmitResult emit(BroadcastMessageRequest request) {
+        if (!recentMessageIds.add(request.messageId())) {
+            log.info("Skipping duplicate broadcast: messageId={}", request.messageId());
+            return Sinks.EmitResult.OK;
+        }
+        UUID chatId = UUID.fromString(request.chatId());
+        ChatRoomManager.ChatRoom room = chatRoomManager.getRoom(chatId);
+        
+        // Парсим дату из ISO формата
+        // Jackson автоматически парсит ISO формат в LocalDateTime
+        LocalDateTime sentAt = request.sentAt() != null 
+                ? request.sentAt() 
+                : LocalDateTime.now();
+        
+        // Используем текущее время для createAt, так как это время создания записи в Java сервисе
+        LocalDateTime createAt = LocalDateTime.now();
+        
+        ChatMessage message = new ChatMessage(
+                UUID.fromString(request.messageId()),
+                chatId,
+                request.text(),
+                request.fromSpecialist(),
+                request.isRead(),
+                sentAt,
+                createAt
+        );
+        
+        log.info("Broadcasting message to chat room: chatId={}, messageId={}", chatId, message.id());
+        Sinks.EmitResult result = room.getSink().tryEmitNext(message);
+        if (result.isFailure()) {
+            // Неудачную отправку можно повторить
+            recentMessageIds.remove(request.messageId());
+        }
+        return result;
+    }
+
     public record BroadcastMessageRequest(
             String messageId,
             String chatId,
@@ -92,10 +92,33 @@ public class ChatService implements WebSocketHandler {
         
         MessageEntry messageEntry = MessageEntry.ofText(request.text(), chatId, request.fromSpecialist());
 
+        // Сводка чата (последнее сообщение, счетчик непрочитанных)
+        // и уведомление администратору пишутся тем же запросом, что и вставка
+        // сообщения, как и в REST API
         return databaseClient.sql("""
-                INSERT INTO messages (id, chat_id, text, sent_at, is_from_specialist, is_read, created_at)
-                VALUES (gen_random_uuid(), $1, $2, $3, $4, $5, $6)
-                RETURNING id, chat_id, text, sent_at, is_from_specialist, is_read, created_at
+                WITH inserted AS (
+                    INSERT INTO messages (id, chat_id, text, sent_at, is_from_specialist, is_read, created_at)
+                    VALUES (gen_random_uuid(), $1, $2, $3, $4, $5, $6)
+                    RETURNING id, chat_id, text, sent_at, is_from_specialist, is_read, created_at
+                ), summary AS (
+                    UPDATE chats SET
+                        last_message = CASE
+                            WHEN chats.last_message_at IS NULL OR chats.last_message_at <= inserted.sent_at
+                            THEN inserted.text ELSE chats.last_message END,
+                        last_message_at = GREATEST(chats.last_message_at, inserted.sent_at),
+                        unread_count = chats.unread_count
+                            + CASE WHEN inserted.is_from_specialist THEN 1 ELSE 0 END
+                    FROM inserted
+                    WHERE chats.id = inserted.chat_id
+                ), notification AS (
+                    INSERT INTO notifications (id, type, title, message, project_id, chat_id, is_read, created_at)
+                    SELECT gen_random_uuid(), 'NEW_MESSAGE', 'Новое сообщение', inserted.text,
+                           chats.project_id, inserted.chat_id, false, inserted.sent_at
+                    FROM inserted
+                    JOIN chats ON chats.id = inserted.chat_id
+                    WHERE NOT inserted.is_from_specialist
+                )
+                SELECT id, chat_id, text, sent_at, is_from_specialist, is_read, created_at FROM inserted
                 """)
                 .bind("$1", messageEntry.getChatId())
                 .bind("$2", messageEntry.getText())
@@ -132,7 +155,8 @@ public class ChatService implements WebSocketHandler {
                 .filter(message -> !message.isRead())
                 .flatMap(message -> {
                     message.setRead(true);
-                    return messageRepository.save(message);
+                    return messageRepository.save(message)
+                            .flatMap(saved -> decrementUnreadCount(saved).thenReturn(saved));
                 })
                 .map(ChatMessage::new)
                 .doOnNext(message -> {
@@ -147,6 +171,17 @@ public class ChatService implements WebSocketHandler {
                 }));
     }
 
+    private Mono<Void> decrementUnreadCount(MessageEntry message) {
+        if (!message.isFromSpecialist()) {
+            return Mono.empty();
+        }
+        return databaseClient.sql("""
+                UPDATE chats SET unread_count = GREATEST(unread_count - 1, 0) WHERE id = $1
+                """)
+                .bind("$1", message.getChatId())
+                .then();
+    }
+
     private UUID getChatUuid(WebSocketSession session) {
         URI uri = session.getHandshakeInfo().getUri();
         String path = uri.getPath();